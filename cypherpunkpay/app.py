@@ -2,11 +2,15 @@ from cypherpunkpay.globals import *
 from cypherpunkpay.config.config import Config
 from cypherpunkpay.db.db import DB
 from cypherpunkpay.db.sqlite_db import SqliteDB
+from cypherpunkpay.explorers.explorer_registry import ExplorerRegistry
 from cypherpunkpay.full_node_clients.bitcoin_core_client import BitcoinCoreClient
 from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcError
+from cypherpunkpay.jobs.blockchain_height_events import BlockchainHeightEvents
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
 from cypherpunkpay.jobs.job_adder import JobAdder
 from cypherpunkpay.jobs.job_scheduler import JobScheduler
 from cypherpunkpay.ln.lightning_client import LightningClient, LightningException
+from cypherpunkpay.models.coin_networks import CoinNetworks
 
 from cypherpunkpay.net.tor_client.base_tor_circuits import BaseTorCircuits
 from cypherpunkpay.net.tor_client.official_tor_circuits import OfficialTorCircuits
@@ -29,15 +33,21 @@ class App(object, metaclass=Singleton):
     _ln_client: LightningClient = None
     _price_tickers: PriceTickers = None
     _job_scheduler: [JobScheduler, None] = None
+    _charge_refresh_engine: [ChargeRefreshEngine, None] = None
+    _blockchain_height_events: BlockchainHeightEvents = None
+    _coin_networks: CoinNetworks = None
 
-    def __init__(self, settings=None, config=None, job_scheduler=None, db=None, price_tickers=None):
+    def __init__(self, settings=None, config=None, job_scheduler=None, db=None, price_tickers=None, charge_refresh_engine=None):
         if settings is None:
             settings = {}
         self._silence_logging_for_dependencies()
         self._config = config if config else Config(settings)   # TODO: remove 'settings' param compatibility
-        self._db = db if db else SqliteDB(self._config.db_file_path())
+        self._db = db if db else SqliteDB(self._config.db_file_path(), assert_types=not self._config.prod_env())
         self._db.connect()
         self._db.migrate()
+        self._coin_networks = CoinNetworks({coin: self._config.cc_network(coin) for coin in self._config.supported_coins()})
+        self._coin_networks.load(self._db)
+        self._log_unknown_block_explorers()
         self._qr_cache = {}
         if self.config().use_tor():
             self._connect_tor()
@@ -51,6 +61,8 @@ class App(object, metaclass=Singleton):
             self._connect_ln_node()
         self._price_tickers = price_tickers if price_tickers else PriceTickers(self._http_client)
         self._job_scheduler = job_scheduler if job_scheduler else JobScheduler()
+        self._charge_refresh_engine = charge_refresh_engine if charge_refresh_engine else ChargeRefreshEngine()
+        self._blockchain_height_events = BlockchainHeightEvents()
         JobAdder(self).add_full_time_jobs()
 
     @staticmethod
@@ -58,6 +70,10 @@ class App(object, metaclass=Singleton):
         log.getLogger('apscheduler').setLevel(log.CRITICAL)
         log.getLogger('apscheduler.scheduler').setLevel(log.CRITICAL)
 
+    def _log_unknown_block_explorers(self):
+        for module_klass in ExplorerRegistry.shared().unknown_of(self._db.get_block_explorers_of_unfinished_charges()):
+            log.warning(f'Block explorer {module_klass} assigned to unfinished charges is not supported anymore - they will get new explorers on next refresh')
+
     def _connect_tor(self):
         self._tor_circuits = OfficialTorCircuits(config=self._config)
         self._tor_circuits.connect_and_verify()
@@ -109,6 +125,15 @@ class App(object, metaclass=Singleton):
     def job_scheduler(self):
         return self._job_scheduler
 
+    def charge_refresh_engine(self) -> ChargeRefreshEngine:
+        return self._charge_refresh_engine
+
+    def blockchain_height_events(self) -> BlockchainHeightEvents:
+        return self._blockchain_height_events
+
+    def coin_networks(self) -> CoinNetworks:
+        return self._coin_networks
+
     def tor_circuits(self):
         return self._tor_circuits
 
@@ -128,7 +153,7 @@ class App(object, metaclass=Singleton):
         return self._qr_cache
 
     def current_blockchain_height(self, coin: str) -> int:
-        return self.db().get_blockchain_height(coin, self._config.cc_network(coin))
+        return self._coin_networks.get_current_height(coin)
 
     def get_admin_unique_path_segment(self) -> str:
         if self._config.prod_env():
@@ -148,11 +173,17 @@ class App(object, metaclass=Singleton):
             self._job_scheduler.shutdown()
             self._job_scheduler = None
 
+        if self._charge_refresh_engine:
+            self._charge_refresh_engine.shutdown()
+            self._charge_refresh_engine = None
+
         if self._tor_circuits:
             self._tor_circuits.close()
             self._tor_circuits = None
 
         if self._db:
+            if self._coin_networks:
+                self._coin_networks.persist(self._db)
             self._db.disconnect()
             self._db = None
 
@@ -1,3 +1,4 @@
+from functools import lru_cache
 from typing import Union, Iterable
 
 from cypherpunkpay.globals import *
@@ -9,6 +10,12 @@ from .electrum.crypto import hash_160
 
 
 class Bip32:
+    """ Parsing an xpub and walking the derivation path is pure-Python EC math. The parsed account node, its chain
+        nodes (/0 external, /1 change) and the wallet fingerprint are therefore memoized per xpub, so deriving
+        the next address costs a single CKD step.
+    """
+
+    CACHED_XPUBS = 16
 
     @classmethod
     def validate_p2wpkh_xpub(cls, network: str, btc_account_xpub: str):
@@ -68,14 +75,14 @@ class Bip32:
         return node._replace(xtype='standard').to_xkey(net=net)
 
     @staticmethod
+    @lru_cache(maxsize=CACHED_XPUBS)
     def wallet_fingerprint(xpub: str) -> str:
         return Bip32._wallet_fingerprint_bytes(xpub).hex()
 
     @staticmethod
     def _wallet_fingerprint_bytes(xpub: str) -> bytes:
-        standard_xpub = Bip32.to_standard_xpub(xpub)
-        net = Bip32._electrum_net_for_xpub(standard_xpub)
-        node = BIP32Node.from_xkey(standard_xpub, net=net)
+        # The public key does not depend on the SLIP-132 prefix so there is no need to convert to standard xpub first
+        node = BIP32Node.from_xkey(xpub, net=Bip32._electrum_net_for_xpub(xpub))
         return hash_160(node.eckey.get_public_key_bytes(compressed=True))[0:8]  # do not change this length
 
     @staticmethod
@@ -87,6 +94,22 @@ class Bip32:
 
     @staticmethod
     def _pubkey_at(network_class: type, btc_account_xpub: str, sequence: Union[str, Iterable[int]]) -> bytes:
-        account_node = BIP32Node.from_xkey(btc_account_xpub, net=network_class)
-        pubkey_node = account_node.subkey_at_public_derivation(sequence)  # [84, 0, 0, 0, 0]
+        if not isinstance(sequence, str):
+            sequence = list(sequence)
+            if len(sequence) == 2:
+                # [chain, index] - the common case
+                chain_node = Bip32._chain_node(network_class, btc_account_xpub, sequence[0])
+                pubkey_node = chain_node.subkey_at_public_derivation(sequence[1:])
+                return pubkey_node.eckey.get_public_key_bytes(compressed=True)
+        pubkey_node = Bip32._account_node(network_class, btc_account_xpub).subkey_at_public_derivation(sequence)  # [84, 0, 0, 0, 0]
         return pubkey_node.eckey.get_public_key_bytes(compressed=True)
+
+    @staticmethod
+    @lru_cache(maxsize=CACHED_XPUBS)
+    def _account_node(network_class: type, btc_account_xpub: str) -> BIP32Node:
+        return BIP32Node.from_xkey(btc_account_xpub, net=network_class)
+
+    @staticmethod
+    @lru_cache(maxsize=2 * CACHED_XPUBS)
+    def _chain_node(network_class: type, btc_account_xpub: str, chain: int) -> BIP32Node:
+        return Bip32._account_node(network_class, btc_account_xpub).subkey_at_public_derivation([chain])
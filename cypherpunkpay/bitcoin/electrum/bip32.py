@@ -8,6 +8,7 @@ from typing import List, Tuple, NamedTuple, Union, Iterable, Sequence, Optional
 from .util import bfh, bh2u, BitcoinException
 from . import constants
 from . import ecc
+from . import ecc_fast
 from .crypto import hash_160, hmac_oneshot
 from .bitcoin import rev_hex, int_to_hex, EncodeBase58Check, DecodeBase58Check
 
@@ -86,6 +87,13 @@ def CKD_pub(parent_pubkey: bytes, parent_chaincode: bytes, child_index: int) ->
 # i.e.: 'child_index' does not need to fit into 32 bits here! (c.f. trustedcoin billing)
 def _CKD_pub(parent_pubkey: bytes, parent_chaincode: bytes, child_index: bytes) -> Tuple[bytes, bytes]:
     I = hmac_oneshot(parent_chaincode, parent_pubkey + child_index, hashlib.sha512)
+    if ecc_fast.enabled:
+        if not ecc.is_secret_within_curve_range(I[0:32]):
+            raise ecc.InvalidECPointException()
+        try:
+            return ecc_fast.pubkey_tweak_add(parent_pubkey, I[0:32]), I[32:]
+        except ecc_fast.LibSecp256k1Error:
+            raise ecc.InvalidECPointException()
     pubkey = ecc.ECPrivkey(I[0:32]) + ecc.ECPubkey(parent_pubkey)
     if pubkey.is_at_infinity():
         raise ecc.InvalidECPointException()
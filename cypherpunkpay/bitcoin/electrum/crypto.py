@@ -43,15 +43,26 @@ def hash_160(x: bytes) -> bytes:
     return ripemd(sha256(x))
 
 
-def ripemd(x):
+def _hashlib_ripemd(x):
+    return hashlib.new('ripemd160', x).digest()
+
+
+def _python_ripemd(x):
+    from . import ripemd
+    return ripemd.new(x).digest()
+
+
+def _has_hashlib_ripemd() -> bool:
+    # OpenSSL 3 moved RIPEMD-160 to the legacy provider, so hashlib may or may not have it
     try:
-        md = hashlib.new('ripemd160')
-        md.update(x)
-        return md.digest()
-    except BaseException:
-        from . import ripemd
-        md = ripemd.new(x)
-        return md.digest()
+        hashlib.new('ripemd160')
+        return True
+    except ValueError:
+        return False
+
+
+# Decided once at import time rather than with try/except on every call
+ripemd = _hashlib_ripemd if _has_hashlib_ripemd() else _python_ripemd
 
 
 def hmac_oneshot(key: bytes, msg: bytes, digest) -> bytes:
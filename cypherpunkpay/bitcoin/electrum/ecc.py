@@ -36,6 +36,7 @@ from .util import bfh, bh2u, assert_bytes
 from .crypto import sha256d
 from . import msqr
 from . import constants
+from . import ecc_fast
 
 CURVE_ORDER = SECP256k1.order
 
@@ -107,6 +108,11 @@ def get_y_coord_from_x(x: int, *, odd: bool) -> int:
 def ser_to_point(ser: bytes) -> Tuple[int, int]:
     if ser[0] not in (0x02, 0x03, 0x04):
         raise ValueError('Unexpected first byte: {}'.format(ser[0]))
+    if ecc_fast.enabled:
+        try:
+            return ecc_fast.ser_to_point(ser)
+        except ecc_fast.LibSecp256k1Error:
+            raise InvalidECPointException()
     if ser[0] == 0x04:
         return string_to_number(ser[1:33]), string_to_number(ser[33:])
     x = string_to_number(ser[1:])
@@ -192,6 +198,11 @@ class ECPubkey(object):
             raise Exception('Wrong encoding')
         if recid < 0 or recid > 3:
             raise ValueError('recid is {}, but should be 0 <= recid <= 3'.format(recid))
+        if ecc_fast.enabled:
+            try:
+                return ECPubkey(ecc_fast.recover_pubkey(sig_string, recid, msg_hash))
+            except ecc_fast.LibSecp256k1Error:
+                raise InvalidECPointException()
         ecdsa_verifying_key = _MyVerifyingKey.from_signature(sig_string, recid, msg_hash, curve=SECP256k1)
         ecdsa_point = ecdsa_verifying_key.pubkey.point
         return ECPubkey.from_point(ecdsa_point)
@@ -0,0 +1,46 @@
+# Optional native secp256k1 backend.
+#
+# When the coincurve package (a binding to Bitcoin Core's libsecp256k1) is installed, the hot paths of ecc.py and
+# bip32.py - public key decompression, BIP32 CKD tweak-add and signature pubkey recovery - are delegated to it.
+# Otherwise everything runs on the pure-Python ecdsa package exactly as before.
+#
+# Install with:  pip install coincurve
+
+from typing import Tuple
+
+try:
+    import coincurve
+except ImportError:
+    coincurve = None
+
+HAS_LIBSECP256K1 = coincurve is not None
+
+# Tests flip this to compare both backends
+enabled = HAS_LIBSECP256K1
+
+
+class LibSecp256k1Error(Exception):
+    pass
+
+
+def ser_to_point(ser: bytes) -> Tuple[int, int]:
+    try:
+        return coincurve.PublicKey(ser).point()
+    except ValueError as e:
+        raise LibSecp256k1Error(e)
+
+
+def pubkey_tweak_add(pubkey: bytes, tweak: bytes) -> bytes:
+    """ Returns compressed pubkey + tweak*G """
+    try:
+        return coincurve.PublicKey(pubkey).add(tweak).format(compressed=True)
+    except ValueError as e:
+        raise LibSecp256k1Error(e)
+
+
+def recover_pubkey(sig_string: bytes, recid: int, msg_hash: bytes) -> bytes:
+    """ Returns uncompressed pubkey that produced the 64 bytes compact signature of the 32 bytes msg_hash """
+    try:
+        return coincurve.PublicKey.from_signature_and_message(sig_string + bytes([recid]), msg_hash, hasher=None).format(compressed=False)
+    except ValueError as e:
+        raise LibSecp256k1Error(e)
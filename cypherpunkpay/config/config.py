@@ -77,6 +77,16 @@ class Config(object):
     def charge_completion_timeout_in_milliseconds(self) -> int:
         return self.charge_completion_timeout_in_hours() * 60 * 60 * 1000
 
+    def charges_archive_after_days(self) -> int:
+        # Never below the 7 days window in which charges are still refreshed
+        return max(int(self._dict.get('charges_archive_after_days', 30)), 8)
+
+    def btc_explorers_max_response_bytes(self) -> int:
+        return int(self._dict.get('btc_explorers_max_response_kib', 4096)) * 1024
+
+    def btc_explorers_height_quorum(self) -> int:
+        return int(self._dict.get('btc_explorers_height_quorum', 3))
+
     def btc_node_enabled(self) -> bool:
         if self.btc_mainnet():
             return self._dict.get('btc_mainnet_node_enabled', 'false') == 'true'
@@ -198,6 +208,9 @@ class Config(object):
     def tor_socks5_port(self) -> int:
         return int(self._dict.get('tor_socks5_port', 9050))
 
+    def tor_circuits_pool_size(self) -> int:
+        return int(self._dict.get('tor_circuits_pool_size', 8))
+
     # Donations
 
     def donations_enabled(self) -> bool:
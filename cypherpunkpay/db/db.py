@@ -1,7 +1,9 @@
 from abc import ABC, abstractmethod
+from typing import ContextManager, Tuple
 
 from cypherpunkpay.globals import *
 from cypherpunkpay.models.charge import Charge
+from cypherpunkpay.models.charge_summary import ChargeSummary
 from cypherpunkpay.models.user import User
 from cypherpunkpay.models.dummy_store_order import DummyStoreOrder
 
@@ -43,7 +45,15 @@ class DB(ABC):
         ...
 
     @abstractmethod
-    def save(self, obj: [User, Charge]):
+    def save(self, obj: [User, Charge], deferred: bool = False):
+        ...
+
+    @abstractmethod
+    def flush_deferred_writes(self) -> int:
+        ...
+
+    @abstractmethod
+    def transaction(self) -> ContextManager[None]:
         ...
 
     @abstractmethod
@@ -53,7 +63,7 @@ class DB(ABC):
     # -- Charges ------------------------------------------------------------------------------------------------------
 
     @abstractmethod
-    def get_charges_count(self) -> int:
+    def get_charges_count(self, status: [str, None] = None) -> int:
         ...
 
     @abstractmethod
@@ -68,14 +78,30 @@ class DB(ABC):
     def get_charges_by_status(self, expected_status) -> List[Charge]:
         ...
 
+    @abstractmethod
+    def get_block_explorers_of_unfinished_charges(self) -> List[str]:
+        ...
+
     @abstractmethod
     def get_recently_created_charges(self, delta: [timedelta, None] = None) -> List[Charge]:
         ...
 
+    @abstractmethod
+    def archive_charges(self, created_before: datetime, limit: int) -> int:
+        ...
+
+    @abstractmethod
+    def get_charge_summaries_page(self, limit: int, before: [Tuple[datetime, str], None] = None, status: [str, None] = None, created_from: [datetime, None] = None, created_to: [datetime, None] = None) -> List[ChargeSummary]:
+        ...
+
     @abstractmethod
     def get_recently_activated_charges(self, delta: [timedelta, None] = None) -> List[Charge]:
         ...
 
+    @abstractmethod
+    def get_activated_charges_updated_since(self, updated_since: datetime, activated_delta: timedelta) -> List[Charge]:
+        ...
+
     @abstractmethod
     def count_charges_where_wallet_fingerprint_is(self, wallet_fingerprint) -> int:
         ...
@@ -92,6 +118,28 @@ class DB(ABC):
     def count_and_sum_charges_grouped_by_status(self, activated_after: datetime) -> Dict:
         ...
 
+    # -- Address pool -------------------------------------------------------------------------------------------------
+
+    @abstractmethod
+    def claim_pooled_address(self, wallet_fingerprint: str, address_offset: int) -> [Tuple[int, str], None]:
+        ...
+
+    @abstractmethod
+    def count_unclaimed_pooled_addresses(self, wallet_fingerprint: str, address_offset: int) -> int:
+        ...
+
+    @abstractmethod
+    def get_max_pooled_address_index(self, wallet_fingerprint: str) -> [int, None]:
+        ...
+
+    @abstractmethod
+    def insert_pooled_addresses(self, wallet_fingerprint: str, address_offset: int, indexed_addresses: List[Tuple[int, str]]) -> None:
+        ...
+
+    @abstractmethod
+    def delete_stale_pooled_addresses(self, wallet_fingerprint: str, address_offset: int) -> None:
+        ...
+
     # -- Users --------------------------------------------------------------------------------------------------------
 
     @abstractmethod
@@ -31,8 +31,9 @@ class DevExamples(object):
 
     def create_all(self, db):
         log.info('Creating development examples...')
-        self.create_admin_user(db)
-        self.create_charges(db)
+        with db.transaction():
+            self.create_admin_user(db)
+            self.create_charges(db)
         log.info('Done creating development examples')
 
     def create_admin_user(self, db):
@@ -312,8 +313,9 @@ class DevExamples(object):
     def create_dummy_store_orders(self, db):
         from cypherpunkpay.models.dummy_store_order import DummyStoreOrder
         orders = []
-        for i, item in enumerate(self.DUMMY_STORE_ITEMS):
-            order = DummyStoreOrder(uid=SafeUid.gen(), item_id=i, total=item['price'], currency=item['currency'])
-            orders.append(order)
-            db.insert(order)
+        with db.transaction():
+            for i, item in enumerate(self.DUMMY_STORE_ITEMS):
+                order = DummyStoreOrder(uid=SafeUid.gen(), item_id=i, total=item['price'], currency=item['currency'])
+                orders.append(order)
+                db.insert(order)
         return orders
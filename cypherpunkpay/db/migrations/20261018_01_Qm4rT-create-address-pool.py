@@ -0,0 +1,24 @@
+"""
+Create address pool
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    step("""
+      CREATE TABLE address_pool (
+        wallet_fingerprint text not null,
+        address_index integer not null,
+        address_offset integer not null,
+        address text not null,
+        created_at timestamp not null,
+        claimed_at timestamp,
+        PRIMARY KEY (wallet_fingerprint, address_index)
+      );
+    """),
+    step("""
+      CREATE INDEX address_pool_unclaimed_idx ON address_pool(wallet_fingerprint, address_offset, address_index) WHERE claimed_at IS NULL;
+    """),
+]
@@ -0,0 +1,35 @@
+"""
+Add charges indexes
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    # get_charges_by_status()
+    step("""
+      CREATE INDEX charges_status_idx ON charges(status);
+    """),
+    # get_charges(), get_recently_created_charges(), get_last_charge()
+    step("""
+      CREATE INDEX charges_created_at_idx ON charges(created_at);
+    """),
+    # get_recently_activated_charges(), count_and_sum_charges_grouped_by_status() (covering)
+    step("""
+      CREATE INDEX charges_activated_at_idx ON charges(activated_at, status, usd_total);
+    """),
+    # count_charges_where_wallet_fingerprint_is()
+    step("""
+      CREATE INDEX charges_wallet_fingerprint_idx ON charges(wallet_fingerprint);
+    """),
+    # get_charges_for_merchant_notification() - only a handful of charges ever wait for the callback
+    step("""
+      CREATE INDEX charges_merchant_notification_idx ON charges(status)
+        WHERE merchant_order_id IS NOT NULL AND merchant_callback_url_called_at IS NULL;
+    """),
+    # get_blockchain_height(), update_blockchain_height()
+    step("""
+      CREATE UNIQUE INDEX coins_cc_currency_cc_network_idx ON coins(cc_currency, cc_network);
+    """),
+]
@@ -0,0 +1,55 @@
+"""
+Add charge_counts and keyset pagination indexes
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    # Keyset pagination of charges ordered by (created_at, uid), optionally filtered by status
+    step("""
+      DROP INDEX charges_created_at_idx;
+    """),
+    step("""
+      CREATE INDEX charges_created_at_uid_idx ON charges(created_at, uid);
+    """),
+    step("""
+      DROP INDEX charges_status_idx;
+    """),
+    step("""
+      CREATE INDEX charges_status_created_at_uid_idx ON charges(status, created_at, uid);
+    """),
+
+    # Charges count by status, maintained by triggers so totals never need a COUNT(*) over the whole table
+    step("""
+      CREATE TABLE charge_counts (
+        status text primary key not null,
+        count integer not null
+      );
+    """),
+    step("""
+      INSERT INTO charge_counts(status, count) SELECT status, COUNT(*) FROM charges GROUP BY status;
+    """),
+    step("""
+      CREATE TRIGGER charge_counts_after_insert AFTER INSERT ON charges
+      BEGIN
+        INSERT INTO charge_counts(status, count) VALUES (NEW.status, 1)
+          ON CONFLICT(status) DO UPDATE SET count = count + 1;
+      END;
+    """),
+    step("""
+      CREATE TRIGGER charge_counts_after_update AFTER UPDATE OF status ON charges WHEN OLD.status != NEW.status
+      BEGIN
+        UPDATE charge_counts SET count = count - 1 WHERE status = OLD.status;
+        INSERT INTO charge_counts(status, count) VALUES (NEW.status, 1)
+          ON CONFLICT(status) DO UPDATE SET count = count + 1;
+      END;
+    """),
+    step("""
+      CREATE TRIGGER charge_counts_after_delete AFTER DELETE ON charges
+      BEGIN
+        UPDATE charge_counts SET count = count - 1 WHERE status = OLD.status;
+      END;
+    """),
+]
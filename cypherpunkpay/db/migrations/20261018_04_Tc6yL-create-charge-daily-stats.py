@@ -0,0 +1,53 @@
+"""
+Create charge_daily_stats
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    # Count and usd_total of activated charges per activation day (UTC) and status, maintained by triggers
+    step("""
+      CREATE TABLE charge_daily_stats (
+        day text not null,
+        status text not null,
+        count integer not null,
+        usd_total integer not null,
+        PRIMARY KEY (day, status)
+      );
+    """),
+    step("""
+      INSERT INTO charge_daily_stats(day, status, count, usd_total)
+        SELECT date(activated_at), status, COUNT(*), COALESCE(SUM(usd_total), 0)
+        FROM charges
+        WHERE activated_at IS NOT NULL
+        GROUP BY date(activated_at), status;
+    """),
+    step("""
+      CREATE TRIGGER charge_daily_stats_after_insert AFTER INSERT ON charges WHEN NEW.activated_at IS NOT NULL
+      BEGIN
+        INSERT INTO charge_daily_stats(day, status, count, usd_total) VALUES (date(NEW.activated_at), NEW.status, 1, COALESCE(NEW.usd_total, 0))
+          ON CONFLICT(day, status) DO UPDATE SET count = count + 1, usd_total = usd_total + excluded.usd_total;
+      END;
+    """),
+    # Status transitions (advance_to_*), activation and manual fixes all land here
+    step("""
+      CREATE TRIGGER charge_daily_stats_after_update AFTER UPDATE OF status, activated_at, usd_total ON charges
+        WHEN OLD.status IS NOT NEW.status OR OLD.activated_at IS NOT NEW.activated_at OR OLD.usd_total IS NOT NEW.usd_total
+      BEGIN
+        UPDATE charge_daily_stats SET count = count - 1, usd_total = usd_total - COALESCE(OLD.usd_total, 0)
+          WHERE OLD.activated_at IS NOT NULL AND day = date(OLD.activated_at) AND status = OLD.status;
+        INSERT INTO charge_daily_stats(day, status, count, usd_total)
+          SELECT date(NEW.activated_at), NEW.status, 1, COALESCE(NEW.usd_total, 0) WHERE NEW.activated_at IS NOT NULL
+          ON CONFLICT(day, status) DO UPDATE SET count = count + 1, usd_total = usd_total + excluded.usd_total;
+      END;
+    """),
+    step("""
+      CREATE TRIGGER charge_daily_stats_after_delete AFTER DELETE ON charges WHEN OLD.activated_at IS NOT NULL
+      BEGIN
+        UPDATE charge_daily_stats SET count = count - 1, usd_total = usd_total - COALESCE(OLD.usd_total, 0)
+          WHERE day = date(OLD.activated_at) AND status = OLD.status;
+      END;
+    """),
+]
@@ -0,0 +1,95 @@
+"""
+Create charges_archive
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    # Final charges past the archive age are moved here so the hot charges table stays small.
+    # Same columns as charges.
+    step("""
+      CREATE TABLE charges_archive (
+        uid text primary key not null,
+
+        time_to_pay_ms integer not null,
+        time_to_complete_ms integer not null,
+        merchant_order_id text,
+
+        total integer not null,
+        currency text not null,
+
+        cc_total integer,
+        cc_currency text,
+        cc_address text,
+        cc_lightning_payment_request text,
+        cc_price integer,
+
+        usd_total integer,
+
+        pay_status text not null,
+        status text not null,
+        cc_received_total integer not null,
+        confirmations integer not null default 0,
+
+        activated_at timestamp,
+        paid_at timestamp,
+        completed_at timestamp,
+        expired_at timestamp,
+        cancelled_at timestamp,
+        merchant_callback_url_called_at timestamp,
+
+        wallet_fingerprint text,
+        address_derivation_index integer,
+
+        beneficiary text,
+        what_for text,
+        status_fixed_manually boolean not null default false,
+
+        block_explorer_1 text,
+        block_explorer_2 text,
+        subsequent_discrepancies integer not null default 0,
+
+        created_at timestamp not null,
+        updated_at timestamp not null
+      )
+    """),
+    step("""
+      CREATE INDEX charges_archive_created_at_uid_idx ON charges_archive(created_at, uid);
+    """),
+    step("""
+      CREATE INDEX charges_archive_status_created_at_uid_idx ON charges_archive(status, created_at, uid);
+    """),
+    step("""
+      CREATE INDEX charges_archive_wallet_fingerprint_idx ON charges_archive(wallet_fingerprint);
+    """),
+
+    # charge_counts and charge_daily_stats cover archived charges too: moving a charge here
+    # decrements them (charges AFTER DELETE) and these triggers add it back
+    step("""
+      CREATE TRIGGER charges_archive_counts_after_insert AFTER INSERT ON charges_archive
+      BEGIN
+        INSERT INTO charge_counts(status, count) VALUES (NEW.status, 1)
+          ON CONFLICT(status) DO UPDATE SET count = count + 1;
+        INSERT INTO charge_daily_stats(day, status, count, usd_total)
+          SELECT date(NEW.activated_at), NEW.status, 1, COALESCE(NEW.usd_total, 0) WHERE NEW.activated_at IS NOT NULL
+          ON CONFLICT(day, status) DO UPDATE SET count = count + 1, usd_total = usd_total + excluded.usd_total;
+      END;
+    """),
+    # Manual status fixes of archived charges
+    step("""
+      CREATE TRIGGER charges_archive_counts_after_update AFTER UPDATE OF status, activated_at, usd_total ON charges_archive
+        WHEN OLD.status IS NOT NEW.status OR OLD.activated_at IS NOT NEW.activated_at OR OLD.usd_total IS NOT NEW.usd_total
+      BEGIN
+        UPDATE charge_counts SET count = count - 1 WHERE status = OLD.status;
+        INSERT INTO charge_counts(status, count) VALUES (NEW.status, 1)
+          ON CONFLICT(status) DO UPDATE SET count = count + 1;
+        UPDATE charge_daily_stats SET count = count - 1, usd_total = usd_total - COALESCE(OLD.usd_total, 0)
+          WHERE OLD.activated_at IS NOT NULL AND day = date(OLD.activated_at) AND status = OLD.status;
+        INSERT INTO charge_daily_stats(day, status, count, usd_total)
+          SELECT date(NEW.activated_at), NEW.status, 1, COALESCE(NEW.usd_total, 0) WHERE NEW.activated_at IS NOT NULL
+          ON CONFLICT(day, status) DO UPDATE SET count = count + 1, usd_total = usd_total + excluded.usd_total;
+      END;
+    """),
+]
@@ -0,0 +1,14 @@
+"""
+Add charges updated_at index
+"""
+
+from yoyo import step
+
+__depends__ = {}
+
+steps = [
+    # get_activated_charges_updated_since()
+    step("""
+      CREATE INDEX charges_updated_at_idx ON charges(updated_at);
+    """),
+]
@@ -1,40 +1,134 @@
 import sqlite3
 import threading
+from contextlib import contextmanager
 from sqlite3 import Cursor
+from typing import Iterator, Tuple
 
 from cypherpunkpay.globals import *
 from cypherpunkpay.db.db import DB
 from cypherpunkpay.db.sqlite_type_assertions import assert_charge_types, assert_user_types
 from cypherpunkpay.models.charge import Charge
+from cypherpunkpay.models.charge_summary import ChargeSummary
 from cypherpunkpay.models.user import User
 from cypherpunkpay.models.dummy_store_order import DummyStoreOrder
 
 
 class SqliteDB(DB):
+    """ WAL-mode SQLite with a single writer connection and one read-only connection per reading thread
+
+        Writes (and reads while the writer has an open transaction) are serialized by `lock`.
+        Plain reads run on the calling thread's own connection and never wait for the lock.
+        `transaction()` groups several writes into one commit; nested use turns into savepoints.
+        Bookkeeping-only charge updates can be deferred: they are coalesced per charge in memory, overlaid on
+        charges read back and written in one transaction by `flush_deferred_writes`. Values being written stay
+        overlaid until their transaction commits, as other threads keep reading the previous commit until then.
+    """
+
+    MMAP_SIZE = 256 * 1024 * 1024
+    CACHE_SIZE_KIB = 16 * 1024
+    BUSY_TIMEOUT_SECONDS = 15
 
     _db_file_path: str
-    _db: sqlite3.Connection
+    _db: sqlite3.Connection  # the writer
 
-    def __init__(self, db_file_path: [str, Path]):
+    def __init__(self, db_file_path: [str, Path], assert_types: bool = True):
         self._db_file_path = db_file_path
+        self._assert_types = assert_types  # type assertions on rows read back; writes are always checked
         self.lock = threading.RLock()
+        self._readers = threading.local()
+        self._reader_connections = {}  # thread -> its read connection
+        self._reader_connections_lock = threading.Lock()
+        self._transaction_depth = 0
+        self._transaction_thread = None  # ident of the thread inside transaction()
+        self._deferred_charge_writes = {}  # uid -> {column: value}
+        self._flushing_charge_writes = {}  # uid -> {column: value} written but not committed yet
+        self._deferred_lock = threading.Lock()
 
     def __enter__(self):
         with self.lock:
             log.info(f'Connecting to database {self._db_file_path}')
-            self._db = sqlite3.connect(
-                self._db_file_path,
-                isolation_level=None,  # enable autocommit, see: https://docs.python.org/2/library/sqlite3.html#controlling-transactions
-                detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
-                check_same_thread=False
-            )
-            self._db.row_factory = sqlite3.Row  # enable accessing rows by column name
+            self._db = self._open_connection()
+            self._db.execute('PRAGMA journal_mode = WAL')
             return self
 
     def __exit__(self):
+        self.flush_deferred_writes()
         with self.lock:
+            with self._reader_connections_lock:
+                for connection in self._reader_connections.values():
+                    connection.close()
+                self._reader_connections = {}
+                self._readers = threading.local()
             self._db.close()
 
+    def _open_connection(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(
+            self._db_file_path,
+            isolation_level=None,  # enable autocommit, see: https://docs.python.org/2/library/sqlite3.html#controlling-transactions
+            detect_types=sqlite3.PARSE_DECLTYPES | sqlite3.PARSE_COLNAMES,
+            check_same_thread=False,
+            timeout=self.BUSY_TIMEOUT_SECONDS
+        )
+        connection.row_factory = sqlite3.Row  # enable accessing rows by column name
+        connection.execute('PRAGMA synchronous = NORMAL')  # durable enough in WAL mode: power loss can only drop the last commits
+        connection.execute(f'PRAGMA mmap_size = {self.MMAP_SIZE}')
+        connection.execute(f'PRAGMA cache_size = -{self.CACHE_SIZE_KIB}')
+        return connection
+
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """ Commits the writes made inside once, or rolls them all back on exception.
+            Holds the write lock throughout so keep network I/O out of it.
+        """
+        with self.lock:
+            nested = self._db.in_transaction  # includes transactions opened outside of this method (tests)
+            savepoint = f'transaction_{self._transaction_depth}'
+            self._db.execute(f'SAVEPOINT {savepoint}' if nested else 'BEGIN IMMEDIATE')
+            if self._transaction_depth == 0:
+                self._transaction_thread = threading.get_ident()
+            self._transaction_depth += 1
+            try:
+                yield
+            except BaseException:
+                if nested:
+                    self._db.execute(f'ROLLBACK TO {savepoint}')
+                    self._db.execute(f'RELEASE {savepoint}')
+                elif self._db.in_transaction:  # sqlite may have rolled back already
+                    self._db.execute('ROLLBACK')
+                raise
+            else:
+                self._db.execute(f'RELEASE {savepoint}' if nested else 'COMMIT')
+            finally:
+                self._transaction_depth -= 1
+                if self._transaction_depth == 0:
+                    self._transaction_thread = None
+                self._release_flushing_charge_writes()
+
+    @contextmanager
+    def _reading(self) -> Iterator[sqlite3.Connection]:
+        if self._db.in_transaction and self._transaction_thread in (None, threading.get_ident()):
+            # Uncommitted writes are only visible on the writer connection. Other threads read the last commit.
+            with self.lock:
+                yield self._db
+        else:
+            yield self._reader()
+
+    def _reader(self) -> sqlite3.Connection:
+        connection = getattr(self._readers, 'connection', None)
+        if connection is None:
+            connection = self._open_connection()
+            connection.execute('PRAGMA query_only = ON')
+            self._readers.connection = connection
+            with self._reader_connections_lock:
+                self._close_readers_of_finished_threads()
+                self._reader_connections[threading.current_thread()] = connection
+        return connection
+
+    def _close_readers_of_finished_threads(self) -> None:
+        # Executor, waitress and APScheduler threads get replaced over time; their connections would stay open forever
+        for thread in [thread for thread in self._reader_connections if not thread.is_alive()]:
+            self._reader_connections.pop(thread).close()
+
     def migrate(self) -> None:
         with self.lock:
             log.info(f'Migrating database {self._db_file_path} ...')
@@ -48,14 +142,19 @@ class SqliteDB(DB):
 
     def reset_for_tests(self) -> None:
         with self.lock:
+            with self._deferred_lock:
+                self._deferred_charge_writes = {}
+                self._flushing_charge_writes = {}
             self.disconnect()
-            Path(self._db_file_path).unlink(missing_ok=True)
+            for suffix in ('', '-wal', '-shm'):
+                Path(f'{self._db_file_path}{suffix}').unlink(missing_ok=True)
             self.connect()
             self.migrate()
 
     def execute(self, sql: str) -> None:
         with self.lock:
             self._db.execute(sql)
+            self._release_flushing_charge_writes()
 
     def insert(self, obj: [User, Charge, DummyStoreOrder]):
         with self.lock:
@@ -88,8 +187,75 @@ class SqliteDB(DB):
 
             self._db.execute(sql, values)
             # self._db.commit()
+            if isinstance(obj, Charge):
+                obj.mark_persisted()
 
-    def save(self, obj: [User, Charge, DummyStoreOrder]) -> None:
+    def _update_changed_charge_columns(self, charge: Charge) -> None:
+        if not charge.changed_fields() and charge.uid not in self._deferred_charge_writes:
+            return
+        charge.updated_at = utc_now()
+        assert_charge_types(charge)
+        values_by_column = dict(zip(self.CHARGE_COLUMN_NAMES, self._charge_values(charge)))
+        with self._deferred_lock:
+            deferred = self._deferred_charge_writes.pop(charge.uid, {})
+            # Deferred values the charge did not change itself ride along with this write
+            values_by_column.update({column: value for column, value in deferred.items() if column not in charge.changed_fields()})
+            columns = [column for column in self.CHARGE_COLUMN_NAMES if column in charge.changed_fields() and column != 'uid']
+            columns += [column for column in deferred if column not in charge.changed_fields()]
+            self._flushing_charge_writes.setdefault(charge.uid, {}).update(
+                {column: values_by_column[column] for column in columns if column in self.DEFERRABLE_CHARGE_COLUMNS}
+            )
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        values = [values_by_column[column] for column in columns] + [charge.uid]
+        if self._db.execute(f'UPDATE charges SET {assignments} WHERE uid = ?', values).rowcount == 0:
+            self._db.execute(f'UPDATE charges_archive SET {assignments} WHERE uid = ?', values)
+        self._release_flushing_charge_writes()
+        charge.mark_persisted()
+
+    def _defer_charge_update(self, charge: Charge) -> None:
+        charge.updated_at = utc_now()
+        assert_charge_types(charge)
+        with self._deferred_lock:
+            pending = self._deferred_charge_writes.setdefault(charge.uid, {})
+            for column in charge.changed_fields():
+                pending[column] = getattr(charge, column)
+        charge.mark_persisted()
+
+    def flush_deferred_writes(self) -> int:
+        """ Writes all deferred charge updates in a single transaction. Returns the number of charges updated. """
+        with self.lock:
+            with self._deferred_lock:
+                deferred, self._deferred_charge_writes = self._deferred_charge_writes, {}
+                for uid, pending in deferred.items():
+                    self._flushing_charge_writes.setdefault(uid, {}).update(pending)
+            if not deferred:
+                return 0
+            rows_by_columns = {}
+            for uid, pending in deferred.items():
+                columns = tuple(sorted(pending))
+                rows_by_columns.setdefault(columns, []).append([pending[column] for column in columns] + [uid])
+            with self.transaction():
+                for columns, rows in rows_by_columns.items():
+                    assignments = ", ".join(f"{column} = ?" for column in columns)
+                    if self._db.executemany(f'UPDATE charges SET {assignments} WHERE uid = ?', rows).rowcount < len(rows):
+                        # Some of them got archived in the meantime
+                        self._db.executemany(f'UPDATE charges_archive SET {assignments} WHERE uid = ?', rows)
+            return len(deferred)
+
+    def _release_flushing_charge_writes(self) -> None:
+        # Once committed (or rolled back) the rows themselves are what every connection reads
+        if self._flushing_charge_writes and not self._db.in_transaction:
+            with self._deferred_lock:
+                self._flushing_charge_writes = {}
+
+    def save(self, obj: [User, Charge, DummyStoreOrder], deferred: bool = False) -> None:
+        """ With `deferred` a persisted charge whose changes are all DEFERRABLE_CHARGE_COLUMNS is only queued
+            for the next `flush_deferred_writes`. Anything else is written right away.
+        """
+        if deferred and isinstance(obj, Charge) and obj.is_persisted() and obj.changed_fields() <= self.DEFERRABLE_CHARGE_COLUMNS:
+            if obj.changed_fields():
+                self._defer_charge_update(obj)
+            return
         with self.lock:
             if isinstance(obj, User):
                 user: User = obj
@@ -111,17 +277,12 @@ class SqliteDB(DB):
                     self.insert(user)
             if isinstance(obj, Charge):
                 charge: Charge = obj
-                if self.exists(charge):
-                    charge.updated_at = utc_now()
-                    sql = f"""
-                        UPDATE charges SET
-                            {self._charge_columns_for_update()}
-                        WHERE uid = ?
-                    """
-                    assert_charge_types(charge)
-                    values = self._charge_values_for_update(charge)
-                    self._db.execute(sql, values)
-                    # self._db.commit()
+                if charge.is_persisted():
+                    self._update_changed_charge_columns(charge)
+                elif self.exists(charge):
+                    # Built in code with the uid of an existing row rather than loaded - the whole row gets overwritten
+                    charge.mark_all_changed()
+                    self._update_changed_charge_columns(charge)
                 else:
                     self.insert(charge)
             if isinstance(obj, DummyStoreOrder):
@@ -139,116 +300,197 @@ class SqliteDB(DB):
                     self.insert(order)
 
     def exists(self, obj: [User, Charge, DummyStoreOrder]) -> bool:
-        with self.lock:
+        with self._reading() as db:
             if isinstance(obj, User):
                 user: User = obj
                 if user.id:
                     sql = 'SELECT COUNT(*) FROM users WHERE id = ?'
                     values = [user.id]
-                    ret = self._db.execute(sql, values)
+                    ret = db.execute(sql, values)
                     return ret.fetchone()[0] == 1
             if isinstance(obj, Charge):
                 charge: Charge = obj
                 if charge.uid:
                     sql = 'SELECT COUNT(*) FROM charges WHERE uid = ?'
                     values = [charge.uid]
-                    ret = self._db.execute(sql, values)
+                    ret = db.execute(sql, values)
                     return ret.fetchone()[0] == 1
             if isinstance(obj, DummyStoreOrder):
                 order: DummyStoreOrder = obj
                 if order.uid:
                     sql = 'SELECT COUNT(*) FROM dummy_store_orders WHERE uid = ?'
                     values = [order.uid]
-                    ret = self._db.execute(sql, values)
+                    ret = db.execute(sql, values)
                     return ret.fetchone()[0] == 1
             return False
 
     def reload(self, obj: [User, Charge]) -> [User, Charge]:
-        with self.lock:
-            if isinstance(obj, User):
-                return self.get_user_by_id(obj.id, update_me=obj)
-            if isinstance(obj, Charge):
-                return self.get_charge_by_uid(obj.uid, update_me=obj)
+        if isinstance(obj, User):
+            return self.get_user_by_id(obj.id, update_me=obj)
+        if isinstance(obj, Charge):
+            return self.get_charge_by_uid(obj.uid, update_me=obj)
 
     # -- Charges ------------------------------------------------------------------------------------------------------
 
-    def get_charges_count(self) -> int:
-        with self.lock:
-            sql = 'SELECT COUNT(*) FROM charges'
-            return self._db.execute(sql).fetchone()[0]
+    def get_charges_count(self, status: [str, None] = None) -> int:
+        with self._reading() as db:
+            # charge_counts is maintained by triggers
+            if status is None:
+                return db.execute('SELECT COALESCE(SUM(count), 0) FROM charge_counts').fetchone()[0]
+            row = db.execute('SELECT count FROM charge_counts WHERE status = ?', [status]).fetchone()
+            return row[0] if row else 0
 
     def get_charges(self) -> List[Charge]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges ORDER BY created_at'
-            rows = self._db.execute(sql)
+            rows = db.execute(sql)
             charges = []
             for row in rows:
                 charges.append(self.charge_from_row(row))
             return charges
 
     def get_charge_by_uid(self, uid, update_me: Charge = None) -> Charge:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges WHERE uid = ?'
             values = [uid]
-            row = self._db.execute(sql, values).fetchone()
+            row = db.execute(sql, values).fetchone()
+            if row is None:
+                sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges_archive WHERE uid = ?'
+                row = db.execute(sql, values).fetchone()
             if row:
                 return self.charge_from_row(row, update_me)
 
     # TODO: to be removed; address derivation index should not rely on charges being in database
     def count_charges_where_wallet_fingerprint_is(self, wallet_fingerprint) -> int:
-        with self.lock:
-            sql = 'SELECT COUNT(*) FROM charges WHERE wallet_fingerprint = ?'
-            values = [wallet_fingerprint]
-            return self._db.execute(sql, values).fetchone()[0]
+        with self._reading() as db:
+            sql = '''
+                SELECT
+                  (SELECT COUNT(*) FROM charges WHERE wallet_fingerprint = ?) +
+                  (SELECT COUNT(*) FROM charges_archive WHERE wallet_fingerprint = ?)
+            '''
+            values = [wallet_fingerprint, wallet_fingerprint]
+            return db.execute(sql, values).fetchone()[0]
 
     def get_charges_by_status(self, expected_status) -> List[Charge]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges WHERE status = ?'
             values = [expected_status]
-            rows = self._db.execute(sql, values)
+            rows = db.execute(sql, values)
             charges = []
             for row in rows:
                 charges.append(self.charge_from_row(row))
             return charges
 
+    def get_block_explorers_of_unfinished_charges(self) -> List[str]:
+        with self._reading() as db:
+            sql = """
+                SELECT block_explorer_1 FROM charges WHERE status IN ('draft', 'awaiting')
+                UNION
+                SELECT block_explorer_2 FROM charges WHERE status IN ('draft', 'awaiting')
+            """
+            return [row[0] for row in db.execute(sql) if row[0] is not None]
+
     def get_recently_created_charges(self, delta: [timedelta, None] = None) -> List[Charge]:
-        with self.lock:
+        with self._reading() as db:
             if delta is not None:
                 after = utc_now() - delta
             else:
                 after = datetime.datetime.min  # beginning of time
             sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges WHERE created_at > ? ORDER BY created_at DESC'
             values = [after]
-            rows = self._db.execute(sql, values)
+            rows = db.execute(sql, values)
             charges = []
             for row in rows:
                 charges.append(self.charge_from_row(row))
             return charges
 
+    def archive_charges(self, created_before: datetime.datetime, limit: int) -> int:
+        """ Moves up to `limit` final charges created before `created_before` to charges_archive.
+            Charges still waiting for the merchant callback stay. Returns the number of charges moved.
+        """
+        with self.transaction():
+            sql = f"""
+                SELECT uid FROM charges
+                WHERE
+                    status IN ('completed', 'expired', 'cancelled') AND
+                    created_at < ? AND
+                    (merchant_order_id IS NULL OR merchant_callback_url_called_at IS NOT NULL)
+                LIMIT ?
+            """
+            uids = [row[0] for row in self._db.execute(sql, [created_before, limit])]
+            if uids:
+                placeholders = ','.join(['?' for _ in uids])
+                self._db.execute(f'INSERT INTO charges_archive ({self.CHARGE_COLUMNS}) SELECT {self.CHARGE_COLUMNS} FROM charges WHERE uid IN ({placeholders})', uids)
+                self._db.execute(f'DELETE FROM charges WHERE uid IN ({placeholders})', uids)
+            return len(uids)
+
+    def get_charge_summaries_page(
+            self,
+            limit: int,
+            before: [Tuple[datetime.datetime, str], None] = None,
+            status: [str, None] = None,
+            created_from: [datetime.datetime, None] = None,
+            created_to: [datetime.datetime, None] = None) -> List[ChargeSummary]:
+        """ Newest first, keyset-paginated on (created_at, uid); `before` is the (created_at, uid) of the last charge seen.
+            Includes archived charges.
+        """
+        conditions, values = [], []
+        if status is not None:
+            conditions.append('status = ?')
+            values.append(status)
+        if created_from is not None:
+            conditions.append('created_at >= ?')
+            values.append(created_from)
+        if created_to is not None:
+            conditions.append('created_at < ?')
+            values.append(created_to)
+        if before is not None:
+            conditions.append('(created_at, uid) < (?, ?)')
+            values.extend(before)
+        where = f'WHERE {" AND ".join(conditions)}' if conditions else ''
+        with self._reading() as db:
+            sql = f"""
+                SELECT {self.CHARGE_SUMMARY_COLUMNS} FROM charges {where}
+                UNION ALL
+                SELECT {self.CHARGE_SUMMARY_COLUMNS} FROM charges_archive {where}
+                ORDER BY created_at DESC, uid DESC
+                LIMIT ?
+            """
+            rows = db.execute(sql, values + values + [limit])
+            return [self.charge_summary_from_row(row) for row in rows]
+
     def get_recently_activated_charges(self, delta: [timedelta, None] = None) -> List[Charge]:
-        with self.lock:
+        with self._reading() as db:
             if delta is not None:
                 after = utc_now() - delta
             else:
                 after = datetime.datetime.min  # beginning of time
-            sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges WHERE status != ? AND activated_at > ? ORDER BY created_at DESC'
+            # Without INDEXED BY the planner prefers walking the whole created_at index to skip sorting
+            sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges INDEXED BY charges_activated_at_idx WHERE status != ? AND activated_at > ? ORDER BY created_at DESC'
             values = ['draft', after]
-            rows = self._db.execute(sql, values)
+            rows = db.execute(sql, values)
             charges = []
             for row in rows:
                 charges.append(self.charge_from_row(row))
             return charges
 
+    def get_activated_charges_updated_since(self, updated_since: datetime.datetime, activated_delta: timedelta) -> List[Charge]:
+        """ Charges activated within `activated_delta` whose row was last written after `updated_since` """
+        with self._reading() as db:
+            sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges INDEXED BY charges_updated_at_idx WHERE updated_at > ? AND status != ? AND activated_at > ?'
+            values = [updated_since, 'draft', utc_now() - activated_delta]
+            return [self.charge_from_row(row) for row in db.execute(sql, values)]
+
     def get_last_charge(self) -> [Charge, None]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.CHARGE_COLUMNS} FROM charges ORDER BY created_at DESC LIMIT 1'
-            row = self._db.execute(sql).fetchone()
+            row = db.execute(sql).fetchone()
             if row:
                 return self.charge_from_row(row)
 
     def get_charges_for_merchant_notification(self, statuses: List):
         placeholders = ','.join(['?' for _ in statuses])
-        with self.lock:
+        with self._reading() as db:
             sql = f"""
                 SELECT {self.CHARGE_COLUMNS} FROM charges
                 WHERE
@@ -258,55 +500,109 @@ class SqliteDB(DB):
                 ORDER BY completed_at, cancelled_at, expired_at
             """
             values = statuses
-            rows = self._db.execute(sql, values)
+            rows = db.execute(sql, values)
             charges = []
             for row in rows:
                 charges.append(self.charge_from_row(row))
             return charges
 
     def count_and_sum_charges_grouped_by_status(self, activated_after: datetime) -> Cursor:
-        with self.lock:
+        # Whole days come from charge_daily_stats (maintained by triggers);
+        # only the partial day activated_after falls on is counted from charges.
+        activated_after = activated_after.astimezone(datetime.timezone.utc)
+        next_day = datetime.datetime.combine(activated_after.date() + timedelta(days=1), datetime.time(), tzinfo=datetime.timezone.utc)
+        with self._reading() as db:
             sql = f"""
-                SELECT status, COUNT(uid), SUM(usd_total)
-                FROM charges
-                WHERE
-                  activated_at IS NOT NULL AND
-                  activated_at >= ?
+                SELECT status, SUM(count), SUM(usd_total)
+                FROM (
+                    SELECT status, count, usd_total
+                    FROM charge_daily_stats
+                    WHERE day >= ?
+                  UNION ALL
+                    SELECT status, 1, usd_total
+                    FROM charges INDEXED BY charges_activated_at_idx
+                    WHERE
+                      activated_at >= ? AND
+                      activated_at < ?
+                )
                 GROUP BY status
             """
-            values = [activated_after]
-            rows = self._db.execute(sql, values)
+            values = [next_day.date().isoformat(), activated_after, next_day]
+            rows = db.execute(sql, values)
             return rows
 
+    # -- Address pool -------------------------------------------------------------------------------------------------
+
+    def claim_pooled_address(self, wallet_fingerprint: str, address_offset: int) -> [Tuple[int, str], None]:
+        with self.lock:  # the lock makes SELECT + UPDATE atomic as there is a single writer connection
+            sql = '''
+                SELECT address_index, address FROM address_pool
+                WHERE wallet_fingerprint = ? AND address_offset = ? AND claimed_at IS NULL
+                ORDER BY address_index
+                LIMIT 1
+            '''
+            row = self._db.execute(sql, [wallet_fingerprint, address_offset]).fetchone()
+            if row is None:
+                return None
+            sql = 'UPDATE address_pool SET claimed_at = ? WHERE wallet_fingerprint = ? AND address_index = ?'
+            self._db.execute(sql, [utc_now(), wallet_fingerprint, row['address_index']])
+            return row['address_index'], row['address']
+
+    def count_unclaimed_pooled_addresses(self, wallet_fingerprint: str, address_offset: int) -> int:
+        with self._reading() as db:
+            sql = 'SELECT COUNT(*) FROM address_pool WHERE wallet_fingerprint = ? AND address_offset = ? AND claimed_at IS NULL'
+            return db.execute(sql, [wallet_fingerprint, address_offset]).fetchone()[0]
+
+    def get_max_pooled_address_index(self, wallet_fingerprint: str) -> [int, None]:
+        with self._reading() as db:
+            sql = 'SELECT MAX(address_index) FROM address_pool WHERE wallet_fingerprint = ?'
+            return db.execute(sql, [wallet_fingerprint]).fetchone()[0]
+
+    def insert_pooled_addresses(self, wallet_fingerprint: str, address_offset: int, indexed_addresses: List[Tuple[int, str]]) -> None:
+        with self.lock:
+            sql = '''
+                INSERT OR IGNORE
+                    INTO address_pool (wallet_fingerprint, address_index, address_offset, address, created_at)
+                    VALUES (?, ?, ?, ?, ?)
+            '''
+            now = utc_now()
+            self._db.executemany(sql, [(wallet_fingerprint, index, address_offset, address, now) for index, address in indexed_addresses])
+
+    def delete_stale_pooled_addresses(self, wallet_fingerprint: str, address_offset: int) -> None:
+        with self.lock:
+            # Unclaimed addresses derived with a different (since reconfigured) offset
+            sql = 'DELETE FROM address_pool WHERE wallet_fingerprint = ? AND address_offset != ? AND claimed_at IS NULL'
+            self._db.execute(sql, [wallet_fingerprint, address_offset])
+
     # -- Users --------------------------------------------------------------------------------------------------------
 
     def get_users_count(self) -> int:
-        with self.lock:
+        with self._reading() as db:
             sql = 'SELECT COUNT(*) FROM users'
-            return self._db.execute(sql).fetchone()[0]
+            return db.execute(sql).fetchone()[0]
 
     def get_users(self) -> List[User]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.USER_COLUMNS} FROM users ORDER BY created_at'
-            rows = self._db.execute(sql)
+            rows = db.execute(sql)
             users = []
             for row in rows:
                 users.append(self.user_from_row(row))
             return users
 
     def get_user_by_id(self, user_id, update_me: User = None) -> [User, None]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.USER_COLUMNS} FROM users WHERE username = ?'
             values = [user_id]
-            row = self._db.execute(sql, values).fetchone()
+            row = db.execute(sql, values).fetchone()
             if row:
                 return self.user_from_row(row, update_me)
 
     def get_user_by_username(self, username: str) -> [User, None]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.USER_COLUMNS} FROM users WHERE username = ?'
             values = [username]
-            row = self._db.execute(sql, values).fetchone()
+            row = db.execute(sql, values).fetchone()
             if row:
                 return self.user_from_row(row)
 
@@ -320,22 +616,24 @@ class SqliteDB(DB):
     # -- Utils --------------------------------------------------------------------------------------------------------
 
     def get_blockchain_height(self, coin: str, cc_network: str) -> int:
-        sql = 'SELECT blockchain_height FROM coins WHERE cc_currency = ? AND cc_network = ?'
-        values = [coin.casefold(), cc_network.casefold()]
-        ret = self._db.execute(sql, values)
-        return int(ret.fetchone()[0])
+        with self._reading() as db:
+            sql = 'SELECT blockchain_height FROM coins WHERE cc_currency = ? AND cc_network = ?'
+            values = [coin.casefold(), cc_network.casefold()]
+            ret = db.execute(sql, values)
+            return int(ret.fetchone()[0])
 
     def update_blockchain_height(self, coin: str, cc_network: str, height: int):
-        sql = 'UPDATE coins SET blockchain_height = ? WHERE cc_currency = ? AND cc_network = ?'
-        values = [height, coin.casefold(), cc_network.casefold()]
-        self._db.execute(sql, values)
-        # self._db.commit()
+        with self.lock:
+            sql = 'UPDATE coins SET blockchain_height = ? WHERE cc_currency = ? AND cc_network = ?'
+            values = [height, coin.casefold(), cc_network.casefold()]
+            self._db.execute(sql, values)
+            # self._db.commit()
 
     def get_admin_unique_path_segment(self) -> str:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.GLOBALS_COLUMNS} FROM globals WHERE key = ?'
             values = ['admin_unique_path_segment']
-            row = self._db.execute(sql, values).fetchone()
+            row = db.execute(sql, values).fetchone()
             if row:
                 return row['value']
 
@@ -365,61 +663,30 @@ class SqliteDB(DB):
         return user
 
     def charge_from_row(self, row, update_me=None) -> Charge:
-        if update_me is None:
-            charge = Charge(
-                total=db_int8_to_decimal(row['total']),
-                currency=row['currency'],
-                time_to_pay_ms=row['time_to_pay_ms'],
-                time_to_complete_ms=row['time_to_complete_ms']
-            )
-        else:
-            charge = update_me
-            charge.total = db_int8_to_decimal(row['total'])
-            charge.currency = row['currency']
-            charge.time_to_pay_ms = row['time_to_pay_ms']
-            charge.time_to_complete_ms = row['time_to_complete_ms']
-
-        charge.uid = row['uid']
-        charge.merchant_order_id = row['merchant_order_id']
-
-        charge.cc_total = db_int8_to_decimal(row['cc_total'])
-        charge.cc_currency = row['cc_currency']
-        charge.cc_address = row['cc_address']
-        charge.cc_lightning_payment_request = row['cc_lightning_payment_request']
-        charge.cc_price = db_int8_to_decimal(row['cc_price'])
-
-        charge.usd_total = db_int8_to_decimal(row['usd_total'])
-
-        charge.pay_status = row['pay_status']
-        charge.status = row['status']
-        charge.cc_received_total = db_int8_to_decimal(row['cc_received_total'])
-        charge.confirmations = int(row['confirmations'])
-
-        charge.activated_at = self.soft_apply_utc(row['activated_at'])
-        charge.paid_at = self.soft_apply_utc(row['paid_at'])
-        charge.completed_at = self.soft_apply_utc(row['completed_at'])
-        charge.expired_at = self.soft_apply_utc(row['expired_at'])
-        charge.cancelled_at = self.soft_apply_utc(row['cancelled_at'])
-        charge.merchant_callback_url_called_at = self.soft_apply_utc(row['merchant_callback_url_called_at'])
-
-        charge.wallet_fingerprint = row['wallet_fingerprint']
-        charge.address_derivation_index = row['address_derivation_index']
-
-        charge.beneficiary = row['beneficiary']
-        charge.what_for = row['what_for']
-        charge.status_fixed_manually = bool(row['status_fixed_manually'])
-
-        charge.block_explorer_1 = row['block_explorer_1']
-        charge.block_explorer_2 = row['block_explorer_2']
-        charge.subsequent_discrepancies = int(row['subsequent_discrepancies'])
-
-
-        charge.created_at = self.soft_apply_utc(row['created_at'])
-        charge.updated_at = self.soft_apply_utc(row['updated_at'])
-
-        assert_charge_types(charge)
+        values = dict(zip(self.CHARGE_COLUMN_NAMES, row))
+        for column in self.CHARGE_DECIMAL_COLUMNS:
+            values[column] = db_int8_to_decimal(values[column])
+        for column in self.CHARGE_TIMESTAMP_COLUMNS:
+            values[column] = self.soft_apply_utc(values[column])
+        values['status_fixed_manually'] = bool(values['status_fixed_manually'])
+        if self._deferred_charge_writes or self._flushing_charge_writes:
+            with self._deferred_lock:
+                values.update(self._flushing_charge_writes.get(values['uid'], {}))
+                values.update(self._deferred_charge_writes.get(values['uid'], {}))
+        charge = Charge.hydrate(values, update_me)
+        if self._assert_types:
+            assert_charge_types(charge)
         return charge
 
+    def charge_summary_from_row(self, row) -> ChargeSummary:
+        (uid, merchant_order_id, total, currency, cc_total, cc_currency, cc_address, cc_lightning_payment_request, cc_price,
+         pay_status, status, cc_received_total, status_fixed_manually, created_at) = row
+        return ChargeSummary(
+            uid, merchant_order_id, db_int8_to_decimal(total), currency,
+            db_int8_to_decimal(cc_total), cc_currency, cc_address, cc_lightning_payment_request, db_int8_to_decimal(cc_price),
+            pay_status, status, db_int8_to_decimal(cc_received_total), bool(status_fixed_manually), self.soft_apply_utc(created_at)
+        )
+
     def dummystore_order_from_row(self, row) -> DummyStoreOrder:
         order = DummyStoreOrder(
             uid=row['uid'],
@@ -480,6 +747,17 @@ class SqliteDB(DB):
                 updated_at
     """
 
+    CHARGE_COLUMN_NAMES = [column.strip() for column in CHARGE_COLUMNS.split(',')]
+
+    CHARGE_DECIMAL_COLUMNS = ['total', 'cc_total', 'cc_price', 'usd_total', 'cc_received_total']
+
+    CHARGE_TIMESTAMP_COLUMNS = ['activated_at', 'paid_at', 'completed_at', 'expired_at', 'cancelled_at', 'merchant_callback_url_called_at', 'created_at', 'updated_at']
+
+    CHARGE_SUMMARY_COLUMNS = ', '.join(ChargeSummary._fields)
+
+    # Explorer bookkeeping - nothing status, payment or merchant related - so a flush may lag behind without harm
+    DEFERRABLE_CHARGE_COLUMNS = frozenset({'subsequent_discrepancies', 'block_explorer_1', 'block_explorer_2', 'updated_at'})
+
     DUMMY_STORE_ORDERS_COLUMNS = 'uid, item_id, total, currency, cc_total, cc_currency'
 
     def _charge_values(self, charge):
@@ -528,12 +806,6 @@ class SqliteDB(DB):
             charge.updated_at
         ]
 
-    def _charge_columns_for_update(self):
-        return self.CHARGE_COLUMNS.replace('uid,', '') .replace(',', ' = ?,').replace('updated_at', 'updated_at = ?')
-
-    def _charge_values_for_update(self, charge: Charge):
-        return self._charge_values(charge)[1:] + [charge.uid]
-
     def _dummy_store_order_values(self, order: DummyStoreOrder):
         return [
             order.uid,
@@ -551,17 +823,17 @@ class SqliteDB(DB):
         return self._dummy_store_order_values(order)[1:] + [order.uid]
 
     def get_order_by_uid(self, uid: str) -> DummyStoreOrder:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.DUMMY_STORE_ORDERS_COLUMNS} FROM dummy_store_orders WHERE uid = ?'
             values = [uid]
-            row = self._db.execute(sql, values).fetchone()
+            row = db.execute(sql, values).fetchone()
             if row:
                 return self.dummystore_order_from_row(row)
 
     def get_orders(self) -> List[DummyStoreOrder]:
-        with self.lock:
+        with self._reading() as db:
             sql = f'SELECT {self.DUMMY_STORE_ORDERS_COLUMNS} FROM dummy_store_orders ORDER BY uid'
-            rows = self._db.execute(sql)
+            rows = db.execute(sql)
             orders = []
             for row in rows:
                 orders.append(self.dummystore_order_from_row(row))
@@ -2,20 +2,30 @@ from abc import ABC, abstractmethod
 
 from cypherpunkpay.globals import *
 from cypherpunkpay.models.address_credits import AddressCredits
-from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient
+from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient, ResponseTooLarge
 from cypherpunkpay.net.tor_client.base_tor_circuits import BaseTorCircuits
 
 
+class AddressHistoryTooLarge(Exception):
+    """ The address has more history than the configured limits allow; says nothing about the explorer's health """
+    pass
+
+
 class BlockExplorer(ABC):
 
+    # Address lookups of popular or reused addresses can return megabytes; bigger responses are treated as errors
+    MAX_RESPONSE_BYTES = 4 * 1024 * 1024
+
     http_client: BaseHttpClient = None
     btc_network: str = None
     _use_tor: bool
+    _max_response_bytes: int
 
-    def __init__(self, http_client, btc_network='testnet', use_tor=True):
+    def __init__(self, http_client, btc_network='testnet', use_tor=True, max_response_bytes=MAX_RESPONSE_BYTES):
         self.http_client = http_client
         self.btc_network = btc_network
         self._use_tor = use_tor
+        self._max_response_bytes = max_response_bytes
 
     @abstractmethod
     def get_height(self) -> [int, None]:
@@ -43,5 +53,20 @@ class BlockExplorer(ABC):
             except JSONDecodeError as e:
                 log.warning(f'Non JSON API response: {text}')
 
+    def http_get_bounded_json_or_None_on_error(self, url: str, privacy_context: str) -> [Dict, List, None]:
+        text = self.http_get_bounded_text_or_None_on_error(url, privacy_context)
+        if text is not None:
+            try:
+                return json.loads(text)
+            except JSONDecodeError as e:
+                log.warning(f'Non JSON API response: {text[:1000]}')
+
+    # Raises AddressHistoryTooLarge when the response exceeds max_response_bytes
+    def http_get_bounded_text_or_None_on_error(self, url: str, privacy_context: str) -> [str, None]:
+        try:
+            return self.http_client.get_bounded_text_or_None_on_error(url, privacy_context, max_bytes=self._max_response_bytes)
+        except ResponseTooLarge as e:
+            raise AddressHistoryTooLarge(f'{self.__class__.__name__} response {e}')
+
     def http_get_json_or_None_on_error_while_accepting_linkability(self, url: str) -> [Dict, None]:
         return self.http_get_json_or_None_on_error(url, privacy_context=BaseTorCircuits.SHARED_CIRCUIT_ID)
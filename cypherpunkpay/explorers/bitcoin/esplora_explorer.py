@@ -1,10 +1,31 @@
+from collections import OrderedDict
+from threading import RLock
+
 from cypherpunkpay.globals import *
-from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer, AddressHistoryTooLarge
 from cypherpunkpay.models.address_credits import AddressCredits
 from cypherpunkpay.models.credit import Credit
+from cypherpunkpay.tools.json_stream import iter_json_array
 
 
 class EsploraExplorer(BlockExplorer):
+    # https://github.com/Blockstream/esplora/blob/master/API.md
+
+    # /address/:address/txs/chain returns the newest CONFIRMED_TXS_PER_PAGE confirmed transactions;
+    # older ones are paged with /address/:address/txs/chain/:last_seen_txid
+    CONFIRMED_TXS_PER_PAGE = 25
+    MAX_PAGES = 40
+
+    # Confirmed history is remembered per address so settled addresses cost a single small stats request per poll
+    MAX_TRACKED_ADDRESSES = 4096
+
+    # While the newest confirmed tx of an address is this shallow, every new tip re-checks the first chain page
+    REORG_CHECK_DEPTH = 6
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._histories_lock = RLock()
+        self._histories = OrderedDict()  # address -> AddressHistory
 
     # Returns None on any error
     def get_height(self) -> [int, None]:
@@ -15,17 +36,101 @@ class EsploraExplorer(BlockExplorer):
             except ValueError as e:
                 log.debug(f'Cannot parse "{text_height}" as int')
 
-    # Returns None on any error
+    # Returns None on any error; raises AddressHistoryTooLarge over the response size (or page) limits
     def get_address_credits(self, address: str, current_height: int) -> [AddressCredits, None]:
-        json_dict = self.http_get_json_or_None_on_error(
-            url=f'{self.api_endpoint()}/address/{address}/txs',
-            privacy_context=address
-        )
-        if json_dict is not None:
-            credits = []
-            for tx_json in json_dict:
-                credits.extend(self._credits_from_relevant_tx_outs(address, tx_json))
-            return AddressCredits(credits, current_height)
+        stats = self.http_get_bounded_json_or_None_on_error(f'{self.api_endpoint()}/address/{address}', privacy_context=address)
+        try:
+            chain_tx_count = stats['chain_stats']['tx_count']
+            mempool_tx_count = stats['mempool_stats']['tx_count']
+        except (KeyError, TypeError):
+            if stats is not None:
+                log.warning(f'Unexpected API response: {stats}')
+            return None
+
+        # Chain first, then mempool: a tx confirming in between is missed until the next poll instead of counted twice
+        history = self._synced_history(address, chain_tx_count, current_height)
+        if history is None:
+            return None
+        credits = list(history.confirmed_credits)
+        if mempool_tx_count > 0:
+            page = self._get_txs_page(f'{self.api_endpoint()}/address/{address}/txs/mempool', address)
+            if page is None:
+                return None
+            for txid, confirmed_height, tx_credits in page:
+                credits.extend(tx_credits)
+        return AddressCredits(credits, current_height)
+
+    def _synced_history(self, address: str, chain_tx_count: int, current_height: int) -> ['AddressHistory', None]:
+        with self._histories_lock:
+            history = self._histories.get(address)
+        if history is not None and history.last_seen_height <= current_height:
+            if history.chain_tx_count == chain_tx_count:
+                if not self._may_be_reorged(history, current_height):
+                    return history
+                # Same tx count does not rule out a tx re-mined at another height or swapped for another one
+                first_page = self._get_txs_page(f'{self.api_endpoint()}/address/{address}/txs/chain', address)
+                if first_page is None:
+                    return None
+                if [(txid, confirmed_height) for txid, confirmed_height, _ in first_page] == history.recent_txs:
+                    return self._remember(address, history.checked_at(current_height))
+                log.info(f'{self.__class__.__name__} lists different recent txs for {address}, resyncing')
+            elif history.last_seen_txid is not None and history.chain_tx_count < chain_tx_count:
+                new_txs = self._get_chain_txs(address, stop_at_txid=history.last_seen_txid)
+                if new_txs is None:
+                    return None
+                if new_txs and new_txs[-1][:2] == (history.last_seen_txid, history.last_seen_height):
+                    return self._remember(address, history.prepended(new_txs[:-1], current_height))
+                # The last seen tx is gone from the chain or got re-mined at another height (reorg)
+                log.info(f'{self.__class__.__name__} no longer lists {history.last_seen_txid} at {history.last_seen_height} for {address}, resyncing')
+        if chain_tx_count == 0:
+            return self._remember(address, AddressHistory.EMPTY.checked_at(current_height))
+        new_txs = self._get_chain_txs(address)
+        if new_txs is None:
+            return None
+        return self._remember(address, AddressHistory.EMPTY.prepended(new_txs, current_height))
+
+    def _may_be_reorged(self, history: 'AddressHistory', current_height: int) -> bool:
+        return current_height != history.checked_height and history.last_seen_height > current_height - self.REORG_CHECK_DEPTH
+
+    # Returns confirmed (txid, confirmed_height, credits) newest first, ending with stop_at_txid if it was found, or None on any error
+    def _get_chain_txs(self, address: str, stop_at_txid: str = None) -> [List[tuple], None]:
+        txs = []
+        url = f'{self.api_endpoint()}/address/{address}/txs/chain'
+        for _ in range(self.MAX_PAGES):
+            page = self._get_txs_page(url, address)
+            if page is None:
+                return None
+            for tx in page:
+                txs.append(tx)
+                if tx[0] == stop_at_txid:
+                    return txs
+            if len(page) < self.CONFIRMED_TXS_PER_PAGE:
+                return txs
+            url = f'{self.api_endpoint()}/address/{address}/txs/chain/{page[-1][0]}'
+        raise AddressHistoryTooLarge(f'{self.__class__.__name__} returned over {self.MAX_PAGES} pages of transactions')
+
+    # Returns [(txid, confirmed_height, credits to our address)] or None on any error
+    def _get_txs_page(self, url: str, address: str) -> [List[tuple], None]:
+        text = self.http_get_bounded_text_or_None_on_error(url, privacy_context=address)
+        if text is None:
+            return None
+        page = []
+        try:
+            # One transaction at a time; only credits to our address are kept
+            for tx_json in iter_json_array(text):
+                page.append((tx_json['txid'], tx_json['status'].get('block_height'), self._credits_from_relevant_tx_outs(address, tx_json)))
+        except (JSONDecodeError, KeyError, TypeError):
+            log.warning(f'Unexpected API response: {text[:1000]}')
+            return None
+        return page
+
+    def _remember(self, address: str, history: 'AddressHistory') -> 'AddressHistory':
+        with self._histories_lock:
+            self._histories[address] = history
+            self._histories.move_to_end(address)
+            while len(self._histories) > self.MAX_TRACKED_ADDRESSES:
+                self._histories.popitem(last=False)
+        return history
 
     def _credits_from_relevant_tx_outs(self, address, tx_json):
         credits = []
@@ -43,3 +148,40 @@ class EsploraExplorer(BlockExplorer):
                     credits.append(credit)
 
         return credits
+
+
+class AddressHistory(object):
+    """ Confirmed credits of an address as last seen by one explorer
+
+        Confirmed transactions only change on reorgs, so later polls fetch just the transactions confirmed after
+        last_seen_txid. A shrinking tx count, a tip below last_seen_height, last_seen_txid disappearing from the chain
+        or recent_txs (the first chain page as of checked_height) no longer matching trigger a full resync.
+    """
+
+    EMPTY = None
+
+    def __init__(self, confirmed_credits: List[Credit], chain_tx_count: int, recent_txs: List[tuple], checked_height: int):
+        self.confirmed_credits = confirmed_credits
+        self.chain_tx_count = chain_tx_count
+        self.recent_txs = recent_txs  # [(txid, confirmed_height)], newest first
+        self.checked_height = checked_height
+
+    @property
+    def last_seen_txid(self) -> [str, None]:
+        return self.recent_txs[0][0] if self.recent_txs else None
+
+    @property
+    def last_seen_height(self) -> int:
+        return self.recent_txs[0][1] if self.recent_txs else 0
+
+    def prepended(self, new_txs: List[tuple], checked_height: int) -> 'AddressHistory':
+        """ new_txs are (txid, confirmed_height, credits), newest first """
+        credits = [credit for _, _, tx_credits in new_txs for credit in tx_credits]
+        recent_txs = ([(txid, confirmed_height) for txid, confirmed_height, _ in new_txs] + self.recent_txs)[:EsploraExplorer.CONFIRMED_TXS_PER_PAGE]
+        return AddressHistory(credits + self.confirmed_credits, self.chain_tx_count + len(new_txs), recent_txs, checked_height)
+
+    def checked_at(self, checked_height: int) -> 'AddressHistory':
+        return AddressHistory(self.confirmed_credits, self.chain_tx_count, self.recent_txs, checked_height)
+
+
+AddressHistory.EMPTY = AddressHistory([], 0, [], 0)
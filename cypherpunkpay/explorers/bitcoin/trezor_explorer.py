@@ -17,9 +17,9 @@ class TrezorExplorer(BlockExplorer):
             except ValueError as e:
                 log.debug(f'Cant parse "{height}" as int')
 
-    # Returns None on any error
+    # Returns None on any error; raises AddressHistoryTooLarge over the response size (or page) limits
     def get_address_credits(self, address: str, current_height: int) -> [AddressCredits, None]:
-        json_dict = self.http_get_json_or_None_on_error(
+        json_dict = self.http_get_bounded_json_or_None_on_error(
             url=f'{self.api_endpoint()}/address/{address}?details=txs',
             privacy_context=address
         )
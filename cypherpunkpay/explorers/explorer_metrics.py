@@ -0,0 +1,153 @@
+import time
+from collections import deque
+from threading import RLock
+
+from cypherpunkpay.globals import *
+
+
+class ExplorerMetrics(object):
+    """ Health of a single block explorer, used to prefer fast, reliable and consistent ones
+
+        Rolling success rate, latency percentiles and disagreement rate cover the last WINDOW calls.
+        QUARANTINE_AFTER_FAILURES failures in a row quarantine the explorer for everybody; the quarantine doubles
+        with every repeated one (up to MAX_QUARANTINE_SECONDS) and a single success lifts it.
+    """
+
+    # Weight of the latest sample in the moving average
+    EWMA_ALPHA = 0.3
+
+    # Each consecutive failure counts as this much extra latency so a failing explorer sorts after working ones
+    FAILURE_PENALTY_SECONDS = 60.0
+
+    WINDOW = 50
+
+    QUARANTINE_AFTER_FAILURES = 2
+    QUARANTINE_SECONDS = 30.0
+    MAX_QUARANTINE_SECONDS = 15 * 60.0
+
+    # Never zero so selection stays randomised among all healthy explorers
+    MIN_WEIGHT = 0.05
+
+    def __init__(self, name: str):
+        self.name = name
+        self.success_count = 0
+        self.failure_count = 0
+        self.disagreement_count = 0
+        self.consecutive_failures = 0
+        self.avg_latency = None  # seconds, exponentially weighted; None until the first sample
+        self._calls = deque(maxlen=self.WINDOW)        # (succeeded, latency)
+        self._agreements = deque(maxlen=self.WINDOW)   # True if the answer matched the other explorer's
+        self._quarantined_until = None
+        self._quarantine_seconds = self.QUARANTINE_SECONDS
+        self._lock = RLock()
+
+    def record_success(self, latency: float):
+        with self._lock:
+            self.success_count += 1
+            self.consecutive_failures = 0
+            self.avg_latency = self._ewma(latency)
+            self._calls.append((True, latency))
+            self._quarantined_until = None
+            self._quarantine_seconds = self.QUARANTINE_SECONDS
+
+    def record_failure(self, latency: float):
+        with self._lock:
+            self.failure_count += 1
+            self.consecutive_failures += 1
+            self.avg_latency = self._ewma(latency)
+            self._calls.append((False, latency))
+            if self.consecutive_failures >= self.QUARANTINE_AFTER_FAILURES and not self.is_quarantined():
+                if self._quarantined_until is not None:
+                    # Failed again right after the previous quarantine
+                    self._quarantine_seconds = min(2 * self._quarantine_seconds, self.MAX_QUARANTINE_SECONDS)
+                self._quarantined_until = self._now() + self._quarantine_seconds
+                log.info(f'Quarantining block explorer {self.name} for {self._quarantine_seconds:.0f}s after {self.consecutive_failures} failures in a row')
+
+    def record_agreement(self, agreed: bool):
+        with self._lock:
+            if not agreed:
+                self.disagreement_count += 1
+            self._agreements.append(agreed)
+
+    def is_quarantined(self) -> bool:
+        quarantined_until = self._quarantined_until
+        return quarantined_until is not None and self._now() < quarantined_until
+
+    def success_rate(self) -> float:
+        with self._lock:
+            if not self._calls:
+                return 1.0
+            return sum(1 for succeeded, _ in self._calls if succeeded) / len(self._calls)
+
+    def disagreement_rate(self) -> float:
+        with self._lock:
+            if not self._agreements:
+                return 0.0
+            return sum(1 for agreed in self._agreements if not agreed) / len(self._agreements)
+
+    def latency_percentile(self, percent: int) -> [float, None]:
+        with self._lock:
+            latencies = sorted(latency for _, latency in self._calls)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) * percent // 100, len(latencies) - 1)]
+
+    def score(self) -> float:
+        """ Lower is better; explorers never queried come first so they get measured """
+        with self._lock:
+            if self.avg_latency is None:
+                return 0.0
+            return self.avg_latency + self.consecutive_failures * self.FAILURE_PENALTY_SECONDS
+
+    def weight(self) -> float:
+        """ Relative chance of being picked for a charge; 0 while quarantined """
+        if self.is_quarantined():
+            return 0.0
+        p50 = self.latency_percentile(50) or 0.0
+        weight = self.success_rate() ** 2 * (1 - self.disagreement_rate()) / (1 + p50)
+        return max(weight, self.MIN_WEIGHT)
+
+    def _ewma(self, sample: float) -> float:
+        if self.avg_latency is None:
+            return sample
+        return self.EWMA_ALPHA * sample + (1 - self.EWMA_ALPHA) * self.avg_latency
+
+    # MOCK ME
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def __str__(self):
+        def seconds(value):
+            return f'{value:.1f}s' if value is not None else '-'
+        quarantined = ' QUARANTINED' if self.is_quarantined() else ''
+        return f'{self.name}(ok={self.success_count} failed={self.failure_count} success_rate={self.success_rate():.0%} ' \
+               f'p50={seconds(self.latency_percentile(50))} p95={seconds(self.latency_percentile(95))} ' \
+               f'disagreement_rate={self.disagreement_rate():.0%}{quarantined})'
+
+
+class ExplorerMetricsRegistry(object):
+
+    _shared = None
+
+    @classmethod
+    def shared(cls) -> 'ExplorerMetricsRegistry':
+        """ Process-wide registry so every use case sees (and quarantines) the same explorers """
+        return cls._shared
+
+    def __init__(self):
+        self._lock = RLock()
+        self._metrics: Dict[str, ExplorerMetrics] = {}
+
+    def get(self, name: str) -> ExplorerMetrics:
+        with self._lock:
+            metrics = self._metrics.get(name)
+            if metrics is None:
+                metrics = self._metrics[name] = ExplorerMetrics(name)
+            return metrics
+
+    def all(self) -> List[ExplorerMetrics]:
+        with self._lock:
+            return list(self._metrics.values())
+
+
+ExplorerMetricsRegistry._shared = ExplorerMetricsRegistry()
@@ -0,0 +1,54 @@
+from threading import RLock
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.supported_explorers import SupportedExplorers
+
+
+class UnknownExplorer(Exception):
+    pass
+
+
+class ExplorerRegistry(object):
+    """ Resolves the "module Klass" strings stored in charges.block_explorer_1/2 and hands out explorer instances
+
+        Only SupportedExplorers resolve, so whatever a charge row holds never reaches importlib. Explorers keep no
+        per-call state, so one instance per (explorer, http client, network, use_tor, size limit) is shared by all charges
+        (which also lets Esplora explorers remember address histories across polls).
+    """
+
+    _shared = None
+
+    @classmethod
+    def shared(cls) -> 'ExplorerRegistry':
+        return cls._shared
+
+    def __init__(self):
+        self._lock = RLock()
+        klasses = SupportedExplorers.BTC_MAINNET + SupportedExplorers.BTC_TESTNET + SupportedExplorers.XMR_MAINNET + SupportedExplorers.XMR_STAGENET
+        self._klasses = {self.module_klass_name(klass): klass for klass in klasses}
+        self._instances = {}  # (module_klass, http_client, btc_network, use_tor, max_response_bytes) -> BlockExplorer
+
+    @staticmethod
+    def module_klass_name(klass) -> str:
+        return klass.__module__ + ' ' + klass.__name__
+
+    def resolve(self, module_klass: [str, None]) -> [type, None]:
+        return self._klasses.get(module_klass)
+
+    def instance(self, module_klass: str, http_client, btc_network: str, use_tor: bool, max_response_bytes: int = BlockExplorer.MAX_RESPONSE_BYTES) -> BlockExplorer:
+        key = (module_klass, http_client, btc_network, use_tor, max_response_bytes)
+        explorer = self._instances.get(key)
+        if explorer is None:
+            klass = self.resolve(module_klass)
+            if klass is None:
+                raise UnknownExplorer(module_klass)
+            with self._lock:
+                explorer = self._instances.setdefault(key, klass(http_client=http_client, btc_network=btc_network, use_tor=use_tor, max_response_bytes=max_response_bytes))
+        return explorer
+
+    def unknown_of(self, module_klasses: List[str]) -> List[str]:
+        return [module_klass for module_klass in module_klasses if module_klass is not None and self.resolve(module_klass) is None]
+
+
+ExplorerRegistry._shared = ExplorerRegistry()
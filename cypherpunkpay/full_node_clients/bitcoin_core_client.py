@@ -1,9 +1,11 @@
+from threading import RLock
+
 from cypherpunkpay.bitcoin.bip32 import Bip32
 from cypherpunkpay.globals import *
 from cypherpunkpay.models.address_credits import AddressCredits
 from cypherpunkpay.models.credit import Credit
 from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient
-from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcClient
+from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcClient, JsonRpcError
 
 
 class BitcoinCoreClient(object):
@@ -11,6 +13,7 @@ class BitcoinCoreClient(object):
     _json_rpc_client: JsonRpcClient = None
 
     def __init__(self, url: str, rpc_user: str, rpc_password: str, http_client: BaseHttpClient):
+        self._url = url
         self._json_rpc_client = JsonRpcClient(url, user=rpc_user, passwd=rpc_password, http_client=http_client)
 
     def get_height(self) -> int:
@@ -31,16 +34,18 @@ class BitcoinCoreClient(object):
             # https://developer.bitcoin.org/reference/rpc/createwallet.html
             self._json_rpc_client.createwallet(wallet_name, True, True, None, False, True, True)
 
-        # https://developer.bitcoin.org/reference/rpc/getwalletinfo.html
-        wallet_info = self._json_rpc_client.getwalletinfo(wallet_path)
+        standard_xpub = Bip32.to_standard_xpub(xpub)
+        with self._json_rpc_client.batch() as batch:
+            # https://developer.bitcoin.org/reference/rpc/getwalletinfo.html
+            wallet_info_call = batch.getwalletinfo(wallet_path)
+            # https://developer.bitcoin.org/reference/rpc/getdescriptorinfo.html
+            descriptor_info_call = batch.getdescriptorinfo(f'wpkh({standard_xpub}/0/*)')
+        wallet_info = wallet_info_call.result()
 
         if wallet_info['txcount'] == 0:
             log.info("Importing wallet descriptor to your Bitcoin Core wallet...")
 
-            # https://developer.bitcoin.org/reference/rpc/getdescriptorinfo.html
-            standard_xpub = Bip32.to_standard_xpub(xpub)
-            result = self._json_rpc_client.getdescriptorinfo(f'wpkh({standard_xpub}/0/*)')
-            checksum = result['checksum']
+            checksum = descriptor_info_call.result()['checksum']
 
             # https://developer.bitcoin.org/reference/rpc/importdescriptors.html
             self._json_rpc_client.importdescriptors(
@@ -63,57 +68,137 @@ class BitcoinCoreClient(object):
         log.info(f'Successfully connected to Bitcoin Core wallet ({wallet_name})')
 
     def get_address_credits(self, wallet_fingerprint: str, address: str, current_height: int) -> [AddressCredits, None]:
+        all_credits = self.get_all_address_credits(wallet_fingerprint, current_height)
+        return all_credits.get(address, AddressCredits([], current_height))
+
+    # Credits for every address of the wallet in a single RPC call.
+    # Only what changed since the previous call is fetched and merged into the history (shared per node and wallet by default).
+    def get_all_address_credits(self, wallet_fingerprint: str, current_height: int, history: 'WalletHistory' = None) -> Dict[str, AddressCredits]:
+        history = history if history else WalletHistory.shared(self._url, wallet_fingerprint)
         wallet_name = self.wallet_name_from_fingerprint(wallet_fingerprint)
         wallet_path = f'/wallet/{wallet_name}'
 
-        # This is a dirty hack due to listreceivedbyaddress not working for descriptor wallets in Bitcoin Core 0.21
-
-        total_6_plus = self._json_rpc_client.getreceivedbyaddress(address, 6, wallet_path)
-        total_5_plus = self._json_rpc_client.getreceivedbyaddress(address, 5, wallet_path)
-        total_4_plus = self._json_rpc_client.getreceivedbyaddress(address, 4, wallet_path)
-        total_3_plus = self._json_rpc_client.getreceivedbyaddress(address, 3, wallet_path)
-        total_2_plus = self._json_rpc_client.getreceivedbyaddress(address, 2, wallet_path)
-        total_1_plus = self._json_rpc_client.getreceivedbyaddress(address, 1, wallet_path)
-        total_0_plus = self._json_rpc_client.getreceivedbyaddress(address, 0, wallet_path)
-
-        total_6 = total_6_plus
-        total_5 = total_5_plus - total_6_plus
-        total_4 = total_4_plus - total_5_plus
-        total_3 = total_3_plus - total_4_plus
-        total_2 = total_2_plus - total_3_plus
-        total_1 = total_1_plus - total_2_plus
-        total_0 = total_0_plus - total_1_plus
-
-        # log.info(f'total_6={total_6}')
-        # log.info(f'total_5={total_5}')
-        # log.info(f'total_4={total_4}')
-        # log.info(f'total_3={total_3}')
-        # log.info(f'total_2={total_2}')
-        # log.info(f'total_1={total_1}')
-        # log.info(f'total_0={total_0}')
-
-        credits = []
-        if total_0 > 0:
-            credits.append(Credit(total_0, confirmed_height=None, has_replaceable_flag=True))
-        if total_1 > 0:
-            credits.append(Credit(total_1, confirmed_height=current_height, has_replaceable_flag=True))
-        if total_2 > 0:
-            credits.append(Credit(total_2, confirmed_height=current_height-1, has_replaceable_flag=True))
-        if total_3 > 0:
-            credits.append(Credit(total_3, confirmed_height=current_height-2, has_replaceable_flag=True))
-        if total_4 > 0:
-            credits.append(Credit(total_4, confirmed_height=current_height-3, has_replaceable_flag=True))
-        if total_5 > 0:
-            credits.append(Credit(total_5, confirmed_height=current_height-4, has_replaceable_flag=True))
-        if total_6 > 0:
-            credits.append(Credit(total_6, confirmed_height=current_height-5, has_replaceable_flag=True))
-
-        address_credits = AddressCredits(credits, current_height)
-
-        return address_credits
+        with history.lock:
+            try:
+                # https://developer.bitcoin.org/reference/rpc/listsinceblock.html
+                # Unlike listreceivedbyaddress this works for descriptor wallets
+                result = self._json_rpc_client.listsinceblock(history.last_block, WalletHistory.REORG_SAFETY_CONFIRMATIONS, True, True, wallet_path)
+            except JsonRpcError:
+                # Also covers last_block unknown to the node (reindexed, different chain); next time starts from genesis
+                history.reset()
+                raise
+            history.merge(result, current_height)
+            return history.address_credits(current_height)
+
+    # Node's own height and all address credits in a single round trip, so confirmations are computed against a consistent tip
+    def get_height_and_all_address_credits(self, wallet_fingerprint: str, history: 'WalletHistory' = None) -> (int, Dict[str, AddressCredits]):
+        history = history if history else WalletHistory.shared(self._url, wallet_fingerprint)
+        wallet_name = self.wallet_name_from_fingerprint(wallet_fingerprint)
+        wallet_path = f'/wallet/{wallet_name}'
+
+        with history.lock:
+            try:
+                with self._json_rpc_client.batch() as batch:
+                    height_call = batch.getblockcount()
+                    listsinceblock_call = batch.listsinceblock(history.last_block, WalletHistory.REORG_SAFETY_CONFIRMATIONS, True, True, wallet_path)
+                height = height_call.result()
+                result = listsinceblock_call.result()
+            except JsonRpcError:
+                history.reset()
+                raise
+            history.merge(result, height)
+            return height, history.address_credits(height)
+
+    @staticmethod
+    def _credit_from_tx(tx: Dict, current_height: int) -> [Credit, None]:
+        if tx.get('category') != 'receive' or 'address' not in tx:
+            return None  # outgoing or coinbase
+        confirmations = tx['confirmations']
+        if confirmations < 0:
+            return None  # conflicted, i.e. double spent or replaced
+        confirmed_height = None
+        if confirmations > 0:
+            confirmed_height = tx.get('blockheight', current_height - confirmations + 1)
+        # 'unknown' means an unconfirmed ancestor signals RBF so we must treat it as replaceable too
+        has_replaceable_flag = tx.get('bip125-replaceable', 'unknown') != 'no'
+        return Credit(Decimal(tx['amount']), confirmed_height=confirmed_height, has_replaceable_flag=has_replaceable_flag)
 
     def wallet_name_from_fingerprint(self, fingerprint: str) -> str:
         return f'cypherpunkpay-wallet-{fingerprint}'
 
     def wallet_name_from_xpub(self, xpub: str) -> str:
         return self.wallet_name_from_fingerprint(Bip32.wallet_fingerprint(xpub))
+
+
+class WalletHistory(object):
+    """ Receive credits of a wallet as of last_block, so repeated listsinceblock calls only return what changed
+
+        listsinceblock(last_block, REORG_SAFETY_CONFIRMATIONS) reports transactions in blocks after last_block,
+        every unconfirmed or conflicted one still in the wallet and the ones from blocks reorged out since.
+        The returned last_block trails the tip by REORG_SAFETY_CONFIRMATIONS - 1 blocks, so recently confirmed
+        transactions keep being reported (and corrected) until they are that deep.
+
+        Charges are only refreshed for 7 days after activation (see UpdateChargeJobsUC), so credits deeper than
+        PRUNE_AFTER_CONFIRMATIONS are never asked for again and get dropped to keep the history bounded.
+    """
+
+    REORG_SAFETY_CONFIRMATIONS = 6
+    PRUNE_AFTER_CONFIRMATIONS = 8 * 144  # about 8 days of blocks
+
+    _shared: Dict = {}  # (rpc_url, wallet_fingerprint) -> WalletHistory
+    _shared_lock = RLock()
+
+    @classmethod
+    def shared(cls, rpc_url: str, wallet_fingerprint: str) -> 'WalletHistory':
+        """ Process-wide history of the wallet on the node, so every caller only fetches what changed """
+        with cls._shared_lock:
+            return cls._shared.setdefault((rpc_url, wallet_fingerprint), WalletHistory())
+
+    @classmethod
+    def forget_shared(cls):
+        with cls._shared_lock:
+            cls._shared.clear()
+
+    def __init__(self):
+        self.lock = RLock()  # held across listsinceblock and merge
+        self.last_block = None  # None means since genesis
+        self._credits = {}  # (txid, vout) -> (address, Credit)
+        self._pruned_at_height = None
+
+    def reset(self) -> None:
+        self.last_block = None
+        self._credits = {}
+        self._pruned_at_height = None
+
+    def merge(self, result: Dict, current_height: int) -> None:
+        reported = {self._key(tx) for tx in result['transactions']}
+        # Unconfirmed ones are reported on every call as long as the wallet still has them
+        for key in [key for key, (_, credit) in self._credits.items() if credit.is_unconfirmed() and key not in reported]:
+            del self._credits[key]
+        for tx in result.get('removed', []):
+            self._credits.pop(self._key(tx), None)
+        for tx in result['transactions']:
+            credit = BitcoinCoreClient._credit_from_tx(tx, current_height)
+            if credit:
+                self._credits[self._key(tx)] = (tx['address'], credit)
+            else:
+                self._credits.pop(self._key(tx), None)  # e.g. became conflicted
+        self.last_block = result['lastblock']
+        if self._pruned_at_height != current_height:
+            self._prune(current_height)
+
+    def _prune(self, current_height: int) -> None:
+        deepest_kept_height = current_height - self.PRUNE_AFTER_CONFIRMATIONS + 1
+        for key in [key for key, (_, credit) in self._credits.items() if credit.is_confirmed() and credit.confirmed_height() < deepest_kept_height]:
+            del self._credits[key]
+        self._pruned_at_height = current_height
+
+    def address_credits(self, current_height: int) -> Dict[str, AddressCredits]:
+        credits_by_address: Dict[str, List[Credit]] = {}
+        for address, credit in self._credits.values():
+            credits_by_address.setdefault(address, []).append(credit)
+        return {address: AddressCredits(credits, current_height) for address, credits in credits_by_address.items()}
+
+    @staticmethod
+    def _key(tx: Dict) -> tuple:
+        return tx['txid'], tx.get('vout')
@@ -26,40 +26,81 @@ class JsonRpcClient(object):
         if name.startswith('__') and name.endswith('__'):
             # Python internal stuff
             raise AttributeError
+        service_name = name
         if self.__service_name is not None:
-            name = "%s.%s" % (self.__service_name, name)
-        return JsonRpcClient(self.__service_url, self.__user, self.__passwd, http_client=self.__http_client, service_name=name, path=self.__path)
+            service_name = "%s.%s" % (self.__service_name, name)
+        proxy = JsonRpcClient(self.__service_url, self.__user, self.__passwd, http_client=self.__http_client, service_name=service_name, path=self.__path)
+        # Memoize so subsequent attribute access finds the proxy directly and __getattr__ is not called again
+        self.__dict__[name] = proxy
+        return proxy
 
     def __call__(self, *args) -> [Dict, None]:
-        JsonRpcClient.__id_count += 1
-        log.debug("-%s-> %s %s" % (JsonRpcClient.__id_count, self.__service_name, json.dumps(args, default=decimal_to_float)))
+        path, params = self._split_wallet_path(self.__path, args)
+        request_d = self._request_d(self.__service_name, params)
+        response_json = self._post(path, request_d, self.__service_name)
 
-        path = self.__path
+        if not isinstance(response_json, Dict):
+            log.warning(f'[{self.__service_name}] JSON/RPC call error: unexpected response: {response_json}')
+            raise JsonRpcCallError()
 
-        # Bitcoin specific hack to extract path from params based on the wallet name
-        if self._last_argument_is_wallet_path(args):
-            path = args[-1]
-            args = tuple(args[0:-1])
-            if len(args) == 1 and isinstance(args[0], Dict):
-                args = args[0]
-        # END of the hack
+        return self._result_or_raise(self.__service_name, response_json)
+
+    def batch(self) -> 'JsonRpcBatch':
+        """ Collects calls to be sent in a single POST, see JsonRpcBatch """
+        return JsonRpcBatch(self)
+
+    def _send_batch(self, calls: List['JsonRpcBatchCall']) -> None:
+        # Calls targeting different wallet paths must go to different URLs hence one POST per path
+        calls_by_path: Dict[str, List[JsonRpcBatchCall]] = {}
+        for call in calls:
+            path, params = self._split_wallet_path(self.__path, call.args)
+            call.request_d = self._request_d(call.method, params, batched=True)
+            calls_by_path.setdefault(path, []).append(call)
+
+        # Bitcoin Core serves non-wallet methods on wallet endpoints too, so with a single wallet involved one POST is enough
+        wallet_paths = [path for path in calls_by_path.keys() if path != self.__path]
+        if len(wallet_paths) == 1 and self.__path in calls_by_path:
+            calls_by_path[wallet_paths[0]] = calls_by_path.pop(self.__path) + calls_by_path[wallet_paths[0]]
+
+        for path, path_calls in calls_by_path.items():
+            label = f'batch of {len(path_calls)}'
+            response_json = self._post(path, [call.request_d for call in path_calls], label)
+            if not isinstance(response_json, List):
+                log.warning(f'[{label}] JSON/RPC batch error: expected array, got: {response_json}')
+                raise JsonRpcCallError(response_json.get('error') if isinstance(response_json, Dict) else None)
+            # Responses can come in any order and must be matched by id
+            response_by_id = {item.get('id'): item for item in response_json if isinstance(item, Dict)}
+            for call in path_calls:
+                item = response_by_id.get(call.request_d['id'])
+                if item is None:
+                    call.set_error(JsonRpcCallError(f'missing response for id={call.request_d["id"]}'))
+                    continue
+                try:
+                    call.set_result(self._result_or_raise(call.method, item))
+                except JsonRpcCallError as e:
+                    call.set_error(e)
+
+    def _request_d(self, method: str, params, batched=False) -> Dict:
+        JsonRpcClient.__id_count += 1
+        log.debug("-%s-> %s %s" % (JsonRpcClient.__id_count, method, json.dumps(params, default=decimal_to_float)))
+        # Single calls stay on 1.x to keep Bitcoin Core's HTTP status codes semantics (404 on unknown method etc)
+        version = {'jsonrpc': '2.0'} if batched else {'version': '1.1'}
+        return {
+            **version,
+            'method': method,
+            'params': params,
+            'id': JsonRpcClient.__id_count
+        }
 
+    def _post(self, path: str, payload: [Dict, List], label: str) -> [Dict, List]:
         headers_d = {
             'Authorization': self.__auth_header,
             'Content-Type': 'application/json'
         }
-        body_s = json.dumps(
-            {
-                'version': '1.1',
-                'method': self.__service_name,
-                'params': args,
-                'id': JsonRpcClient.__id_count
-            },
-            default=decimal_to_float
-        )
+        body_s = json.dumps(payload, default=decimal_to_float)
 
+        url = self.__service_url + path
         try:
-            url = self.__service_url + path
             response = self.__http_client.post_accepting_linkability(
                 url,
                 headers=headers_d,
@@ -81,17 +122,18 @@ class JsonRpcClient(object):
         #log.debug(f'response_text={response_text}')
 
         try:
-            response_json = json.loads(response_text, parse_float=Decimal)
+            return json.loads(response_text, parse_float=Decimal)
         except JSONDecodeError as e:
-            log.warning(f'[{self.__service_name}] Unexpected non-JSON API response: [{response.status_code}] {response_text}')
+            log.warning(f'[{label}] Unexpected non-JSON API response: [{response.status_code}] {response_text}')
             raise JsonRpcParsingError() from e
 
+    def _result_or_raise(self, method: str, response_json: Dict):
         if response_json.get('error') is not None:
-            log.warning(f'[{self.__service_name}] JSON/RPC call error: {response_json["error"]}')
+            log.warning(f'[{method}] JSON/RPC call error: {response_json["error"]}')
             raise JsonRpcCallError(response_json['error'])
 
         if 'result' not in response_json:
-            log.warning(f'[{self.__service_name}] JSON/RPC call error: missing "result" attribute in JSON response: {response_text}')
+            log.warning(f'[{method}] JSON/RPC call error: missing "result" attribute in JSON response: {response_json}')
             raise JsonRpcCallError()
 
         result = response_json['result']
@@ -99,15 +141,88 @@ class JsonRpcClient(object):
         if isinstance(result, List):
             for result_item in result:
                 if isinstance(result_item, Dict) and result_item.get('error') is not None:
-                    log.warning(f'[{self.__service_name}] JSON/RPC call error: {result_item["error"]}')
+                    log.warning(f'[{method}] JSON/RPC call error: {result_item["error"]}')
                     raise JsonRpcCallError(result_item['error'])
 
         return result
 
+    def _split_wallet_path(self, default_path: str, args: tuple) -> (str, [tuple, Dict]):
+        # Bitcoin specific hack to extract path from params based on the wallet name
+        if self._last_argument_is_wallet_path(args):
+            path = args[-1]
+            args = tuple(args[0:-1])
+            if len(args) == 1 and isinstance(args[0], Dict):
+                args = args[0]
+            return path, args
+        # END of the hack
+        return default_path, args
+
     def _last_argument_is_wallet_path(self, args):
         return len(args) > 0 and isinstance(args[-1], str) and 'cypherpunkpay-wallet' in args[-1]
 
 
+class JsonRpcBatch(object):
+    """ Collects JSON-RPC calls and sends them as a single JSON-RPC 2.0 batch request
+
+        with client.batch() as batch:
+            height = batch.getblockcount()
+            info = batch.getwalletinfo(wallet_path)
+        height.result()  # raises JsonRpcCallError if this particular call failed
+    """
+
+    def __init__(self, client: JsonRpcClient):
+        self._client = client
+        self._calls: List[JsonRpcBatchCall] = []
+
+    def __getattr__(self, name):
+        if name.startswith('__') and name.endswith('__'):
+            raise AttributeError
+        return lambda *args: self.add(name, *args)
+
+    def add(self, method: str, *args) -> 'JsonRpcBatchCall':
+        call = JsonRpcBatchCall(method, args)
+        self._calls.append(call)
+        return call
+
+    def send(self) -> None:
+        calls, self._calls = self._calls, []
+        if calls:
+            # noinspection PyProtectedMember
+            self._client._send_batch(calls)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.send()
+
+
+class JsonRpcBatchCall(object):
+
+    _NOT_SENT = object()
+
+    def __init__(self, method: str, args: tuple):
+        self.method = method
+        self.args = args
+        self.request_d = None
+        self._result = self._NOT_SENT
+        self._error = None
+
+    def set_result(self, result):
+        self._result = result
+
+    def set_error(self, error: 'JsonRpcError'):
+        self._error = error
+
+    def result(self):
+        if self._error is not None:
+            raise self._error
+        if self._result is self._NOT_SENT:
+            raise JsonRpcRequestError(f'{self.method} was not sent yet')
+        return self._result
+
+
 def decimal_to_float(obj):
     if isinstance(obj, Decimal):
         return float(round(obj, 8))
@@ -0,0 +1,28 @@
+from threading import RLock
+
+from cypherpunkpay.globals import *
+
+
+class BlockchainHeightEvents(object):
+    """ Notifies subscribers whenever the blockchain height of a configured coin changes
+
+        Listeners are called as listener(coin, old_height, new_height) on the publishing thread.
+        A new_height lower than old_height means a reorg (or a lagging height source).
+    """
+
+    def __init__(self):
+        self._lock = RLock()
+        self._listeners = []
+
+    def subscribe(self, listener) -> None:
+        with self._lock:
+            self._listeners.append(listener)
+
+    def publish(self, coin: str, old_height: int, new_height: int) -> None:
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(coin, old_height, new_height)
+            except Exception:
+                log.exception(f'{coin.upper()} new height {new_height} listener raised exception')
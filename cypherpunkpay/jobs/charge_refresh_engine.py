@@ -0,0 +1,154 @@
+import heapq
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from cypherpunkpay.globals import *
+
+
+class ChargeRefreshEngine(object):
+    """ Refreshes tracked charges on their own intervals using a single due-time heap and a bounded worker pool.
+
+        Replaces one-APScheduler-job-per-charge. The heap holds [due_at, seq, charge_uid] items and is never
+        searched - stale items (untracked or rescheduled charges) are skipped lazily when they surface at the top.
+        A tick only looks at the due head of the heap so its cost does not depend on the number of tracked charges.
+    """
+
+    MAX_WORKERS = 8
+    BATCH_SIZE = 64           # max charges dispatched per tick
+    MAX_QUEUED_PER_WORKER = 2  # backpressure; beyond this due charges wait in the heap and show up as lag
+
+    def __init__(self, refresh_charge=None, max_workers: int = MAX_WORKERS, batch_size: int = BATCH_SIZE):
+        self._refresh_charge = refresh_charge if refresh_charge else self._refresh_charge_uc
+        self._max_workers = max_workers
+        self._batch_size = batch_size
+        self._lock = threading.RLock()
+        self._heap = []        # [due_at, seq, charge_uid]
+        self._entries = {}     # charge_uid -> [due_at, seq, interval_seconds]
+        self._in_flight = set()
+        self._seq = 0
+        self._executor = None  # created lazily so merely constructing the engine does not spawn threads
+
+    def track(self, charge_uid: str, interval: timedelta, first_run_in: [timedelta, None] = None) -> None:
+        """ Starts tracking the charge or updates its refresh interval. Idempotent. """
+        interval_s = interval.total_seconds()
+        with self._lock:
+            now = self._now()
+            entry = self._entries.get(charge_uid)
+            if entry is None:
+                delay_s = first_run_in.total_seconds() if first_run_in is not None else interval_s
+                self._push(charge_uid, now + delay_s, interval_s)
+            elif entry[2] != interval_s:
+                # Keep the existing due time unless the new (shorter) interval asks for an earlier refresh
+                self._push(charge_uid, min(entry[0], now + interval_s), interval_s)
+
+    def untrack(self, charge_uid: str) -> None:
+        with self._lock:
+            self._entries.pop(charge_uid, None)  # the heap item becomes stale and gets skipped lazily
+            self._compact_if_needed()
+
+    def refresh_now(self, charge_uids) -> None:
+        """ Makes tracked charges due immediately; the next tick dispatches them """
+        with self._lock:
+            now = self._now()
+            for charge_uid in charge_uids:
+                entry = self._entries.get(charge_uid)
+                if entry is not None and entry[0] > now:
+                    self._push(charge_uid, now, entry[2])
+
+    def tracked_uids(self) -> set:
+        with self._lock:
+            return set(self._entries.keys())
+
+    def interval_for(self, charge_uid: str) -> [timedelta, None]:
+        with self._lock:
+            entry = self._entries.get(charge_uid)
+            if entry:
+                return timedelta(seconds=entry[2])
+
+    def tick(self) -> int:
+        """ Dispatches due charges to the worker pool. Returns the number of charges dispatched. """
+        with self._lock:
+            now = self._now()
+            capacity = min(self._batch_size, self._max_workers * self.MAX_QUEUED_PER_WORKER - len(self._in_flight))
+            dispatched = 0
+            while dispatched < capacity and self._heap:
+                due_at, seq, charge_uid = self._heap[0]
+                entry = self._entries.get(charge_uid)
+                if entry is None or entry[1] != seq:
+                    heapq.heappop(self._heap)  # stale
+                    continue
+                if due_at > now:
+                    break
+                heapq.heappop(self._heap)
+                self._push(charge_uid, now + entry[2], entry[2])
+                if charge_uid in self._in_flight:
+                    continue  # previous refresh still running; coalesce like APScheduler max_instances=1
+                self._in_flight.add(charge_uid)
+                self._submit(charge_uid)
+                dispatched += 1
+            return dispatched
+
+    def tracked_count(self) -> int:
+        return len(self._entries)
+
+    def queue_depth(self) -> int:
+        """ Refreshes dispatched but not finished yet (running or waiting for a free worker) """
+        return len(self._in_flight)
+
+    def lag(self) -> float:
+        """ Seconds the most overdue tracked charge is behind its schedule """
+        with self._lock:
+            self._pop_stale_head()
+            if self._heap:
+                return max(self._now() - self._heap[0][0], 0.0)
+            return 0.0
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor:
+                self._executor.shutdown(wait=False)
+                self._executor = None
+
+    # MOCK ME
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def _push(self, charge_uid, due_at, interval_s):
+        self._seq += 1
+        self._entries[charge_uid] = [due_at, self._seq, interval_s]
+        heapq.heappush(self._heap, [due_at, self._seq, charge_uid])
+        self._compact_if_needed()
+
+    def _pop_stale_head(self):
+        while self._heap:
+            due_at, seq, charge_uid = self._heap[0]
+            entry = self._entries.get(charge_uid)
+            if entry is not None and entry[1] == seq:
+                return
+            heapq.heappop(self._heap)
+
+    def _compact_if_needed(self):
+        # Stale items would otherwise accumulate for charges that get rescheduled but never surface
+        if len(self._heap) > 2 * len(self._entries) + 64:
+            self._heap = [[entry[0], entry[1], charge_uid] for charge_uid, entry in self._entries.items()]
+            heapq.heapify(self._heap)
+
+    def _submit(self, charge_uid):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self._max_workers, thread_name_prefix='refresh_charge')
+        self._executor.submit(self._run, charge_uid)
+
+    def _run(self, charge_uid):
+        try:
+            self._refresh_charge(charge_uid)
+        except Exception:
+            log.exception(f'Refreshing charge {charge_uid[0:10]} raised exception')
+        finally:
+            with self._lock:
+                self._in_flight.discard(charge_uid)
+
+    @staticmethod
+    def _refresh_charge_uc(charge_uid):
+        from cypherpunkpay.usecases.refresh_charge_uc import RefreshChargeUC
+        RefreshChargeUC(charge_uid).exec()
@@ -31,15 +31,61 @@ class JobAdder(object):
             next_run_time=utc_now()
         )
 
+        # Heights live in memory (App.coin_networks()); only changed ones get written back to the coins table
+        trigger = interval.IntervalTrigger(seconds=10)
+        scheduler.add_job(
+            lambda: self._app.coin_networks().persist(self._app.db()),
+            id='persist_blockchain_heights',
+            name='persist_blockchain_heights',
+            trigger=trigger
+        )
+
+        # Keeps receiving addresses derived ahead of demand so coin picking does not wait for EC math
+        from cypherpunkpay.usecases.refill_address_pool_uc import RefillAddressPoolUC
+        trigger = interval.IntervalTrigger(seconds=30)
+        scheduler.add_job(
+            lambda: [RefillAddressPoolUC(coin).exec() for coin in config.configured_coins()],
+            id='refill_address_pool',
+            name='refill_address_pool',
+            trigger=trigger,
+            next_run_time=utc_now()
+        )
+
+        # Charges waiting for confirmations get recomputed as soon as a new block arrives
+        from cypherpunkpay.usecases.refresh_confirming_charges_uc import RefreshConfirmingChargesUC
+        self._app.blockchain_height_events().subscribe(
+            lambda coin, old_height, new_height: RefreshConfirmingChargesUC(coin, old_height, new_height, self._app.charge_refresh_engine(), self._app.db()).exec()
+        )
+
+        # A single instance remembers its last sync so the frequent job only loads charges written since then
         from cypherpunkpay.usecases.update_charge_jobs_uc import UpdateChargeJobsUC
+        update_charge_jobs_uc = UpdateChargeJobsUC(self._app.charge_refresh_engine(), self._app.db())
         trigger = interval.IntervalTrigger(seconds=2)
         scheduler.add_job(
-            lambda: UpdateChargeJobsUC(scheduler, self._app.db()).exec(),
+            lambda: update_charge_jobs_uc.exec(),
             id='update_charge_jobs',
             name="update_charge_jobs",
             trigger=trigger
         )
 
+        # Untracks charges past the tracking window and steps intervals down as paid charges age
+        trigger = interval.IntervalTrigger(minutes=5)
+        scheduler.add_job(
+            lambda: update_charge_jobs_uc.sweep(),
+            id='sweep_charge_jobs',
+            name="sweep_charge_jobs",
+            trigger=trigger
+        )
+
+        # Dispatches due charges from the refresh engine queue to its worker pool
+        trigger = interval.IntervalTrigger(seconds=1)
+        scheduler.add_job(
+            lambda: self._app.charge_refresh_engine().tick(),
+            id='refresh_charges',
+            name="refresh_charges",
+            trigger=trigger
+        )
+
         if config.merchant_enabled():
             from cypherpunkpay.usecases.notify_merchant_of_all_completions_uc import NotifyMerchantOfAllCompletionsUC
             trigger = interval.IntervalTrigger(seconds=5)
@@ -60,6 +106,36 @@ class JobAdder(object):
                 trigger=trigger
             )
 
+        # Writes coalesced bookkeeping updates of charges (see SqliteDB.save(deferred=True)) in one transaction
+        trigger = interval.IntervalTrigger(seconds=0.5)
+        scheduler.add_job(
+            lambda: self._app.db().flush_deferred_writes(),
+            id='flush_deferred_writes',
+            name='flush_deferred_writes',
+            trigger=trigger
+        )
+
+        # Keeps the hot charges table small
+        from cypherpunkpay.usecases.archive_charges_uc import ArchiveChargesUC
+        trigger = interval.IntervalTrigger(hours=1)
+        scheduler.add_job(
+            lambda: ArchiveChargesUC(config=config, db=self._app.db()).exec(),
+            id='archive_charges',
+            name='archive_charges',
+            trigger=trigger
+        )
+
+        # Keeps Tor circuits built ahead of demand (see OfficialTorCircuits)
+        if self._app.tor_circuits():
+            trigger = interval.IntervalTrigger(seconds=5)
+            scheduler.add_job(
+                lambda: self._app.tor_circuits().refill_pool(),
+                id='refill_tor_circuits_pool',
+                name='refill_tor_circuits_pool',
+                trigger=trigger,
+                next_run_time=utc_now()
+            )
+
         from cypherpunkpay.usecases.log_stats_uc import LogStatsUC
         trigger = interval.IntervalTrigger(seconds=10)
         scheduler.add_job(
@@ -38,6 +38,10 @@ class AddressCredits:
     def blockchain_height(self):
         return self._blockchain_height
 
+    def at_height(self, blockchain_height: int) -> 'AddressCredits':
+        """ Same credits measured against another blockchain height (confirmations counts change accordingly) """
+        return AddressCredits(self._credits, blockchain_height)
+
     def __eq__(self, other):
         if isinstance(other, AddressCredits):
             if self._blockchain_height == other._blockchain_height:
@@ -0,0 +1,65 @@
+import time
+from collections import OrderedDict
+from threading import RLock
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.models.address_credits import AddressCredits
+
+
+class AddressCreditsCache(object):
+    """ LRU cache of AddressCredits keyed by (source, address, blockchain height)
+
+        A new block changes the key so confirmed state never outlives its height. Any address can gain mempool
+        credits at any moment though, so within a height entries are only trusted for MEMPOOL_TTL_SECONDS.
+        That is shorter than the refresh interval of charges awaiting payment, so it only coalesces lookups of the
+        same address made at about the same time and never delays noticing an incoming payment by a refresh.
+        The source (block explorer, full node wallet) is part of the key so independent sources never share answers.
+    """
+
+    MEMPOOL_TTL_SECONDS = 1.5
+    MAX_ENTRIES = 4096
+
+    def __init__(self, mempool_ttl_seconds: float = MEMPOOL_TTL_SECONDS, max_entries: int = MAX_ENTRIES):
+        self._mempool_ttl_seconds = mempool_ttl_seconds
+        self._max_entries = max_entries
+        self._lock = RLock()
+        self._entries = OrderedDict()  # (source, address, height) -> (stored_at, AddressCredits)
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, source: str, address: str, height: int) -> [AddressCredits, None]:
+        key = (source, address, height)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self._now() - entry[0] <= self._mempool_ttl_seconds:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            if entry is not None:
+                del self._entries[key]
+            self.misses += 1
+            return None
+
+    def put(self, source: str, address: str, height: int, address_credits: AddressCredits) -> None:
+        key = (source, address, height)
+        with self._lock:
+            self._entries[key] = (self._now(), address_credits)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def __str__(self):
+        return f'size={len(self)} hits={self.hits} misses={self.misses} evictions={self.evictions}'
+
+    # MOCK ME
+    def _now(self) -> float:
+        return time.monotonic()
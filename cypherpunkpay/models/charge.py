@@ -86,6 +86,23 @@ class Charge:
 
     TIME_TO_PAY_EDGE_TOLERANCE_MS = 2 * 60 * 1000  # 2 minutes
 
+    # attributes mapped 1:1 to charges table columns; assignments to these are tracked so saves can write only what changed
+    PERSISTED_FIELDS = frozenset({
+        'uid', 'time_to_pay_ms', 'time_to_complete_ms', 'merchant_order_id',
+        'total', 'currency',
+        'cc_total', 'cc_currency', 'cc_address', 'cc_lightning_payment_request', 'cc_price',
+        'usd_total',
+        'pay_status', 'status', 'cc_received_total', 'confirmations',
+        'activated_at', 'paid_at', 'completed_at', 'expired_at', 'cancelled_at', 'merchant_callback_url_called_at',
+        'wallet_fingerprint', 'address_derivation_index',
+        'beneficiary', 'what_for',
+        'status_fixed_manually',
+        'block_explorer_1', 'block_explorer_2', 'subsequent_discrepancies',
+        'created_at', 'updated_at'
+    })
+
+    _persisted: bool = False  # loaded from or already written to the database
+
     def __init__(self,
                  total: Decimal,
                  currency: str,
@@ -94,6 +111,7 @@ class Charge:
                  qr_cache=None,
                  merchant_order_id: [str, None] = None
         ):
+        self._changed_fields = set()
         self.uid = SafeUid.gen()
         self.created_at = utc_now()
         self.updated_at = self.created_at
@@ -106,6 +124,43 @@ class Charge:
 
         self._qr_cache = qr_cache if qr_cache else {}
 
+    def __setattr__(self, name, value):
+        if name in self.PERSISTED_FIELDS:
+            old_value = getattr(self, name, self._changed_fields)  # own set as a sentinel for not-yet-set attributes
+            if old_value is self._changed_fields or old_value != value or type(old_value) != type(value):
+                self._changed_fields.add(name)
+        object.__setattr__(self, name, value)
+
+    @classmethod
+    def hydrate(cls, values: Dict, update_me: ['Charge', None] = None) -> 'Charge':
+        """ Builds (or refreshes) a persisted charge from already converted column values.
+            Bypasses the constructor, which would generate a throwaway uid and timestamps, and the change tracking.
+        """
+        if update_me is None:
+            charge = cls.__new__(cls)
+            object.__setattr__(charge, '_qr_cache', {})
+            object.__setattr__(charge, '_changed_fields', set())
+        else:
+            charge = update_me
+        charge.__dict__.update(values)
+        charge.mark_persisted()
+        return charge
+
+    def is_persisted(self) -> bool:
+        return self._persisted
+
+    def changed_fields(self) -> set:
+        """ Persisted attributes assigned a different value since the charge was last loaded or saved """
+        return self._changed_fields
+
+    def mark_persisted(self) -> None:
+        self._persisted = True
+        self._changed_fields.clear()
+
+    def mark_all_changed(self) -> None:
+        """ Makes the next save write every persisted attribute """
+        self._changed_fields.update(self.PERSISTED_FIELDS)
+
     def payment_uri(self) -> str:
         if self.is_lightning():
             return f'lightning:{self.cc_lightning_payment_request}'
@@ -245,9 +300,6 @@ class Charge:
         assert not self.is_draft()  # drafts don't have cc_currency known
         return self.cc_received_total * self.cc_price
 
-    def refresh_job_id(self):
-        return f'refresh_charge_{self.short_uid()}'
-
     def short_uid(self):
         return self.uid[0:10]
 
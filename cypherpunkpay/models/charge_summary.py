@@ -0,0 +1,43 @@
+from typing import NamedTuple
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.models.charge import Charge
+
+
+class ChargeSummary(NamedTuple):
+    """ Read-only projection of a charge for list views
+
+        Carries only the columns the admin charges list renders and borrows the Charge predicates it uses.
+        Being a tuple it cannot be passed to db.save() by mistake.
+    """
+
+    uid: str
+    merchant_order_id: [str, None]
+    total: Decimal
+    currency: str
+    cc_total: [Decimal, None]
+    cc_currency: [str, None]
+    cc_address: [str, None]
+    cc_lightning_payment_request: [str, None]
+    cc_price: [Decimal, None]
+    pay_status: str
+    status: str
+    cc_received_total: Decimal
+    status_fixed_manually: bool
+    created_at: datetime.datetime
+
+    short_uid = Charge.short_uid
+    is_draft = Charge.is_draft
+    is_awaiting = Charge.is_awaiting
+    is_completed = Charge.is_completed
+    is_expired = Charge.is_expired
+    is_cancelled = Charge.is_cancelled
+    is_unpaid = Charge.is_unpaid
+    is_underpaid = Charge.is_underpaid
+    is_paid = Charge.is_paid
+    is_confirmed = Charge.is_confirmed
+    is_fiat = Charge.is_fiat
+    is_lightning = Charge.is_lightning
+    is_overpaid = Charge.is_overpaid
+    cc_overpaid_total = Charge.cc_overpaid_total
+    received_total_converted_to_fiat = Charge.received_total_converted_to_fiat
@@ -1,10 +1,12 @@
 class CoinNetworkState(object):
 
     _currency: str
+    _cc_network: str
     _current_height: int
 
-    def __init__(self, currency: str, current_height=0):
+    def __init__(self, currency: str, current_height=0, cc_network: str = 'mainnet'):
         self._currency = currency.casefold()
+        self._cc_network = cc_network.casefold()
         self._current_height = current_height
 
     def set_current_height(self, value):
@@ -15,3 +17,6 @@ class CoinNetworkState(object):
 
     def get_currency(self):
         return self._currency
+
+    def get_cc_network(self):
+        return self._cc_network
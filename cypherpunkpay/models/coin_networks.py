@@ -1,21 +1,64 @@
+from threading import RLock
 from typing import List
 
+from cypherpunkpay.globals import *
 from cypherpunkpay.exceptions import UnsupportedCoin
 from cypherpunkpay.models.coin_network_state import CoinNetworkState
 
 
 class CoinNetworks(object):
+    """ In-memory state (current blockchain height) of the configured network of each coin
+
+        Height reads are plain memory reads - no lock, no database. Changed heights are written to the coins table
+        later by `persist` (see JobAdder) so they survive restarts; unchanged ones are never written again.
+    """
 
     _coin_network_states: List[CoinNetworkState]
 
-    def __init__(self):
-        self._coin_network_states = [
-            CoinNetworkState('btc'),
-            CoinNetworkState('xmr')
-        ]
+    def __init__(self, cc_networks: [Dict[str, str], None] = None):
+        if cc_networks is None:
+            cc_networks = {'btc': 'mainnet', 'xmr': 'mainnet'}
+        self._coin_network_states = [CoinNetworkState(currency, cc_network=cc_network) for currency, cc_network in cc_networks.items()]
+        self._lock = RLock()
+        self._changed = set()  # currencies with height not persisted yet
 
     def get_state(self, currency: str) -> CoinNetworkState:
         for coin_network_state in self._coin_network_states:
             if coin_network_state.get_currency() == currency.casefold():
                 return coin_network_state
         raise UnsupportedCoin(currency)
+
+    def get_current_height(self, currency: str) -> int:
+        return self.get_state(currency).get_current_height()
+
+    def update_current_height(self, currency: str, height: int) -> int:
+        """ Returns the previous height """
+        state = self.get_state(currency)
+        with self._lock:
+            old_height = state.get_current_height()
+            if height != old_height:
+                state.set_current_height(height)
+                self._changed.add(state.get_currency())
+            return old_height
+
+    def load(self, db) -> None:
+        with self._lock:
+            for state in self._coin_network_states:
+                state.set_current_height(db.get_blockchain_height(state.get_currency(), state.get_cc_network()))
+            self._changed.clear()
+
+    def persist(self, db) -> int:
+        """ Writes heights changed since the last call. Returns the number of heights written. """
+        with self._lock:
+            changed, self._changed = self._changed, set()
+            heights = [(state.get_currency(), state.get_cc_network(), state.get_current_height()) for state in self._coin_network_states if state.get_currency() in changed]
+        if heights:
+            try:
+                with db.transaction():
+                    for currency, cc_network, height in heights:
+                        db.update_blockchain_height(currency, cc_network, height)
+            except BaseException:
+                with self._lock:
+                    self._changed.update(changed)  # retry next time
+                raise
+        return len(heights)
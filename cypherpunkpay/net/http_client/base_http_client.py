@@ -8,10 +8,16 @@ from cypherpunkpay.globals import *
 from ..tor_client.base_tor_circuits import BaseTorCircuits
 
 
+class ResponseTooLarge(Exception):
+    pass
+
+
 class BaseHttpClient(object):
 
     DEFAULT_TIMEOUT = 32  # seconds
 
+    READ_CHUNK_BYTES = 64 * 1024
+
     # Note that "br" compression is not supported because it requires additional dependency:
     # https://github.com/google/brotli
     # Hence we only list 'gzip, deflate'
@@ -27,7 +33,7 @@ class BaseHttpClient(object):
     }
 
     @abstractmethod
-    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None) -> requests.Response:
+    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None, stream: bool = False) -> requests.Response:
         ...
 
     @abstractmethod
@@ -49,6 +55,29 @@ class BaseHttpClient(object):
         except requests.exceptions.RequestException as e:
             log.debug(f'HTTP request exception={e.__class__.__name__}')
 
+    def get_bounded_text_or_None_on_error(self, url: str, privacy_context: str, max_bytes: int, verify=None) -> [str, None]:
+        """ Like get_text_or_None_on_error but raises ResponseTooLarge as soon as the (decompressed) body exceeds max_bytes """
+        try:
+            response = self.get(url=url, privacy_context=privacy_context, verify=verify, stream=True)
+            try:
+                if not response.ok:
+                    log.debug(f'HTTP response not OK, status_code={response.status_code}')
+                    return None
+                content_length = response.headers.get('Content-Length')
+                if content_length and content_length.isdigit() and int(content_length) > max_bytes:
+                    raise ResponseTooLarge(f'Content-Length={content_length} exceeds {max_bytes} bytes')
+                chunks, size = [], 0
+                for chunk in response.iter_content(chunk_size=self.READ_CHUNK_BYTES):
+                    size += len(chunk)
+                    if size > max_bytes:
+                        raise ResponseTooLarge(f'exceeds {max_bytes} bytes')
+                    chunks.append(chunk)
+                return b''.join(chunks).decode(response.encoding or 'utf-8', errors='replace')
+            finally:
+                response.close()
+        except requests.exceptions.RequestException as e:
+            log.debug(f'HTTP request exception={e.__class__.__name__}')
+
     def post_return_text_or_None_on_error(self, url, privacy_context, headers: dict = None, body: str = None, set_tor_browser_headers: bool = True, verify=None) -> [str, None]:
         try:
             response = self.post(url, privacy_context, headers, body, set_tor_browser_headers, verify=verify)
@@ -17,7 +17,7 @@ class ClearHttpClient(BaseHttpClient):
     def close(self):
         self.__exit__()
 
-    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None):
+    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None, stream: bool = False):
         if set_tor_browser_headers:
             combined_headers = {
                 **BaseHttpClient.TOR_BROWSER_HEADERS,
@@ -26,7 +26,7 @@ class ClearHttpClient(BaseHttpClient):
         else:
             combined_headers = headers or {}
 
-        res = self.session.get(url, headers=combined_headers, timeout=BaseHttpClient.DEFAULT_TIMEOUT, verify=verify)
+        res = self.session.get(url, headers=combined_headers, timeout=BaseHttpClient.DEFAULT_TIMEOUT, verify=verify, stream=stream)
         self.log_error_status_codes(res)
         return res
 
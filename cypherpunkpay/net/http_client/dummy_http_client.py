@@ -5,7 +5,7 @@ from .tor_http_client import BaseHttpClient
 
 class DummyHttpClient(BaseHttpClient):
 
-    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None):
+    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None, stream: bool = False):
         raise requests.exceptions.RequestException
 
     def post(self, url, privacy_context, headers: dict = None, body: dict = None, set_tor_browser_headers: bool = True, verify=None):
@@ -14,7 +14,7 @@ class TorHttpClient(BaseHttpClient):
     def __init__(self, tor_circuits: BaseTorCircuits = None):
         self._tor_circuits = tor_circuits
 
-    def get(self, url: str, privacy_context: str, headers: dict = None, set_tor_browser_headers: bool = True, verify=None):
+    def get(self, url: str, privacy_context: str, headers: dict = None, set_tor_browser_headers: bool = True, verify=None, stream: bool = False):
         if is_local_network(url):
             privacy_context = BaseTorCircuits.SKIP_TOR
         if privacy_context == BaseTorCircuits.SHARED_CIRCUIT_ID:
@@ -28,7 +28,7 @@ class TorHttpClient(BaseHttpClient):
                 }
             else:
                 combined_headers = headers or {}
-            res = session.get(url, headers=combined_headers, timeout=BaseHttpClient.DEFAULT_TIMEOUT, verify=verify)
+            res = session.get(url, headers=combined_headers, timeout=BaseHttpClient.DEFAULT_TIMEOUT, verify=verify, stream=stream)
             self.log_error_status_codes(res)
             return res
         except requests.exceptions.RequestException as e:
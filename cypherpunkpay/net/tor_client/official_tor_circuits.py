@@ -1,29 +1,57 @@
 import threading
 import time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
 
 import requests
 from requests import Session
 
 from cypherpunkpay.globals import *
 from cypherpunkpay.config.config import Config
+from cypherpunkpay.tools.safe_uid import SafeUid
 
 from .base_tor_circuits import BaseTorCircuits
 
 
 class OfficialTorCircuits(BaseTorCircuits):
+    """ One requests.Session per privacy context, each on its own Tor circuit (SOCKS5 isolation by a random username)
+
+        Tor builds the circuit on the first connection of each isolation label, so refill_pool() keeps a pool of
+        sessions that already made one request and a new privacy context claims one of them instead of waiting.
+        Tor stops putting new streams on a circuit MaxCircuitDirtiness (10 minutes by default) after its first use,
+        so older warm sessions are dropped unclaimed. Sessions idle for IDLE_SECONDS or over MAX_SESSIONS are closed LRU.
+        Onion services use their own rendezvous circuits and do not benefit from warming.
+    """
 
     _config: Config
-    TARGET_CIRCUITS_POOL_SIZE = 32
+
+    WARM_MAX_AGE_SECONDS = 9 * 60
+    IDLE_SECONDS = 15 * 60
+    MAX_SESSIONS = 512
+
+    # Any clearnet HTTPS endpoint builds a circuit usable for other port 443 destinations
+    WARM_UP_URL = 'https://check.torproject.org/'
+    WARM_UP_TIMEOUT = 30
+    WARM_UP_THREADS = 4
+
+    BUILD_TIMES_WINDOW = 50
 
     def __init__(self, config):
         self._config = config
-        self._sessions = {}
-        self._global_lock = threading.RLock()
-        self._lock_for = {}  # never trimmed; will slowly leak memory
+        self._pool_size = config.tor_circuits_pool_size()
+        self._lock = threading.RLock()
+        self._sessions = OrderedDict()  # privacy context -> (session, last used at), least recently used first
+        self._warm = deque()            # (session, warmed at), oldest first
+        self._building = 0
+        self.pool_hits = 0
+        self.pool_misses = 0
+        self.build_failures = 0
+        self.evictions = 0
+        self._build_times = deque(maxlen=self.BUILD_TIMES_WINDOW)
 
     # This must be called after constructor and before any other methods
     def connect_and_verify(self):
-        with self._global_lock:
+        with self._lock:
             self._verify_exiting_through_tor()
 
     def _verify_exiting_through_tor(self):
@@ -54,33 +82,121 @@ class OfficialTorCircuits(BaseTorCircuits):
 
     # Use special label 'skip_tor' to avoid setting socks5 proxy
     def get_for(self, label: str) -> requests.Session:
-        with self._global_lock:
-            if label not in self._lock_for:
-                self._lock_for[label] = threading.RLock()
-
-        with self._lock_for[label]:
-            session = self._sessions.get(label, None)
-            if session is None:
-                session = self._create_for(label)
-
+        with self._lock:
+            now = self._now()
+            entry = self._sessions.get(label)
+            if entry is not None:
+                session = entry[0]
+            elif label == BaseTorCircuits.SKIP_TOR:
+                session = Session()
+            else:
+                session = self._claim_warm(now)
+                if session is not None:
+                    self.pool_hits += 1
+                else:
+                    self.pool_misses += 1
+                    session = self._create_session()
+            self._sessions[label] = (session, now)
+            self._sessions.move_to_end(label)
+            self._evict_sessions(now)
         return session
 
-    def _create_for(self, label):
+    def refill_pool(self):
+        """ Pre-builds circuits up to the configured pool size; called periodically by a job """
+        with self._lock:
+            now = self._now()
+            self._evict_sessions(now)
+            self._drop_stale_warm(now)
+            missing = self._pool_size - len(self._warm) - self._building
+            if missing <= 0:
+                return
+            self._building += missing
+        with ThreadPoolExecutor(max_workers=min(missing, self.WARM_UP_THREADS), thread_name_prefix='tor_warm_up') as executor:
+            list(executor.map(lambda _: self._build_warm_session(), range(missing)))
+
+    def _build_warm_session(self):
+        session = self._create_session()
+        started_at = self._now()
+        try:
+            self._warm_up(session)
+        except requests.exceptions.RequestException as e:
+            session.close()
+            with self._lock:
+                self._building -= 1
+                self.build_failures += 1
+            log.debug(f'Pre-building Tor circuit failed: {e}')
+            return
+        with self._lock:
+            self._building -= 1
+            self._build_times.append(self._now() - started_at)
+            self._warm.append((session, self._now()))
+
+    # MOCK ME
+    def _warm_up(self, session: requests.Session):
+        session.head(self.WARM_UP_URL, timeout=self.WARM_UP_TIMEOUT)
+
+    def _create_session(self) -> requests.Session:
+        # The label only isolates circuits; a random one keeps privacy contexts (addresses, hosts) away from the Tor daemon
+        label = SafeUid.gen()
+        socks5_proxy = f'socks5h://{label}:{label}@{self._config.tor_socks5_host()}:{self._config.tor_socks5_port()}'
         session = Session()
-        if label != BaseTorCircuits.SKIP_TOR:
-            socks5_proxy = f'socks5h://{label}:{label}@{self._config.tor_socks5_host()}:{self._config.tor_socks5_port()}'
-            session.proxies = {'http': socks5_proxy, 'https': socks5_proxy}
-        self._sessions[label] = session
+        session.proxies = {'http': socks5_proxy, 'https': socks5_proxy}
         return session
 
+    def _claim_warm(self, now: float) -> [requests.Session, None]:
+        self._drop_stale_warm(now)
+        if self._warm:
+            return self._warm.popleft()[0]
+        return None
+
+    def _drop_stale_warm(self, now: float):
+        while self._warm and now - self._warm[0][1] > self.WARM_MAX_AGE_SECONDS:
+            self._warm.popleft()[0].close()
+
+    def _evict_sessions(self, now: float):
+        while self._sessions:
+            label, (session, last_used_at) = next(iter(self._sessions.items()))
+            if len(self._sessions) <= self.MAX_SESSIONS and now - last_used_at <= self.IDLE_SECONDS:
+                return
+            del self._sessions[label]
+            session.close()
+            self.evictions += 1
+
     def close(self):
-        with self._global_lock:
-            for session in self._sessions.values():
+        with self._lock:
+            for session, _ in self._sessions.values():
                 session.__exit__()
-            self._sessions = {}
+            for session, _ in self._warm:
+                session.close()
+            self._sessions = OrderedDict()
+            self._warm = deque()
 
     def mark_as_broken(self, label):
-        with self._lock_for[label]:
-            if label not in self._sessions:
-                return
-            self._sessions.pop(label).close()
+        with self._lock:
+            entry = self._sessions.pop(label, None)
+        if entry is not None:
+            entry[0].close()
+
+    def pool_hit_rate(self) -> [float, None]:
+        claims = self.pool_hits + self.pool_misses
+        return self.pool_hits / claims if claims else None
+
+    def build_time_percentile(self, percent: int) -> [float, None]:
+        with self._lock:
+            build_times = sorted(self._build_times)
+        if not build_times:
+            return None
+        return build_times[min(len(build_times) * percent // 100, len(build_times) - 1)]
+
+    # MOCK ME
+    def _now(self) -> float:
+        return time.monotonic()
+
+    def __str__(self):
+        def seconds(value):
+            return f'{value:.1f}s' if value is not None else '-'
+        hit_rate = self.pool_hit_rate()
+        hit_rate_s = f'{hit_rate:.0%}' if hit_rate is not None else '-'
+        return f'sessions={len(self._sessions)} warm={len(self._warm)} hits={self.pool_hits} misses={self.pool_misses} hit_rate={hit_rate_s} ' \
+               f'build_p50={seconds(self.build_time_percentile(50))} build_p95={seconds(self.build_time_percentile(95))} ' \
+               f'build_failures={self.build_failures} evictions={self.evictions}'
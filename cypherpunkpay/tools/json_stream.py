@@ -0,0 +1,30 @@
+import json
+import re
+from typing import Iterator
+
+_DECODER = json.JSONDecoder()
+_WHITESPACE = re.compile(r'\s*')
+_SEPARATOR = re.compile(r'\s*(,|\])\s*')
+
+
+def iter_json_array(text: str) -> Iterator:
+    """Yields the items of a top level JSON array one at a time.
+
+    Only the current item is materialized, so the caller can keep what it needs and let the rest go.
+    Raises json.JSONDecodeError on malformed input (possibly after yielding the items before the error).
+    """
+    pos = _WHITESPACE.match(text).end()
+    if text[pos:pos + 1] != '[':
+        raise json.JSONDecodeError('Expecting array', text, pos)
+    pos = _WHITESPACE.match(text, pos + 1).end()
+    if text[pos:pos + 1] == ']':
+        return
+    while True:
+        item, pos = _DECODER.raw_decode(text, pos)
+        yield item
+        separator = _SEPARATOR.match(text, pos)
+        if separator is None:
+            raise json.JSONDecodeError("Expecting ',' or ']'", text, pos)
+        pos = separator.end()
+        if separator.group(1) == ']':
+            return
@@ -0,0 +1,30 @@
+from cypherpunkpay.globals import *
+from cypherpunkpay.app import App
+from cypherpunkpay.usecases.use_case import UseCase
+
+
+class ArchiveChargesUC(UseCase):
+    """ Moves final charges older than the configured age from the hot charges table to charges_archive
+
+        Done in small batches so the writer lock is never held for long.
+    """
+
+    BATCH_SIZE = 500
+
+    def __init__(self, batch_size: int = BATCH_SIZE, config=None, db=None):
+        self.batch_size = batch_size
+        self.config = config if config else App().config()
+        self.db = db if db else App().db()
+
+    def exec(self) -> int:
+        """ Returns the number of archived charges """
+        created_before = utc_ago(days=self.config.charges_archive_after_days())
+        archived = 0
+        while True:
+            moved = self.db.archive_charges(created_before, self.batch_size)
+            archived += moved
+            if moved < self.batch_size:
+                break
+        if archived:
+            log.info(f'Archived {archived} charges created before {created_before.date()}')
+        return archived
@@ -1,34 +1,18 @@
-import hashlib
 from abc import ABC
 
-from monero.backends.offline import OfflineWallet
-from monero.wallet import Wallet
-
-from cypherpunkpay.bitcoin.bip32 import Bip32
-from cypherpunkpay.exceptions import UnsupportedCoin
+from cypherpunkpay.usecases.refill_address_pool_uc import RefillAddressPoolUC
 from cypherpunkpay.usecases.use_case import UseCase
 
 
 class BaseChargeUC(UseCase, ABC):
 
     def next_unused_address(self, cc_currency):
-        if cc_currency == 'btc':
-            xpub = self.config.btc_account_xpub()
-            wallet_fingerprint = Bip32.wallet_fingerprint(xpub)
-            address_index = self.db.count_charges_where_wallet_fingerprint_is(wallet_fingerprint)
-            address_offset = self.config.btc_account_offset()
-            address = Bip32.p2wpkh_address_at(self.config.btc_network(), xpub, [0, address_index + address_offset])
-        elif cc_currency == 'xmr':
-            main_address = self.config.xmr_main_address()
-            secret_view_key = self.config.xmr_secret_view_key()
-            wallet_fingerprint = self._hash_as_hex(secret_view_key.encode())
-            address_index = self.db.count_charges_where_wallet_fingerprint_is(wallet_fingerprint)
-            address_offset = self.config.xmr_account_offset()
-            address = str(Wallet(OfflineWallet(main_address, view_key=secret_view_key)).get_address(0, address_index + address_offset))
-        else:
-            raise UnsupportedCoin(cc_currency)
-
+        pool = RefillAddressPoolUC(cc_currency, target_size=1, config=self.config, db=self.db)
+        wallet_fingerprint = pool.wallet_fingerprint()
+        address_offset = pool.address_offset()
+        claimed = self.db.claim_pooled_address(wallet_fingerprint, address_offset)
+        if claimed is None:
+            # The pool is normally kept ahead of demand by the refill_address_pool job
+            claimed = pool.claim()
+        address_index, address = claimed
         return wallet_fingerprint, address_index, address
-
-    def _hash_as_hex(self, source_bytes: bytes):
-        return hashlib.sha256(source_bytes).hexdigest()
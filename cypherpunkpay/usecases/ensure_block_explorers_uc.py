@@ -1,10 +1,10 @@
 import random
-import importlib
 
 from cypherpunkpay import App, Config
 from cypherpunkpay.globals import *
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry
+from cypherpunkpay.explorers.explorer_registry import ExplorerRegistry
 from cypherpunkpay.models.charge import Charge
-from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
 from cypherpunkpay.usecases.use_case import UseCase
 
 
@@ -14,10 +14,11 @@ class EnsureBlockExplorersUC(UseCase):
 
     DISCREPANCIES_THRESHOLD = 10
 
-    def __init__(self, charge: Charge, config: Config):
+    def __init__(self, charge: Charge, config: Config, explorer_metrics: ExplorerMetricsRegistry = None):
         assert charge.cc_currency is not None
         self.charge = charge
         self._config = config if config else App().config()
+        self._explorer_metrics = explorer_metrics if explorer_metrics else ExplorerMetricsRegistry.shared()
 
     # Returns True if chaged, False otherwise
     def exec(self) -> bool:
@@ -42,6 +43,12 @@ class EnsureBlockExplorersUC(UseCase):
             self.assign_random_block_explorers()
             return True
 
+        # Quarantined explorers are failing for everybody right now - no point in waiting for the discrepancies to pile up
+        if self.is_quarantined(self.charge.block_explorer_1) or \
+                self.is_quarantined(self.charge.block_explorer_2):
+            if self.replace_quarantined_block_explorers():
+                return True
+
         # No changes made to block explorers pair
         return False
 
@@ -52,22 +59,33 @@ class EnsureBlockExplorersUC(UseCase):
         self.charge.block_explorer_2 = self.random_module_klass_name(forbidden=self.charge.block_explorer_1)
         self.charge.subsequent_discrepancies = 0
 
+    # Returns True if changed; with only two explorers available there may be nothing to switch to
+    def replace_quarantined_block_explorers(self) -> bool:
+        # The healthy one stays so the address is revealed to as few explorers as possible
+        previous = (self.charge.block_explorer_1, self.charge.block_explorer_2)
+        if self.is_quarantined(self.charge.block_explorer_1):
+            self.charge.block_explorer_1 = self.random_module_klass_name(forbidden=self.charge.block_explorer_2)
+        if self.is_quarantined(self.charge.block_explorer_2):
+            self.charge.block_explorer_2 = self.random_module_klass_name(forbidden=self.charge.block_explorer_1)
+        if (self.charge.block_explorer_1, self.charge.block_explorer_2) == previous:
+            return False
+        self.charge.subsequent_discrepancies = 0
+        return True
+
     def random_module_klass_name(self, forbidden=None) -> str:
-        available_explorers = self._config.supported_explorers(self.charge.cc_currency)
-        klass = random.choice(available_explorers)
-        candidate = klass.__module__ + ' ' + klass.__name__
-        if candidate == forbidden:
-            return self.random_module_klass_name(forbidden=forbidden)
-        return candidate
+        """ Random but weighted towards healthy explorers; quarantined ones are only picked if nothing else is left """
+        candidates = [klass for klass in self._config.supported_explorers(self.charge.cc_currency) if ExplorerRegistry.module_klass_name(klass) != forbidden]
+        weights = [self._explorer_metrics.get(klass.__name__).weight() for klass in candidates]
+        if not any(weights):
+            weights = None
+        klass = random.choices(candidates, weights=weights)[0]
+        return ExplorerRegistry.module_klass_name(klass)
+
+    def is_quarantined(self, module_klass) -> bool:
+        return self._explorer_metrics.get(module_klass.split()[-1]).is_quarantined()
 
     def is_valid(self, module_klass) -> bool:
-        module_name, klass_name = module_klass.split()
-        try:
-            # This is just a test instantiation to ensure module/klass are valid
-            module = importlib.import_module(module_name)
-            klass = getattr(module, klass_name)
-            klass(http_client=DummyHttpClient())
+        if ExplorerRegistry.shared().resolve(module_klass) in self._config.supported_explorers(self.charge.cc_currency):
             return True
-        except Exception:
-            log.info(f'Picking new block explorers for charge={self.charge.short_uid()} as cannot instantiate {module_name}/{klass_name}. This may happen after CypherpunkPay upgrade.')
-            return False
+        log.info(f'Picking new block explorers for charge={self.charge.short_uid()} as {module_klass} is not supported. This may happen after CypherpunkPay upgrade.')
+        return False
@@ -1,14 +1,46 @@
-import importlib
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait, FIRST_COMPLETED
+from threading import BoundedSemaphore, Event, RLock
 
 from cypherpunkpay.app import App
 from cypherpunkpay.globals import *
-from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer, AddressHistoryTooLarge
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry
+from cypherpunkpay.explorers.explorer_registry import ExplorerRegistry
+from cypherpunkpay.explorers.supported_explorers import SupportedExplorers
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
 from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.models.address_credits_cache import AddressCreditsCache
+from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient
 from cypherpunkpay.usecases.use_case import UseCase
 
 
 class FetchAddressCreditsFromBitcoinExplorersUC(UseCase):
 
+    # Calls abandoned at the deadline keep running until their HTTP timeout. Each explorer gets room for one call per
+    # refresh worker plus a few abandoned ones; beyond that the explorer counts as busy and is not called at all.
+    MAX_CALLS_PER_EXPLORER = ChargeRefreshEngine.MAX_WORKERS + 4
+
+    # Both explorers are queried at the same time. The pool is shared by all charges and has a thread for every call
+    # the per-explorer limits admit, so admitted calls never wait in the executor queue behind abandoned ones.
+    _executor = ThreadPoolExecutor(
+        max_workers=MAX_CALLS_PER_EXPLORER * max(len(SupportedExplorers.BTC_MAINNET), len(SupportedExplorers.BTC_TESTNET)),
+        thread_name_prefix='explorer'
+    )
+    _explorer_slots: Dict[str, BoundedSemaphore] = {}
+    _explorer_slots_lock = RLock()
+
+    # A single explorer call can take up to DEFAULT_TIMEOUT; this bounds the whole fan-out (counted from when the calls start running).
+    # The first sync of a busy address takes many requests (see EsploraExplorer) and may run past it. Such calls are left
+    # to finish in the background: their answer is cached but never counted in explorer health.
+    DEADLINE_SECONDS = BaseHttpClient.DEFAULT_TIMEOUT + 8
+
+    # Answers of each explorer are cached separately so the two are still compared
+    _credits_cache = AddressCreditsCache()
+
+    # Feeds explorer health used by EnsureBlockExplorersUC to pick and replace explorers
+    _explorer_metrics = ExplorerMetricsRegistry.shared()
+
     def __init__(self, address: str, block_explorer_1: str, block_explorer_2: str, current_height=None, http_client=None, config=None, charge_short_uid=None):
         self.address = address
         self.block_explorer_1_s = block_explorer_1
@@ -23,27 +55,121 @@ class FetchAddressCreditsFromBitcoinExplorersUC(UseCase):
     def exec(self) -> [AddressCredits, None]:
         self._instantiate_block_explorers()
 
-        address_credits_1 = self.block_explorer_1.get_address_credits(address=self.address, current_height=self.current_height)
-        address_credits_2 = self.block_explorer_2.get_address_credits(address=self.address, current_height=self.current_height)
+        started_at = {}  # source -> monotonic time the call started running
+        past_deadline = Event()
+        future_1 = self._submit(self.block_explorer_1, self._be1_name(), started_at, past_deadline)
+        future_2 = self._submit(self.block_explorer_2, self._be2_name(), started_at, past_deadline)
+
+        sources = {future_1: self._be1_name(), future_2: self._be2_name()}
+        pending = {future_1, future_2}
+        while pending:
+            # Time spent in the executor queue does not count against the deadline
+            now = time.monotonic()
+            deadline = max(started_at.get(sources[future], now) for future in pending) + self.DEADLINE_SECONDS
+            done, pending = wait(pending, timeout=max(deadline - now, 0), return_when=FIRST_COMPLETED)
+            if not done and any(sources[future] not in started_at for future in pending):
+                continue
+            if not done:
+                past_deadline.set()
+                self._abandon(pending)
+                self._log_deadline_exceeded()
+                return None
+            if any(future.result() is None for future in done):
+                # Both explorers must agree so one failure decides the result - no point in waiting for the other one
+                self._abandon(pending)
+                self._log_discrepancy(self._result_or_None(future_1), self._result_or_None(future_2))
+                return None
+
+        address_credits_1 = future_1.result()
+        address_credits_2 = future_2.result()
 
         # Both explorers must give exactly the same answer
-        if address_credits_1 == address_credits_2:
+        agreed = address_credits_1 == address_credits_2
+        self._explorer_metrics.get(self._be1_name()).record_agreement(agreed)
+        self._explorer_metrics.get(self._be2_name()).record_agreement(agreed)
+        if agreed:
             return address_credits_1
 
         # Discrepancy between block explorers. This is natural temporarily.
         self._log_discrepancy(address_credits_1, address_credits_2)
         return None
 
+    def _submit(self, block_explorer: BlockExplorer, source: str, started_at: dict, past_deadline: Event) -> Future:
+        slots = self._slots_of(source)
+        if not slots.acquire(blocking=False):
+            log.info(f'{source} has {self.MAX_CALLS_PER_EXPLORER} calls in flight - not calling it for {self.address}')
+            future = Future()
+            future.set_result(None)
+            return future
+
+        def call():
+            started_at[source] = time.monotonic()
+            try:
+                return self._get_address_credits(block_explorer, source, past_deadline)
+            finally:
+                slots.release()
+
+        try:
+            return self._executor.submit(call)
+        except Exception:
+            slots.release()
+            raise
+
+    def _slots_of(self, source: str) -> BoundedSemaphore:
+        with self._explorer_slots_lock:
+            slots = self._explorer_slots.get(source)
+            if slots is None:
+                slots = self._explorer_slots[source] = BoundedSemaphore(self.MAX_CALLS_PER_EXPLORER)
+            return slots
+
+    def _get_address_credits(self, block_explorer: BlockExplorer, source: str, past_deadline: Event) -> [AddressCredits, None]:
+        address_credits = self._credits_cache.get(source, self.address, self.current_height)
+        if address_credits is not None:
+            return address_credits
+        metrics = self._explorer_metrics.get(source)
+        started_at = time.monotonic()
+        try:
+            address_credits = block_explorer.get_address_credits(address=self.address, current_height=self.current_height)
+        except AddressHistoryTooLarge as e:
+            # Tied to this one address, so explorer health is left alone
+            log.warning(f'Cannot check address {self.address} with {source}: {e}. Consider raising btc_explorers_max_response_kib')
+            return None
+        except Exception:
+            log.exception(f'{source} raised exception')
+            address_credits = None
+        if past_deadline.is_set():
+            log.debug(f'{source} answered for {self.address} after the deadline in {time.monotonic() - started_at:.1f}s')
+            if address_credits is not None:
+                self._credits_cache.put(source, self.address, self.current_height, address_credits)
+            return address_credits
+        if address_credits is not None:
+            metrics.record_success(time.monotonic() - started_at)
+            self._credits_cache.put(source, self.address, self.current_height, address_credits)
+        else:
+            metrics.record_failure(time.monotonic() - started_at)
+        return address_credits
+
+    @classmethod
+    def credits_cache(cls) -> AddressCreditsCache:
+        return cls._credits_cache
+
+    @staticmethod
+    def _abandon(futures):
+        # Calls already in flight cannot be interrupted; they finish in the background and their results are ignored
+        for future in futures:
+            future.cancel()
+
+    @staticmethod
+    def _result_or_None(future: Future) -> [AddressCredits, None]:
+        if future.done() and not future.cancelled():
+            return future.result()
+
     def _instantiate_block_explorers(self):
         self.block_explorer_1 = self._instantiate_explorer(self.block_explorer_1_s)
         self.block_explorer_2 = self._instantiate_explorer(self.block_explorer_2_s)
 
     def _instantiate_explorer(self, module_klass: str) -> BlockExplorer:
-        module_name, klass_name = module_klass.split()
-        module = importlib.import_module(module_name)
-        klass: BlockExplorer = getattr(module, klass_name)
-        # noinspection PyCallingNonCallable
-        return klass(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor())
+        return ExplorerRegistry.shared().instance(module_klass, self.http_client, self.config.btc_network(), self.config.use_tor(), self.config.btc_explorers_max_response_bytes())
 
     def _log_discrepancy(self, address_credits_1, address_credits_2):
         address_credits_1_s = f'{address_credits_1.__dict__}' if address_credits_1 else 'None'
@@ -54,6 +180,13 @@ class FetchAddressCreditsFromBitcoinExplorersUC(UseCase):
         msg += f'iscrepancy between block explorers (likely temporary)   {self._be1_name()} => {address_credits_1_s}   {self._be2_name()} => {address_credits_2_s}'
         log.info(msg)
 
+    def _log_deadline_exceeded(self):
+        msg = 'B'
+        if self.charge_short_uid:
+            msg = f'Charge {self.charge_short_uid} b'
+        msg += f'lock explorers did not answer within {self.DEADLINE_SECONDS}s   {self._be1_name()}, {self._be2_name()}'
+        log.info(msg)
+
     def _be1_name(self):
         return self.block_explorer_1_s.split()[-1]
 
@@ -1,13 +1,27 @@
+import time
+from threading import RLock
+
 from cypherpunkpay.globals import *
 from cypherpunkpay.app import App
 from cypherpunkpay.full_node_clients.bitcoin_core_client import BitcoinCoreClient
 from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcError
 from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.models.address_credits_cache import AddressCreditsCache
 from cypherpunkpay.usecases.use_case import UseCase
 
 
 class FetchAddressCreditsFromBitcoinFullNodeUC(UseCase):
 
+    # Credits are fetched for the whole wallet at once and the snapshot is shared by all charges
+    # refreshed within SNAPSHOT_MAX_AGE_SECONDS (as long as the blockchain height did not change).
+    # The lock makes concurrently refreshed charges wait for a single RPC call instead of issuing their own.
+    SNAPSHOT_MAX_AGE_SECONDS = 1.0
+
+    _lock = RLock()
+    _snapshots: Dict = {}  # (rpc_url, wallet_fingerprint) -> (fetched_at, current_height, (node_height, Dict[address, AddressCredits]))
+
+    _credits_cache = AddressCreditsCache()
+
     def __init__(self, address: str, wallet_fingerprint: str, current_height=None, http_client=None, config=None):
         self.address = address
         self.wallet_fingerprint = wallet_fingerprint
@@ -16,12 +30,41 @@ class FetchAddressCreditsFromBitcoinFullNodeUC(UseCase):
         self.config = config if config else App().config()
 
     def exec(self) -> [AddressCredits, None]:
+        source = f'{self.config.btc_node_rpc_url()} {self.wallet_fingerprint}'
+        address_credits = self._credits_cache.get(source, self.address, self.current_height)
+        if address_credits is not None:
+            return address_credits
         try:
-            return BitcoinCoreClient(
-                self.config.btc_node_rpc_url(),
-                self.config.btc_node_rpc_user(),
-                self.config.btc_node_rpc_password(),
-                self.http_client
-            ).get_address_credits(self.wallet_fingerprint, self.address, self.current_height)
+            node_height, all_credits = self._all_address_credits()
         except JsonRpcError:
             return None  # The exception has been logged upstream. The action will be retried. Safe to swallow.
+        address_credits = all_credits.get(self.address, AddressCredits([], node_height))
+        self._credits_cache.put(source, self.address, self.current_height, address_credits)
+        return address_credits
+
+    @classmethod
+    def credits_cache(cls) -> AddressCreditsCache:
+        return cls._credits_cache
+
+    def _all_address_credits(self) -> (int, Dict[str, AddressCredits]):
+        key = (self.config.btc_node_rpc_url(), self.wallet_fingerprint)
+        with self._lock:
+            snapshot = self._snapshots.get(key)
+            if snapshot:
+                fetched_at, height, node_height_and_credits = snapshot
+                if height == self.current_height and time.monotonic() - fetched_at < self.SNAPSHOT_MAX_AGE_SECONDS:
+                    return node_height_and_credits
+            node_height_and_credits = self._fetch_all_address_credits()
+            self._snapshots[key] = (time.monotonic(), self.current_height, node_height_and_credits)
+            return node_height_and_credits
+
+    # MOCK ME
+    # The node's tip comes in the same batch so credits are never newer than the height they are measured against.
+    # Only what changed since the previous call is fetched (see WalletHistory).
+    def _fetch_all_address_credits(self) -> (int, Dict[str, AddressCredits]):
+        return BitcoinCoreClient(
+            self.config.btc_node_rpc_url(),
+            self.config.btc_node_rpc_user(),
+            self.config.btc_node_rpc_password(),
+            self.http_client
+        ).get_height_and_all_address_credits(self.wallet_fingerprint)
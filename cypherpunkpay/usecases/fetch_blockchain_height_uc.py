@@ -1,3 +1,5 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from statistics import median_low
 
 from cypherpunkpay.globals import *
@@ -8,15 +10,32 @@ from cypherpunkpay.explorers.bitcoin.blockstream_explorer import BlockstreamExpl
 from cypherpunkpay.explorers.bitcoin.emzy_explorer import EmzyExplorer
 from cypherpunkpay.explorers.bitcoin.mempool_explorer import MempoolExplorer
 from cypherpunkpay.explorers.bitcoin.trezor_explorer import TrezorExplorer
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry, ExplorerMetrics
 from cypherpunkpay.exceptions import UnsupportedCoin
 from cypherpunkpay.full_node_clients.bitcoin_core_client import BitcoinCoreClient
 from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcError
+from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient
 from cypherpunkpay.usecases.use_case import UseCase
 from cypherpunkpay.full_node_clients.monero_node_client import MoneroNodeClient
 
 
 class FetchBlockchainHeightUC(UseCase):
 
+    # Explorers are queried concurrently, best scoring first. Only quorum + HEDGE_SPARE of them are asked upfront;
+    # the next one is asked whenever one fails or no answer came for HEDGE_AFTER_SECONDS.
+    # The median is taken as soon as the quorum answered and stragglers are abandoned.
+    HEDGE_SPARE = 1
+    HEDGE_AFTER_SECONDS = 5.0
+    DEADLINE_SECONDS = BaseHttpClient.DEFAULT_TIMEOUT + 8
+
+    _executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix='height')
+    _explorer_metrics = ExplorerMetricsRegistry.shared()
+
+    @classmethod
+    def explorer_metrics(cls) -> List[ExplorerMetrics]:
+        return cls._explorer_metrics.all()
+
     def __init__(self, coin, config=None, http_client=None):
         self.coin = coin
         self.config = config if config else App().config()
@@ -37,27 +56,66 @@ class FetchBlockchainHeightUC(UseCase):
             raise UnsupportedCoin(self.coin)
 
     def btc_height_from_explorers(self) -> [int, None]:
-        if self.config.btc_mainnet():
-            btc_heights = list(filter(None, [
-                BlockstreamExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                TrezorExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                BitapsExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                MempoolExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                EmzyExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                BitarooExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height()
-            ]))
-        else:
-            # Some explorers do not support testnet
-            btc_heights = list(filter(None, [
-                BlockstreamExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                TrezorExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                BitapsExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-                MempoolExplorer(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()).get_height(),
-            ]))
+        explorers = self._btc_explorers()
+        quorum = min(self.config.btc_explorers_height_quorum(), len(explorers))
+        candidates = sorted(explorers, key=lambda explorer: (self._metrics_of(explorer).is_quarantined(), self._metrics_of(explorer).score()))
+
+        btc_heights = []
+        pending = set()
+        deadline = time.monotonic() + self.DEADLINE_SECONDS
+        for _ in range(quorum + self.HEDGE_SPARE):
+            self._submit_next(candidates, pending)
+        while pending and len(btc_heights) < quorum:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            done, pending = wait(pending, timeout=min(remaining, self.HEDGE_AFTER_SECONDS), return_when=FIRST_COMPLETED)
+            if not done:
+                self._submit_next(candidates, pending)  # slow answers; hedge with the next explorer
+            for future in done:
+                height = future.result()
+                if height:
+                    btc_heights.append(height)
+                else:
+                    self._submit_next(candidates, pending)
+
+        for future in pending:
+            future.cancel()  # requests already on the wire finish in the background, still feeding the metrics
+
         if len(btc_heights) > 0:
             return median_low(btc_heights)
         return None
 
+    # MOCK ME
+    def _btc_explorers(self) -> List[BlockExplorer]:
+        if self.config.btc_mainnet():
+            explorer_classes = [BlockstreamExplorer, TrezorExplorer, BitapsExplorer, MempoolExplorer, EmzyExplorer, BitarooExplorer]
+        else:
+            # Some explorers do not support testnet
+            explorer_classes = [BlockstreamExplorer, TrezorExplorer, BitapsExplorer, MempoolExplorer]
+        return [klass(http_client=self.http_client, btc_network=self.config.btc_network(), use_tor=self.config.use_tor()) for klass in explorer_classes]
+
+    def _submit_next(self, candidates: List[BlockExplorer], pending: set):
+        if candidates:
+            pending.add(self._executor.submit(self._timed_get_height, candidates.pop(0)))
+
+    def _timed_get_height(self, explorer: BlockExplorer) -> [int, None]:
+        metrics = self._metrics_of(explorer)
+        started_at = time.monotonic()
+        try:
+            height = explorer.get_height()
+        except Exception:
+            log.exception(f'{explorer.__class__.__name__} raised exception')
+            height = None
+        if height:
+            metrics.record_success(time.monotonic() - started_at)
+        else:
+            metrics.record_failure(time.monotonic() - started_at)
+        return height
+
+    def _metrics_of(self, explorer: BlockExplorer) -> ExplorerMetrics:
+        return self._explorer_metrics.get(explorer.__class__.__name__)
+
     def btc_height_from_node(self) -> [int, None]:
         try:
             return BitcoinCoreClient(
@@ -0,0 +1,97 @@
+from typing import NamedTuple, Tuple
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.app import App
+from cypherpunkpay.models.charge import Charge
+from cypherpunkpay.models.charge_summary import ChargeSummary
+from cypherpunkpay.usecases.invalid_params import InvalidParams
+from cypherpunkpay.usecases.use_case import UseCase
+
+
+class ChargesPage(NamedTuple):
+    charges: List[ChargeSummary]
+    next_cursor: [str, None]   # pass as `before` to get the next (older) page; None on the last page
+    total: [int, None]         # matching charges across all pages; None when filtered by date (not maintained)
+
+
+class ListChargesUC(UseCase):
+    """ One page of charges for the admin panel, newest first
+
+        Keyset pagination on (created_at, uid) so the cost of a page does not depend on how deep into history it is.
+        All inputs are raw request strings (or None) and get validated here.
+    """
+
+    PAGE_SIZE = 50
+    MAX_PAGE_SIZE = 200
+
+    def __init__(self, status=None, created_from=None, created_to=None, before=None, page_size=None, db=None):
+        self.status = status or None
+        self.created_from = created_from or None
+        self.created_to = created_to or None
+        self.before = before or None
+        self.page_size = page_size or None
+        self.db = db if db else App().db()
+
+    def exec(self) -> ChargesPage:
+        status, created_from, created_to, before, page_size = self.validate_inputs()
+        # Fetch one extra row to learn whether there is a next page
+        charges = self.db.get_charge_summaries_page(page_size + 1, before=before, status=status, created_from=created_from, created_to=created_to)
+        next_cursor = None
+        if len(charges) > page_size:
+            charges = charges[:page_size]
+            next_cursor = self.encode_cursor(charges[-1])
+        total = None
+        if created_from is None and created_to is None:
+            total = self.db.get_charges_count(status)
+        return ChargesPage(charges, next_cursor, total)
+
+    def validate_inputs(self):
+        errors = {}
+
+        status = self.status
+        if status is not None and status not in Charge.NON_FINAL | Charge.FINAL:
+            errors['status'] = 'Unknown status'
+
+        created_from = self.parse_date(self.created_from, 'created_from', errors)
+        created_to = self.parse_date(self.created_to, 'created_to', errors)
+        if created_to is not None:
+            created_to += timedelta(days=1)  # inclusive
+
+        before = None
+        if self.before is not None:
+            try:
+                before = self.decode_cursor(self.before)
+            except ValueError:
+                errors['before'] = 'Invalid cursor'
+
+        page_size = self.PAGE_SIZE
+        if self.page_size is not None:
+            try:
+                page_size = min(max(int(self.page_size), 1), self.MAX_PAGE_SIZE)
+            except ValueError:
+                errors['page_size'] = 'Not a number'
+
+        if errors:
+            raise InvalidParams(errors)
+        return status, created_from, created_to, before, page_size
+
+    @staticmethod
+    def parse_date(value: [str, None], name: str, errors: Dict) -> [datetime.datetime, None]:
+        if value is None:
+            return None
+        try:
+            return datetime.datetime.strptime(value, '%Y-%m-%d').replace(tzinfo=datetime.timezone.utc)
+        except ValueError:
+            errors[name] = 'Expected YYYY-MM-DD'
+
+    @staticmethod
+    def encode_cursor(charge: ChargeSummary) -> str:
+        return f'{charge.created_at.isoformat()}_{charge.uid}'
+
+    @staticmethod
+    def decode_cursor(cursor: str) -> Tuple[datetime.datetime, str]:
+        created_at, uid = cursor.rsplit('_', 1)
+        created_at = datetime.datetime.fromisoformat(created_at)
+        if created_at.tzinfo is None or not uid:
+            raise ValueError(cursor)
+        return created_at.astimezone(datetime.timezone.utc), uid
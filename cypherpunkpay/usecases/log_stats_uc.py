@@ -1,6 +1,9 @@
 from cypherpunkpay import Config, App
 from cypherpunkpay.globals import *
 from cypherpunkpay.usecases.use_case import UseCase
+from cypherpunkpay.usecases.fetch_blockchain_height_uc import FetchBlockchainHeightUC
+from cypherpunkpay.usecases.fetch_address_credits_from_bitcoin_explorers_uc import FetchAddressCreditsFromBitcoinExplorersUC
+from cypherpunkpay.usecases.fetch_address_credits_from_bitcoin_full_node_uc import FetchAddressCreditsFromBitcoinFullNodeUC
 from cypherpunkpay.usecases.report_charges_uc import ReportChargesUC
 from cypherpunkpay.usecases.report_jobs_uc import ReportJobsUC
 
@@ -26,6 +29,25 @@ class LogStatsUC(UseCase):
         msg = re.sub(r'\s{1,}', ' ', msg)
         self._log_job_stats('   ' + msg)
 
+        engine = self._app.charge_refresh_engine()
+        msg = f'Refresh stats: \
+                  tracked={engine.tracked_count()} \
+                  queue_depth={engine.queue_depth()} \
+                  lag={engine.lag():.1f}s'
+        msg = re.sub(r'\s{1,}', ' ', msg)
+        self._log_job_stats(msg)
+
+        explorer_metrics = FetchBlockchainHeightUC.explorer_metrics()
+        if explorer_metrics:
+            self._log_job_stats('Explorer stats: ' + ' '.join(str(metrics) for metrics in explorer_metrics))
+
+        if self._app.tor_circuits():
+            self._log_job_stats(f'Tor circuits stats: {self._app.tor_circuits()}')
+
+        if self._app.config().btc_enabled():
+            credits_cache = FetchAddressCreditsFromBitcoinFullNodeUC.credits_cache() if self._app.config().btc_node_enabled() else FetchAddressCreditsFromBitcoinExplorersUC.credits_cache()
+            self._log_job_stats(f'Credits cache stats: {credits_cache}')
+
         msg = 'Chain stats: '
         for coin in self._app.config().configured_coins():
             msg += f"{coin}_height={self._app.current_blockchain_height(coin)} ({self._app.config().cc_network(coin)})  "
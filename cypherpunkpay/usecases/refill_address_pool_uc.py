@@ -0,0 +1,82 @@
+import hashlib
+from threading import RLock
+from typing import Tuple
+
+from monero.backends.offline import OfflineWallet
+from monero.wallet import Wallet
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.app import App
+from cypherpunkpay.bitcoin.bip32 import Bip32
+from cypherpunkpay.exceptions import UnsupportedCoin
+from cypherpunkpay.usecases.use_case import UseCase
+
+
+class RefillAddressPoolUC(UseCase):
+    """ Derives receiving addresses ahead of demand so picking a coin for a charge is a single UPDATE
+
+        Charge-facing address_index keeps its historical meaning (n-th address of the wallet) and the derivation
+        path uses address_index + configured offset. Unclaimed addresses derived with a stale offset are dropped.
+    """
+
+    TARGET_SIZE = 20
+
+    _lock = RLock()  # serializes refills so concurrent ones never derive the same index twice
+
+    def __init__(self, cc_currency: str, target_size: int = TARGET_SIZE, config=None, db=None):
+        self.cc_currency = cc_currency
+        self.target_size = target_size
+        self.config = config if config else App().config()
+        self.db = db if db else App().db()
+
+    def exec(self) -> int:
+        """ Returns the number of newly derived addresses """
+        with self._lock:
+            wallet_fingerprint = self.wallet_fingerprint()
+            address_offset = self.address_offset()
+            self.db.delete_stale_pooled_addresses(wallet_fingerprint, address_offset)
+            missing = self.target_size - self.db.count_unclaimed_pooled_addresses(wallet_fingerprint, address_offset)
+            if missing <= 0:
+                return 0
+            next_index = self._next_address_index(wallet_fingerprint)
+            indexed_addresses = [(index, self.derive_address(index + address_offset)) for index in range(next_index, next_index + missing)]
+            self.db.insert_pooled_addresses(wallet_fingerprint, address_offset, indexed_addresses)
+            return missing
+
+    def claim(self) -> Tuple[int, str]:
+        """ Claims an unused address, refilling the pool as long as concurrent claimers drain it first """
+        with self._lock:
+            while True:
+                claimed = self.db.claim_pooled_address(self.wallet_fingerprint(), self.address_offset())
+                if claimed is not None:
+                    return claimed
+                self.exec()
+
+    def wallet_fingerprint(self) -> str:
+        if self.cc_currency == 'btc':
+            return Bip32.wallet_fingerprint(self.config.btc_account_xpub())
+        if self.cc_currency == 'xmr':
+            return hashlib.sha256(self.config.xmr_secret_view_key().encode()).hexdigest()
+        raise UnsupportedCoin(self.cc_currency)
+
+    def address_offset(self) -> int:
+        if self.cc_currency == 'btc':
+            return self.config.btc_account_offset()
+        if self.cc_currency == 'xmr':
+            return self.config.xmr_account_offset()
+        raise UnsupportedCoin(self.cc_currency)
+
+    def derive_address(self, derivation_index: int) -> str:
+        if self.cc_currency == 'btc':
+            return Bip32.p2wpkh_address_at(self.config.btc_network(), self.config.btc_account_xpub(), [0, derivation_index])
+        if self.cc_currency == 'xmr':
+            wallet = Wallet(OfflineWallet(self.config.xmr_main_address(), view_key=self.config.xmr_secret_view_key()))
+            return str(wallet.get_address(0, derivation_index))
+        raise UnsupportedCoin(self.cc_currency)
+
+    def _next_address_index(self, wallet_fingerprint: str) -> int:
+        max_index = self.db.get_max_pooled_address_index(wallet_fingerprint)
+        if max_index is not None:
+            return max_index + 1
+        # First refill for this wallet; charges created before the pool existed used the n-th address scheme
+        return self.db.count_charges_where_wallet_fingerprint_is(wallet_fingerprint)
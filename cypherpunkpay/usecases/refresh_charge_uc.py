@@ -1,3 +1,6 @@
+import time
+from threading import RLock
+
 from cypherpunkpay.app import App
 from cypherpunkpay.globals import *
 from cypherpunkpay.models.address_credits import AddressCredits
@@ -16,6 +19,15 @@ class RefreshChargeUC(UseCase):
 
     CONFIRMATIONS_TO_CONSIDER_COMPLETED = 2
 
+    # Charges whose credits are all confirmed can only change when blocks change, so their credits are memoized and
+    # confirmations get recomputed against the current height without network I/O. Credits are fetched again if the
+    # height went down (reorg) and, as a safety sweep, when older than MEMO_MAX_AGE_SECONDS (same-height reorgs).
+    # Unconfirmed credits are never memoized - the paying transaction may be replaced or double-spent at any time.
+    MEMO_MAX_AGE_SECONDS = 10 * 60
+
+    _memo_lock = RLock()
+    _memo: Dict = {}  # charge_uid -> (fetched_at, AddressCredits)
+
     def __init__(self, charge_uid: str, current_height=None, db=None, http_client=None, ln_client=None, config=None):
         self.charge_uid = charge_uid
         self._current_height = current_height
@@ -30,13 +42,7 @@ class RefreshChargeUC(UseCase):
             return
 
         if self._current_height is None:
-            cc_currency = charge.cc_currency
-            cc_network = self._config.cc_network(charge.cc_currency)
-            self._current_height = self._db.get_blockchain_height(cc_currency, cc_network)
-
-        # methods helpers so no self is necessary
-        total = self.total
-        confirmations = self.confirmations
+            self._current_height = App().current_blockchain_height(charge.cc_currency)
 
         if charge.is_hard_expired_to_pay() or charge.is_expired_to_complete():
             if not charge.has_final_status():
@@ -60,9 +66,26 @@ class RefreshChargeUC(UseCase):
                 # LN invoices that are expired or already paid cannot receive coins - no need to check
                 return
 
-        credits = self.fetch_credits(charge)  # This is many seconds!
-        if credits is None:
-            return  # fetching failed
+        credits = self.memoized_credits(charge)
+        fetched = credits is None
+        if fetched:
+            credits = self.fetch_credits(charge)  # This is many seconds!
+            if credits is None:
+                return  # fetching failed
+
+        try:
+            self.apply_credits(charge, credits)
+        finally:
+            # Only charges still waiting for confirmations ever read their memo again
+            if fetched and self.is_waiting_for_confirmations(charge) and self.all_confirmed(credits):
+                self.memoize_credits(charge, credits)
+            elif fetched or not self.is_waiting_for_confirmations(charge):
+                self.forget_credits(charge)
+
+    def apply_credits(self, charge: Charge, credits: AddressCredits):
+        # methods helpers so no self is necessary
+        total = self.total
+        confirmations = self.confirmations
 
         current_height = credits.blockchain_height()
 
@@ -155,6 +178,51 @@ class RefreshChargeUC(UseCase):
         if charge.cc_currency == 'xmr':
             return self.fetch_address_credits_from_monero_open_node(charge)
 
+    @staticmethod
+    def is_waiting_for_confirmations(charge: Charge) -> bool:
+        return charge.is_awaiting() and (charge.is_paid() or charge.is_confirmed()) and not charge.is_lightning()
+
+    def memoized_credits(self, charge: Charge) -> [AddressCredits, None]:
+        if not self.is_waiting_for_confirmations(charge):
+            return None
+        with self._memo_lock:
+            self._forget_expired_memos()
+            memo = self._memo.get(charge.uid)
+        if memo is None:
+            return None
+        fetched_at, credits = memo
+        if time.monotonic() - fetched_at > self.MEMO_MAX_AGE_SECONDS:
+            return None
+        if self._current_height < credits.blockchain_height():
+            return None
+        return credits.at_height(self._current_height)
+
+    @staticmethod
+    def all_confirmed(credits: AddressCredits) -> bool:
+        return not credits.unconfirmed_replaceable() and not credits.unconfirmed_non_replaceable()
+
+    def memoize_credits(self, charge: Charge, credits: AddressCredits):
+        with self._memo_lock:
+            self._forget_expired_memos()
+            self._memo[charge.uid] = (time.monotonic(), credits)
+
+    def forget_credits(self, charge: Charge):
+        with self._memo_lock:
+            self._forget_expired_memos()
+            self._memo.pop(charge.uid, None)
+
+    @classmethod
+    def forget_memoized_credits(cls):
+        with cls._memo_lock:
+            cls._memo.clear()
+
+    @classmethod
+    def _forget_expired_memos(cls):
+        # Only charges waiting for confirmations are memoized so this stays small
+        expired_before = time.monotonic() - cls.MEMO_MAX_AGE_SECONDS
+        for charge_uid in [uid for uid, (fetched_at, _) in cls._memo.items() if fetched_at < expired_before]:
+            del cls._memo[charge_uid]
+
     def btc_full_node_enabled(self, charge):
         return self._config.btc_node_enabled()
 
@@ -162,7 +230,7 @@ class RefreshChargeUC(UseCase):
         if charge.cc_currency == 'btc':
             did_change = EnsureBlockExplorersUC(charge, config=self._config).exec()
             if did_change:
-                self._db.save(charge)
+                self._db.save(charge, deferred=True)
         if charge.cc_currency == 'xmr':
             pass  # XMR empty list of available block explorers cannot be used with EnsureBlockExplorer so we pass here
 
@@ -212,13 +280,13 @@ class RefreshChargeUC(UseCase):
     def increment_subsequent_discrepancies(self, charge: Charge):
         charge.subsequent_discrepancies += 1
         log.info(f'Charge {charge.short_uid()} subsequent_discrepancies {charge.subsequent_discrepancies - 1} -> {charge.subsequent_discrepancies}')
-        self._db.save(charge)
+        self._db.save(charge, deferred=True)
 
     def reset_subsequent_discrepancies(self, charge: Charge):
         if charge.subsequent_discrepancies > 0:
             log.info(f'Charge {charge.short_uid()} reset subsequent_discrepancies {charge.subsequent_discrepancies} -> 0')
             charge.subsequent_discrepancies = 0
-            self._db.save(charge)
+            self._db.save(charge, deferred=True)
 
     def total(self, credits: List[Credit]):
         return sum(map(lambda c: c.value(), credits))
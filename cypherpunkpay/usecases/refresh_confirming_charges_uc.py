@@ -0,0 +1,29 @@
+from cypherpunkpay.globals import *
+from cypherpunkpay.db.db import DB
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
+from cypherpunkpay.usecases.refresh_charge_uc import RefreshChargeUC
+from cypherpunkpay.usecases.use_case import UseCase
+
+
+class RefreshConfirmingChargesUC(UseCase):
+    """ Called on a new blockchain height. Charges waiting for confirmations are refreshed right away.
+
+        RefreshChargeUC recomputes their confirmations from memoized credits so most of them need no network I/O.
+    """
+
+    def __init__(self, coin: str, old_height: int, new_height: int, engine: ChargeRefreshEngine, db: DB):
+        self._coin = coin
+        self._old_height = old_height
+        self._new_height = new_height
+        self._engine = engine
+        self._db = db
+
+    def exec(self):
+        if self._new_height < self._old_height:
+            log.info(f'{self._coin.upper()} blockchain height went down {self._old_height} -> {self._new_height} (reorg?), forgetting memoized credits')
+            RefreshChargeUC.forget_memoized_credits()
+        confirming_uids = [
+            charge.uid for charge in self._db.get_charges_by_status('awaiting')
+            if charge.cc_currency == self._coin and RefreshChargeUC.is_waiting_for_confirmations(charge)
+        ]
+        self._engine.refresh_now(confirming_uids)
@@ -6,15 +6,18 @@ from cypherpunkpay.usecases.fetch_blockchain_height_uc import FetchBlockchainHei
 
 class UpdateAllBlockchainsHeightUC(UseCase):
 
-    def __init__(self, config=None, http_client=None, db=None):
+    def __init__(self, config=None, http_client=None, coin_networks=None, height_events=None):
         self._config = config if config else App().config()
         self._http_client = http_client if http_client else App().http_client()
-        self._db = db if db else App().db()
+        self._coin_networks = coin_networks if coin_networks else App().coin_networks()
+        self._height_events = height_events if height_events else App().blockchain_height_events()
 
     def exec(self):
         for coin in self._config.configured_coins():
             height = FetchBlockchainHeightUC(coin, config=self._config, http_client=self._http_client).exec()
             if height:
-                self._db.update_blockchain_height(coin, self._config.cc_network(coin), height)
+                old_height = self._coin_networks.update_current_height(coin, height)  # persisted by the persist_blockchain_heights job
+                if height != old_height:
+                    self._height_events.publish(coin, old_height, height)
             else:
                 log.warning(f'Can\'t fetch {coin.upper()} blockchain height from any source. Network connection issue?')
@@ -1,91 +1,87 @@
 from threading import RLock
 import random
 
-from apscheduler.job import Job
-from apscheduler.triggers.interval import IntervalTrigger
-
 from cypherpunkpay.globals import *
 from cypherpunkpay.db.db import DB
 from cypherpunkpay.models.charge import Charge
-from cypherpunkpay.jobs.job_scheduler import JobScheduler
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
 from cypherpunkpay.usecases.use_case import UseCase
 
 
 class UpdateChargeJobsUC(UseCase):
+    """ Keeps the set of charges tracked by ChargeRefreshEngine in sync with recently activated charges
+
+        exec() only loads charges written since the previous sync, so its cost follows the write rate and not the
+        number of tracked charges. sweep() loads all recently activated charges to untrack the old ones and to step
+        intervals down as paid charges age; it runs on its own slow job. The first exec() of an instance is a sweep.
+    """
+
+    TRACKING_WINDOW = timedelta(days=7)
+    SYNC_OVERLAP = timedelta(seconds=30)  # rows committed a bit after their updated_at was taken, small clock steps
 
-    _lock = RLock()  # could be per job_scheduler instead of global but nvm that
+    _lock = RLock()  # could be per engine instead of global but nvm that
 
-    _job_scheduler: JobScheduler
+    _engine: ChargeRefreshEngine
     _db: DB
-    _recent_charges: List[Charge]
-    _jobs: List[Job]
+    _synced_at: [datetime.datetime, None]
 
-    def __init__(self, job_scheduler, db):
-        self._job_scheduler = job_scheduler
+    def __init__(self, engine, db):
+        self._engine = engine
         self._db = db
+        self._synced_at = None
 
     def exec(self):
         with self._lock:
-            self._recent_charges = self._db_get_recently_activated_charges()
-            self._jobs = self._get_refresh_jobs()
-            self._remove_jobs_for_old_charges()
-            self._ensure_jobs_for_recent_charges()
+            if self._synced_at is None:
+                self.sweep()
+                return
+            started_at = utc_now()
+            self._track_charges(self._db_get_charges_updated_since(self._synced_at - self.SYNC_OVERLAP))
+            self._synced_at = started_at
+
+    def sweep(self):
+        with self._lock:
+            started_at = utc_now()
+            recent_charges = self._db_get_recently_activated_charges()
+            self._untrack_old_charges(recent_charges)
+            self._track_charges(recent_charges)
+            self._synced_at = started_at
 
     # MOCKME
     def _db_get_recently_activated_charges(self) -> List[Charge]:
-        return self._db.get_recently_activated_charges(timedelta(days=7))
-
-    def _get_refresh_jobs(self):
-        return list(filter(lambda job: job.id.startswith('refresh_charge_'), self._job_scheduler.get_all_jobs()))
-
-    def _remove_jobs_for_old_charges(self):
-        for job in self._jobs:
-            if self._no_recent_charge_for(job):
-                self._job_scheduler.remove_job(job.id)
-
-    def _no_recent_charge_for(self, refresh_job: Job):
-        return not any(refresh_job.id == charge.refresh_job_id() for charge in self._recent_charges)
-
-    def _ensure_jobs_for_recent_charges(self):
-        from cypherpunkpay.usecases.refresh_charge_uc import RefreshChargeUC
-        for charge in self._recent_charges:
-            job = self._job_for_charge(charge)
-            if job:
-                # Reschedule if necessary
-                trigger = self._trigger_for_charge(charge)
-                if job.trigger.interval_length != trigger.interval_length:
-                    job.reschedule(trigger)
-            else:
-                # Add the job
-                trigger = self._trigger_for_charge(charge)
-                self._job_scheduler.add_job(
-                    lambda c=charge: RefreshChargeUC(c.uid).exec(),
-                    id=charge.refresh_job_id(),
-                    name=charge.refresh_job_id(),
-                    trigger=trigger,
-                    next_run_time=utc_from_now(seconds=random.randint(1, 6))  # the *first* run should be pretty immediate; this is for long-period jobs to make them run *soon* after CypherpunkPay restart
-                )
+        return self._db.get_recently_activated_charges(self.TRACKING_WINDOW)
+
+    # MOCKME
+    def _db_get_charges_updated_since(self, updated_since: datetime.datetime) -> List[Charge]:
+        return self._db.get_activated_charges_updated_since(updated_since, self.TRACKING_WINDOW)
+
+    def _untrack_old_charges(self, recent_charges: List[Charge]):
+        recent_uids = {charge.uid for charge in recent_charges}
+        for charge_uid in self._engine.tracked_uids() - recent_uids:
+            self._engine.untrack(charge_uid)
+
+    def _track_charges(self, charges: List[Charge]):
+        for charge in charges:
+            self._engine.track(
+                charge.uid,
+                self._interval_for_charge(charge),
+                first_run_in=timedelta(seconds=random.randint(1, 6))  # the *first* run should be pretty immediate; this is for long-period charges to be refreshed *soon* after CypherpunkPay restart
+            )
 
     # Depending on charge status, we want it to be refreshed often or rarely
-    def _trigger_for_charge(self, charge: Charge) -> IntervalTrigger:
+    def _interval_for_charge(self, charge: Charge) -> timedelta:
         # Final charges are unlikely to change but technically they can still receive payments (maybe due to late network confirmation or user error)
         if charge.has_final_status():
-            return IntervalTrigger(minutes=30)
+            return timedelta(minutes=30)
 
         # Paid but awaiting (more) confirmations
         if charge.is_paid() or charge.is_confirmed():
             if charge.paid_at > utc_ago(hours=1):
-                return IntervalTrigger(seconds=15)
+                return timedelta(seconds=15)
             elif charge.paid_at > utc_ago(hours=12):
-                return IntervalTrigger(minutes=3)
+                return timedelta(minutes=3)
             else:
-                return IntervalTrigger(minutes=15)
+                return timedelta(minutes=15)
 
         # Draft, unpaid or underpaid
-        return IntervalTrigger(seconds=2)
-
-    def _job_for_charge(self, charge: Charge) -> Job:
-        return first(lambda job: job.id == charge.refresh_job_id(), self._jobs)
-
-    def _no_job_for(self, charge: Charge):
-        return not any(refresh_job.id == charge.refresh_job_id() for refresh_job in self._jobs)
+        return timedelta(seconds=2)
@@ -1,18 +1,39 @@
+import json
+
+from pyramid.httpexceptions import HTTPBadRequest
 from pyramid.view import (view_config)
 
 from cypherpunkpay import App
+from cypherpunkpay.usecases.invalid_params import InvalidParams
+from cypherpunkpay.usecases.list_charges_uc import ListChargesUC
 from cypherpunkpay.usecases.report_charges_uc import ReportChargesUC
 from cypherpunkpay.web.views_admin.admin_base_view import AdminBaseView
 
 
 class AdminChargeViews(AdminBaseView):
 
+    STATUSES = ['draft', 'awaiting', 'completed', 'expired', 'cancelled']
+
     @view_config(route_name='get_admin_charges', permission='admin', renderer='web/html/admin/charges.jinja2')
     def get_admin_charges(self):
-        charges = App().db().get_recently_created_charges()
+        params = self.request.params
+        filters = {
+            'status': params.get('status'),
+            'created_from': params.get('created_from'),
+            'created_to': params.get('created_to'),
+        }
+        try:
+            page = ListChargesUC(**filters, before=params.get('before'), page_size=params.get('page_size'), db=App().db()).exec()
+        except InvalidParams as e:
+            raise HTTPBadRequest(json.dumps(e.errors))
         cr_7d, cr_all_time = ReportChargesUC(self.db()).exec()
         return {
             'title': 'Admin Charges',
-            'charges': charges,
+            'charges': page.charges,
+            'total': page.total,
+            'filters': filters,
+            'statuses': self.STATUSES,
+            'first_page_query': {k: v for k, v in filters.items() if v},
+            'next_page_query': {**{k: v for k, v in filters.items() if v}, 'before': page.next_cursor} if page.next_cursor else None,
             'cr': cr_all_time
         }
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark of Bitcoin address derivation and wallet fingerprint, without and with the memoized account context.
+
+Not part of the regular test run. Execute explicitly:
+
+    python -m tests.benchmark.bip32_benchmark
+"""
+import time
+
+from cypherpunkpay.bitcoin.bip32 import Bip32
+from cypherpunkpay.bitcoin.electrum.bip32 import BIP32Node
+from cypherpunkpay.bitcoin.electrum.bitcoin import public_key_to_p2wpkh_addr
+from cypherpunkpay.bitcoin.electrum.constants import BitcoinMainnet
+from cypherpunkpay.bitcoin.electrum.crypto import hash_160
+
+
+ZPUB = 'zpub6ny78Lm9fLNsW9ppXy1NB6jZUX6M8QiKphsPQrN8upBMZiSA8QtT9hkssy1ZZoKSB2muc4PQPdWMHfq41PTNGJ8iMtY5KNzJTHxHRKvNMUf'
+ITERATIONS = 200
+
+
+def uncached_address_at(index: int) -> str:
+    # What Bip32.p2wpkh_address_at did for every charge before memoization
+    account_node = BIP32Node.from_xkey(ZPUB, net=BitcoinMainnet)
+    pubkey_node = account_node.subkey_at_public_derivation([0, index])
+    return public_key_to_p2wpkh_addr(pubkey_node.eckey.get_public_key_bytes(compressed=True), net=BitcoinMainnet)
+
+
+def uncached_wallet_fingerprint() -> str:
+    # What Bip32.wallet_fingerprint did before memoization (parses the xpub three times)
+    standard_xpub = Bip32.to_standard_xpub(ZPUB)
+    node = BIP32Node.from_xkey(standard_xpub, net=BitcoinMainnet)
+    return hash_160(node.eckey.get_public_key_bytes(compressed=True))[0:8].hex()
+
+
+def cached_address_at(index: int) -> str:
+    return Bip32.p2wpkh_address_at('mainnet', ZPUB, [0, index])
+
+
+def cached_wallet_fingerprint() -> str:
+    return Bip32.wallet_fingerprint(ZPUB)
+
+
+def per_call_ms(fn) -> float:
+    started_at = time.perf_counter()
+    for i in range(ITERATIONS):
+        fn(i)
+    return (time.perf_counter() - started_at) * 1000 / ITERATIONS
+
+
+class Bip32BenchmarkTest:
+
+    def test_memoized_derivation_is_faster(self):
+        assert uncached_address_at(7) == cached_address_at(7)
+        assert uncached_wallet_fingerprint() == cached_wallet_fingerprint()
+
+        results = {
+            'p2wpkh_address_at': (per_call_ms(uncached_address_at), per_call_ms(cached_address_at)),
+            'wallet_fingerprint': (per_call_ms(lambda i: uncached_wallet_fingerprint()), per_call_ms(lambda i: cached_wallet_fingerprint())),
+        }
+        for name, (before, after) in results.items():
+            print(f'{name:<20} before={before:8.3f} ms/call   after={after:8.3f} ms/call   speedup={before / after:6.1f}x')
+            assert after < before
+
+
+if __name__ == '__main__':
+    Bip32BenchmarkTest().test_memoized_derivation_is_faster()
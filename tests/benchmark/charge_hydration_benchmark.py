@@ -0,0 +1,113 @@
+"""
+Benchmark of loading 100k charges: the former per-row Charge reconstruction vs the fast hydration path
+and the read-only ChargeSummary projection used by the admin charges list.
+
+Not part of the regular test run. Execute explicitly:
+
+    python -m tests.benchmark.charge_hydration_benchmark
+"""
+import tempfile
+import time
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.db.sqlite_db import SqliteDB, db_int8_to_decimal
+from cypherpunkpay.db.sqlite_type_assertions import assert_charge_types
+from cypherpunkpay.models.charge import Charge, ExampleCharge
+
+ROWS = 100_000
+
+
+def constructor_charge_from_row(row) -> Charge:
+    # What SqliteDB.charge_from_row did for every row before the fast path
+    charge = Charge(
+        total=db_int8_to_decimal(row['total']),
+        currency=row['currency'],
+        time_to_pay_ms=row['time_to_pay_ms'],
+        time_to_complete_ms=row['time_to_complete_ms']
+    )
+    charge.uid = row['uid']
+    charge.merchant_order_id = row['merchant_order_id']
+    charge.cc_total = db_int8_to_decimal(row['cc_total'])
+    charge.cc_currency = row['cc_currency']
+    charge.cc_address = row['cc_address']
+    charge.cc_lightning_payment_request = row['cc_lightning_payment_request']
+    charge.cc_price = db_int8_to_decimal(row['cc_price'])
+    charge.usd_total = db_int8_to_decimal(row['usd_total'])
+    charge.pay_status = row['pay_status']
+    charge.status = row['status']
+    charge.cc_received_total = db_int8_to_decimal(row['cc_received_total'])
+    charge.confirmations = int(row['confirmations'])
+    charge.activated_at = SqliteDB.soft_apply_utc(row['activated_at'])
+    charge.paid_at = SqliteDB.soft_apply_utc(row['paid_at'])
+    charge.completed_at = SqliteDB.soft_apply_utc(row['completed_at'])
+    charge.expired_at = SqliteDB.soft_apply_utc(row['expired_at'])
+    charge.cancelled_at = SqliteDB.soft_apply_utc(row['cancelled_at'])
+    charge.merchant_callback_url_called_at = SqliteDB.soft_apply_utc(row['merchant_callback_url_called_at'])
+    charge.wallet_fingerprint = row['wallet_fingerprint']
+    charge.address_derivation_index = row['address_derivation_index']
+    charge.beneficiary = row['beneficiary']
+    charge.what_for = row['what_for']
+    charge.status_fixed_manually = bool(row['status_fixed_manually'])
+    charge.block_explorer_1 = row['block_explorer_1']
+    charge.block_explorer_2 = row['block_explorer_2']
+    charge.subsequent_discrepancies = int(row['subsequent_discrepancies'])
+    charge.created_at = SqliteDB.soft_apply_utc(row['created_at'])
+    charge.updated_at = SqliteDB.soft_apply_utc(row['updated_at'])
+    assert_charge_types(charge)
+    return charge
+
+
+def seeded_db(db_file_path: str, assert_types: bool) -> SqliteDB:
+    db = SqliteDB(db_file_path, assert_types=assert_types)
+    db.connect()
+    db.migrate()
+    if db.get_charges_count() == 0:
+        db.execute('BEGIN')
+        for i in range(ROWS):
+            ExampleCharge.db_create(db, paid_at=utc_now(), cc_received_total='0.5', merchant_order_id=str(i))
+        db.execute('COMMIT')
+    return db
+
+
+def elapsed_ms(fn) -> float:
+    started_at = time.perf_counter()
+    fn()
+    return (time.perf_counter() - started_at) * 1000
+
+
+class ChargeHydrationBenchmarkTest:
+
+    def test_fast_hydration_is_faster(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            db_file_path = f'{tmp_dir}/db.sqlite3'
+            db = seeded_db(db_file_path, assert_types=True)
+            sql = f'SELECT {SqliteDB.CHARGE_COLUMNS} FROM charges WHERE created_at > ? ORDER BY created_at DESC'
+
+            def constructor_path():
+                rows = db._reader().execute(sql, [datetime.datetime.min])
+                assert len([constructor_charge_from_row(row) for row in rows]) == ROWS
+
+            def fast_path():
+                assert len(db.get_recently_created_charges()) == ROWS
+
+            def summaries():
+                assert len(db.get_charge_summaries_page(ROWS)) == ROWS
+
+            before = elapsed_ms(constructor_path)
+            results = {
+                'charges (asserted)': elapsed_ms(fast_path),
+                'summaries': elapsed_ms(summaries),
+            }
+            db.disconnect()
+            db = seeded_db(db_file_path, assert_types=False)
+            results['charges (production)'] = elapsed_ms(fast_path)
+            db.disconnect()
+
+        print(f'{"constructor per row":<22} {before:8.0f} ms / {ROWS} rows')
+        for name, after in results.items():
+            print(f'{name:<22} {after:8.0f} ms / {ROWS} rows   speedup={before / after:5.1f}x')
+            assert after < before
+
+
+if __name__ == '__main__':
+    ChargeHydrationBenchmarkTest().test_fast_hydration_is_faster()
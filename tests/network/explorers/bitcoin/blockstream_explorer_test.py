@@ -117,3 +117,20 @@ class StubHttpClient(DummyHttpClient):
         if self.response_filename is None:
             return None
         return (dir_of(__file__) / 'test_data' / 'blockstream' / self.response_filename).read_text()
+
+    # The stub files hold /address/:address/txs answers; stats, chain and mempool answers are derived from them
+    def get_bounded_text_or_None_on_error(self, url: str, privacy_context: str, max_bytes: int, verify=None) -> [str, None]:
+        text = self.get_text_or_None_on_error(url, privacy_context, verify)
+        try:
+            txs = json.loads(text)
+        except (JSONDecodeError, TypeError):
+            return text
+        confirmed = [tx for tx in txs if tx['status']['confirmed']]
+        unconfirmed = [tx for tx in txs if not tx['status']['confirmed']]
+        if url.endswith('/txs/chain'):
+            return json.dumps(confirmed)
+        if '/txs/chain/' in url:
+            return json.dumps([])
+        if url.endswith('/txs/mempool'):
+            return json.dumps(unconfirmed)
+        return json.dumps({'chain_stats': {'tx_count': len(confirmed)}, 'mempool_stats': {'tx_count': len(unconfirmed)}})
@@ -110,3 +110,6 @@ class StubHttpClient(DummyHttpClient):
         if self.response_filename is None:
             return None
         return (dir_of(__file__) / 'test_data' / 'trezor' / self.response_filename).read_text()
+
+    def get_bounded_text_or_None_on_error(self, url: str, privacy_context: str, max_bytes: int, verify=None) -> [str, None]:
+        return self.get_text_or_None_on_error(url, privacy_context, verify)
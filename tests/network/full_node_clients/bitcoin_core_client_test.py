@@ -77,3 +77,21 @@ class BitcoinCoreClientTest(CypherpunkpayNetworkTestCase):
         credits = client.get_address_credits(wallet_fingerprint, BitcoinCoreClientTest.UNSPENT_ADDRESS_0_101, example_height)
         total_credited = sum(map(lambda c: c.value(), credits.all()))
         self.assertEqual(Decimal('0.00001869'), total_credited)
+
+    def test_fetch_all_address_credits(self):
+        client = BitcoinCoreClient('http://127.0.0.1:18332', rpc_user='bitcoin', rpc_password='secret', http_client=self.tor_http_client)
+
+        timestamp_before_example_transactions = int(datetime.datetime(2021, 4, 1).timestamp())
+        client.create_wallet_idempotent(BitcoinCoreClientTest.XPUB, rescan_since=timestamp_before_example_transactions)
+
+        wallet_fingerprint = Bip32.wallet_fingerprint(BitcoinCoreClientTest.XPUB)
+        example_height = 1972757
+
+        all_credits = client.get_all_address_credits(wallet_fingerprint, example_height)
+
+        def total_credited(address):
+            return sum(map(lambda c: c.value(), all_credits[address].all()))
+
+        self.assertEqual(Decimal('0.00000001'), total_credited(BitcoinCoreClientTest.UNSPENT_ADDRESS_0_0))
+        self.assertEqual(Decimal('0.00013007'), total_credited(BitcoinCoreClientTest.SPENT_ADDRESS_0_1))
+        self.assertEqual(Decimal('0.00001869'), total_credited(BitcoinCoreClientTest.UNSPENT_ADDRESS_0_101))
@@ -0,0 +1,74 @@
+import hashlib
+
+import pytest
+
+from cypherpunkpay.bitcoin.electrum import bip32, crypto, ecc, ecc_fast, ripemd
+from cypherpunkpay.bitcoin.electrum.bip32 import BIP32Node
+
+pytestmark = pytest.mark.skipif(not ecc_fast.HAS_LIBSECP256K1, reason='coincurve not installed')
+
+
+def both_backends(fn):
+    """ Returns (pure-Python result, libsecp256k1 result) """
+    original = ecc_fast.enabled
+    try:
+        ecc_fast.enabled = False
+        pure = fn()
+        ecc_fast.enabled = True
+        fast = fn()
+    finally:
+        ecc_fast.enabled = original
+    return pure, fast
+
+
+class EccFastTest:
+
+    # Electrum mainnet P2WPKH seed words (no funds here):
+    # file title fault retire nuclear alone kidney eternal error weekend canvas weird
+    VALID_XPUB = 'xpub69JaX1RKMyHuoZSasFS7kvYZ8aoTFAjKzUpwr4aN9oRbTWohd6ZKuaSbqZ6PZz1bMkYJ77CHUJoFX6bvZzdLfpmWdD9E9ZMKuqpzeFxeKq2'
+
+    PRIVKEYS = [bytes([i]) * 32 for i in range(1, 8)]
+
+    def test_ser_to_point(self):
+        for secret in self.PRIVKEYS:
+            pubkey = ecc.ECPrivkey(secret)
+            for compressed in (True, False):
+                ser = pubkey.get_public_key_bytes(compressed=compressed)
+                pure, fast = both_backends(lambda: ecc.ser_to_point(ser))
+                assert pure == fast == pubkey.point()
+
+    def test_ser_to_point__invalid_point(self):
+        not_on_curve = bytes([4]) + bytes(31) + bytes([7]) + bytes(31) + bytes([7])
+        for enabled in (False, True):
+            ecc_fast.enabled, original = enabled, ecc_fast.enabled
+            try:
+                with pytest.raises(ecc.InvalidECPointException):
+                    ecc.ECPubkey(not_on_curve)
+            finally:
+                ecc_fast.enabled = original
+
+    def test_ckd_pub(self):
+        node = BIP32Node.from_xkey(self.VALID_XPUB)
+        pure, fast = both_backends(lambda: [node.subkey_at_public_derivation([0, i]).eckey.get_public_key_bytes() for i in range(10)])
+        assert pure == fast
+
+    def test_ckd_pub__known_child(self):
+        node = BIP32Node.from_xkey(self.VALID_XPUB)
+        pure, fast = both_backends(lambda: bip32._CKD_pub(node.eckey.get_public_key_bytes(), node.chaincode, bytes(4)))
+        assert pure == fast
+
+    def test_from_sig_string(self):
+        msg_hash = hashlib.sha256(b'cypherpunkpay').digest()
+        for secret in self.PRIVKEYS:
+            privkey = ecc.ECPrivkey(secret)
+            sig_string = privkey.sign(msg_hash)
+            recovered = []
+            for recid in range(2):
+                pure, fast = both_backends(lambda: ecc.ECPubkey.from_sig_string(sig_string, recid, msg_hash))
+                assert pure == fast
+                recovered.append(fast)
+            assert privkey in recovered
+
+    def test_ripemd(self):
+        for data in (b'', b'abc', bytes(range(256)) * 3):
+            assert crypto.ripemd(data) == ripemd.new(data).digest()
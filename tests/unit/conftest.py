@@ -29,4 +29,5 @@ def database_transaction():
     yield
 
     # TEARDOWN
+    base_class.db.flush_deferred_writes()  # so they get rolled back too
     base_class.db.execute('ROLLBACK')
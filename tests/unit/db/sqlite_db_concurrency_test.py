@@ -0,0 +1,62 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.unit.test_case import CypherpunkpayTestCase
+
+from cypherpunkpay.db.sqlite_db import SqliteDB
+from cypherpunkpay.models.charge import ExampleCharge
+
+
+class SqliteDBConcurrencyTest(CypherpunkpayTestCase):
+
+    def test_reads_do_not_wait_for_writer(self, tmp_path):
+        db = SqliteDB(str(tmp_path / 'db.sqlite3'))
+        db.connect()
+        try:
+            db.migrate()
+            charge = ExampleCharge.db_create(db)
+            assert db._db.execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+            with ThreadPoolExecutor(1) as executor:
+                with db.lock:  # writer busy
+                    read = executor.submit(db.get_charge_by_uid, charge.uid)
+                    assert read.result(timeout=5).uid == charge.uid
+        finally:
+            db.disconnect()
+
+    def test_reads_see_uncommitted_writes_within_transaction(self, tmp_path):
+        db = SqliteDB(str(tmp_path / 'db.sqlite3'))
+        db.connect()
+        try:
+            db.migrate()
+            db.execute('BEGIN')
+            charge = ExampleCharge.db_create(db)
+            assert db.get_charge_by_uid(charge.uid).uid == charge.uid
+            db.execute('ROLLBACK')
+            assert db.get_charge_by_uid(charge.uid) is None
+        finally:
+            db.disconnect()
+
+    def test_read_connections_of_finished_threads_get_closed(self, tmp_path):
+        db = SqliteDB(str(tmp_path / 'db.sqlite3'))
+        db.connect()
+        try:
+            db.migrate()
+            charge = ExampleCharge.db_create(db)
+            finished_readers = []
+            for _ in range(3):
+                thread = threading.Thread(target=lambda: finished_readers.append(db._reader()) or db.get_charge_by_uid(charge.uid))
+                thread.start()
+                thread.join()
+
+            with ThreadPoolExecutor(1) as executor:
+                assert executor.submit(db.get_charge_by_uid, charge.uid).result(timeout=5).uid == charge.uid
+                assert all(thread.is_alive() for thread in db._reader_connections)
+            for connection in finished_readers:
+                with pytest.raises(sqlite3.ProgrammingError):
+                    connection.execute('SELECT 1')
+        finally:
+            db.disconnect()
@@ -4,7 +4,8 @@ from tests.unit.db_test_case import CypherpunkpayDBTestCase
 
 from cypherpunkpay.globals import *
 from cypherpunkpay.db.sqlite_db import decimal_to_db_int8, db_int8_to_decimal
-from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.models.charge import Charge, ExampleCharge
+from cypherpunkpay.models.charge_summary import ChargeSummary
 from cypherpunkpay.models.dummy_store_order import DummyStoreOrder
 from cypherpunkpay.models.user import User
 from cypherpunkpay.tools.safe_uid import SafeUid
@@ -224,6 +225,128 @@ class SqliteDBTest(CypherpunkpayDBTestCase):
         assert updated_charge.confirmations == 64321
         assert former_updated_at < updated_charge.updated_at
 
+    def test_charge_hydration(self):
+        charge = ExampleCharge.create(merchant_order_id='order-1', beneficiary='Tesla', cc_received_total='0.5', address_derivation_index=5)
+        charge.cc_price = Decimal('30000.5')
+        charge.paid_at = utc_now()
+        self.db.insert(charge)
+
+        loaded = self.db.get_charge_by_uid(charge.uid)
+        assert loaded.is_persisted()
+        assert loaded.changed_fields() == set()
+        for field in Charge.PERSISTED_FIELDS:
+            assert getattr(loaded, field) == getattr(charge, field), field
+
+        summary = self.db.get_charge_summaries_page(1)[0]
+        for field in ChargeSummary._fields:
+            assert getattr(summary, field) == getattr(charge, field), field
+        assert summary.is_awaiting() and summary.is_unpaid() and not summary.is_overpaid()
+
+    def test_charge_daily_stats_follow_status_transitions(self):
+        charges = [
+            ExampleCharge.db_create(self.db, status='awaiting', activated_at=utc_ago(days=days))
+            for days in (0, 0, 1, 3)
+        ]
+        ExampleCharge.db_create(self.db, status='draft')
+        charges[0].advance_to_completed()
+        charges[1].advance_to_expired()
+        charges[2].advance_to_cancelled()
+        charges[2].usd_total = Decimal('12.34')
+        for charge in charges:
+            self.db.save(charge)
+
+        def stats(sql):
+            return sorted(tuple(row) for row in self.db._db.execute(sql))
+
+        assert stats('SELECT day, status, count, usd_total FROM charge_daily_stats WHERE count > 0') == stats("""
+            SELECT date(activated_at), status, COUNT(*), SUM(usd_total) FROM charges
+            WHERE activated_at IS NOT NULL GROUP BY date(activated_at), status
+        """)
+
+    def test_save_charge_updates_changed_columns_only(self):
+        charge = ExampleCharge.db_create(self.db)
+        statements = []
+        self.db._db.set_trace_callback(statements.append)
+        try:
+            self.db.save(charge)  # nothing changed
+            charge.confirmations = 3
+            self.db.save(charge)
+        finally:
+            self.db._db.set_trace_callback(None)
+
+        assert len(statements) == 1
+        assert statements[0].startswith('UPDATE charges SET confirmations = 3, updated_at = ')
+        assert self.db.get_charge_by_uid(charge.uid).confirmations == 3
+
+    def test_save_of_charge_built_with_existing_uid_overwrites_the_row(self):
+        existing = ExampleCharge.db_create(self.db, total=1)
+        charge = ExampleCharge.create(uid=existing.uid, total=2, status='awaiting', pay_status='paid', paid_at=utc_now())
+        assert not charge.is_persisted()
+
+        self.db.save(charge)
+
+        assert charge.is_persisted()
+        loaded = self.db.get_charge_by_uid(existing.uid)
+        assert (loaded.total, loaded.pay_status, loaded.paid_at) == (charge.total, 'paid', charge.paid_at)
+        self.assertEqual(1, self.db.get_charges_count())
+
+    def test_deferred_charge_saves_are_coalesced_and_flushed_in_one_transaction(self):
+        charges = [ExampleCharge.db_create(self.db) for _ in range(3)]
+        statements = []
+        self.db._db.set_trace_callback(statements.append)
+        try:
+            for _ in range(5):
+                for charge in charges:
+                    charge.subsequent_discrepancies += 1
+                    self.db.save(charge, deferred=True)
+            assert statements == []
+            assert self.db.flush_deferred_writes() == 3
+        finally:
+            self.db._db.set_trace_callback(None)
+
+        assert statements[0].startswith('SAVEPOINT')  # the test runs inside a transaction already
+        assert statements[-1].startswith('RELEASE')
+        assert all(statement.startswith('UPDATE charges SET subsequent_discrepancies = 5, updated_at = ') for statement in statements[1:-1])
+        assert self.db.flush_deferred_writes() == 0
+        for charge in charges:
+            row = self.db._db.execute('SELECT subsequent_discrepancies FROM charges WHERE uid = ?', [charge.uid]).fetchone()
+            assert row[0] == 5
+
+    def test_deferred_charge_save_is_visible_before_flush(self):
+        charge = ExampleCharge.db_create(self.db)
+        charge.block_explorer_1 = 'explorer-1'
+        self.db.save(charge, deferred=True)
+        assert self.db.get_charge_by_uid(charge.uid).block_explorer_1 == 'explorer-1'
+
+    def test_deferred_charge_save_with_critical_changes_writes_synchronously(self):
+        charge = ExampleCharge.db_create(self.db)
+        charge.subsequent_discrepancies = 1
+        charge.status = 'completed'
+        self.db.save(charge, deferred=True)
+        assert self.db.flush_deferred_writes() == 0
+        row = self.db._db.execute('SELECT status, subsequent_discrepancies FROM charges WHERE uid = ?', [charge.uid]).fetchone()
+        assert tuple(row) == ('completed', 1)
+
+    def test_synchronous_charge_save_carries_pending_deferred_values(self):
+        stale = ExampleCharge.db_create(self.db)
+        charge = self.db.get_charge_by_uid(stale.uid)
+        charge.subsequent_discrepancies = 4
+        self.db.save(charge, deferred=True)
+
+        stale.confirmations = 2
+        self.db.save(stale)
+        assert self.db.flush_deferred_writes() == 0
+        row = self.db._db.execute('SELECT confirmations, subsequent_discrepancies FROM charges WHERE uid = ?', [charge.uid]).fetchone()
+        assert tuple(row) == (2, 4)
+
+    def test_get_block_explorers_of_unfinished_charges(self):
+        for status, block_explorer_1, block_explorer_2 in [('awaiting', 'explorer-1', 'explorer-2'), ('awaiting', 'explorer-2', None), ('completed', 'explorer-3', 'explorer-4')]:
+            charge = ExampleCharge.db_create(self.db, status=status)
+            charge.block_explorer_1 = block_explorer_1
+            charge.block_explorer_2 = block_explorer_2
+            self.db.save(charge)
+        assert sorted(self.db.get_block_explorers_of_unfinished_charges()) == ['explorer-1', 'explorer-2']
+
     def test_coins(self):
         btc_height = self.db.get_blockchain_height('btc', 'mainnet')
         assert btc_height == 0
@@ -0,0 +1,89 @@
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from tests.unit.test_case import CypherpunkpayTestCase
+
+from cypherpunkpay.db.sqlite_db import SqliteDB
+from cypherpunkpay.models.charge import ExampleCharge
+
+
+class SqliteDBTransactionTest(CypherpunkpayTestCase):
+
+    @pytest.fixture(autouse=True)
+    def fresh_db(self, tmp_path):
+        self.db = SqliteDB(str(tmp_path / 'db.sqlite3'))
+        self.db.connect()
+        self.db.migrate()
+        yield
+        self.db.disconnect()
+
+    def test_commits_once(self):
+        statements = []
+        self.db._db.set_trace_callback(statements.append)
+        try:
+            with self.db.transaction():
+                charges = [ExampleCharge.db_create(self.db) for _ in range(3)]
+        finally:
+            self.db._db.set_trace_callback(None)
+
+        assert [statement for statement in statements if statement in ('BEGIN IMMEDIATE', 'COMMIT')] == ['BEGIN IMMEDIATE', 'COMMIT']
+        assert all(self.db.get_charge_by_uid(charge.uid) for charge in charges)
+
+    def test_rolls_back_on_exception(self):
+        with pytest.raises(ZeroDivisionError):
+            with self.db.transaction():
+                charge = ExampleCharge.db_create(self.db)
+                1 / 0
+        assert not self.db._db.in_transaction
+        assert self.db.get_charge_by_uid(charge.uid) is None
+
+    def test_nested_transaction_rolls_back_to_its_savepoint(self):
+        with self.db.transaction():
+            outer = ExampleCharge.db_create(self.db)
+            with pytest.raises(ZeroDivisionError):
+                with self.db.transaction():
+                    inner = ExampleCharge.db_create(self.db)
+                    1 / 0
+        assert self.db.get_charge_by_uid(outer.uid)
+        assert self.db.get_charge_by_uid(inner.uid) is None
+
+    def test_other_threads_read_last_commit_without_waiting(self):
+        with ThreadPoolExecutor(1) as executor:
+            with self.db.transaction():
+                charge = ExampleCharge.db_create(self.db)
+                assert self.db.get_charge_by_uid(charge.uid)
+                assert executor.submit(self.db.get_charge_by_uid, charge.uid).result(timeout=5) is None
+        assert self.db.get_charge_by_uid(charge.uid)
+
+    def test_other_threads_see_deferred_writes_while_their_flush_is_uncommitted(self):
+        charge = ExampleCharge.db_create(self.db)
+        charge.subsequent_discrepancies = 5
+        self.db.save(charge, deferred=True)
+
+        def read_discrepancies():
+            return self.db.get_charge_by_uid(charge.uid).subsequent_discrepancies
+
+        with ThreadPoolExecutor(1) as executor:
+            with self.db.transaction():
+                assert self.db.flush_deferred_writes() == 1
+                assert executor.submit(read_discrepancies).result(timeout=5) == 5
+            assert executor.submit(read_discrepancies).result(timeout=5) == 5
+        assert self.db._flushing_charge_writes == {}
+
+    def test_other_threads_see_deferred_writes_riding_along_an_uncommitted_save(self):
+        charge = ExampleCharge.db_create(self.db)
+        charge.subsequent_discrepancies = 5
+        self.db.save(charge, deferred=True)
+
+        def read_discrepancies():
+            return self.db.get_charge_by_uid(charge.uid).subsequent_discrepancies
+
+        with ThreadPoolExecutor(1) as executor:
+            with self.db.transaction():
+                charge.status = 'expired'
+                self.db.save(charge)
+                assert self.db._deferred_charge_writes == {}
+                assert executor.submit(read_discrepancies).result(timeout=5) == 5
+            assert executor.submit(read_discrepancies).result(timeout=5) == 5
+        assert self.db._flushing_charge_writes == {}
@@ -0,0 +1,97 @@
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.models.dummy_store_order import DummyStoreOrder
+from cypherpunkpay.models.user import User
+
+
+class SqliteQueryPlanTest(CypherpunkpayDBTestCase):
+    """ Runs every query SqliteDB issues through EXPLAIN QUERY PLAN and fails on full table scans
+
+        Statements without a WHERE clause (listings, counts) read the whole table by design and are not checked.
+        Walking a whole index ('SCAN charges USING INDEX ...') counts as a full table scan.
+    """
+
+    def test_no_full_table_scans(self):
+        statements = self.record_statements(self.exercise_all_queries)
+        assert statements
+        full_scans = []
+        for sql in statements:
+            if not re.search(r'\bWHERE\b', sql, re.IGNORECASE):
+                continue
+            for detail in self.query_plan(sql):
+                if re.match(r'SCAN (?!CONSTANT ROW)\w', detail):  # a table or index, not a '(subquery-N)' or 'CONSTANT ROW'
+                    full_scans.append(f'{detail}: {" ".join(sql.split())}')
+        assert full_scans == []
+
+    def exercise_all_queries(self):
+        db = self.db
+
+        charge = ExampleCharge.db_create(db, merchant_order_id='order-1', activated_at=utc_now())
+        charge.status = 'completed'
+        db.save(charge)
+        db.reload(charge)
+        db.exists(charge)
+        db.get_charges_count()
+        db.get_charges()
+        db.get_charge_by_uid(charge.uid)
+        db.count_charges_where_wallet_fingerprint_is(charge.wallet_fingerprint)
+        db.get_charges_by_status('awaiting')
+        db.get_block_explorers_of_unfinished_charges()
+        db.get_recently_created_charges(timedelta(hours=1))
+        db.get_charge_summaries_page(50)
+        db.get_charge_summaries_page(50, before=(charge.created_at, charge.uid))
+        db.get_charge_summaries_page(50, before=(charge.created_at, charge.uid), status='completed', created_from=utc_ago(days=1), created_to=utc_now())
+        db.get_charges_count('completed')
+        db.archive_charges(utc_now(), 10)
+        db.get_charge_by_uid(charge.uid)
+        charge.confirmations += 1
+        db.save(charge)
+        charge.subsequent_discrepancies += 1
+        db.save(charge, deferred=True)
+        db.flush_deferred_writes()
+        db.get_recently_activated_charges(timedelta(hours=1))
+        db.get_activated_charges_updated_since(utc_ago(seconds=30), timedelta(days=7))
+        db.get_last_charge()
+        db.get_charges_for_merchant_notification(['completed', 'expired', 'cancelled'])
+        list(db.count_and_sum_charges_grouped_by_status(activated_after=utc_ago(days=7)))
+
+        db.insert_pooled_addresses('fingerprint', 0, [(0, 'address0'), (1, 'address1')])
+        db.claim_pooled_address('fingerprint', 0)
+        db.count_unclaimed_pooled_addresses('fingerprint', 0)
+        db.get_max_pooled_address_index('fingerprint')
+        db.delete_stale_pooled_addresses('fingerprint', 10)
+
+        user = User('username', 'password_hash')
+        db.save(user)
+        db.get_users_count()
+        db.get_users()
+        db.get_user_by_username('username')
+
+        order = DummyStoreOrder(uid='order-uid', item_id=1, total=Decimal(1), currency='usd')
+        db.save(order)
+        db.save(order)
+        db.get_order_by_uid(order.uid)
+        db.get_orders()
+
+        db.update_blockchain_height('btc', 'mainnet', 700_000)
+        db.get_blockchain_height('btc', 'mainnet')
+        db.get_admin_unique_path_segment()
+
+    def record_statements(self, fn) -> List[str]:
+        statements = []
+
+        def on_statement(sql):
+            if sql.lstrip().split(None, 1)[0].upper() in ('SELECT', 'UPDATE', 'DELETE'):
+                statements.append(sql)
+
+        self.db._db.set_trace_callback(on_statement)
+        try:
+            fn()
+        finally:
+            self.db._db.set_trace_callback(None)
+        return statements
+
+    def query_plan(self, sql: str) -> List[str]:
+        return [row['detail'] for row in self.db._db.execute(f'EXPLAIN QUERY PLAN {sql}')]
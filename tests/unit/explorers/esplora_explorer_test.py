@@ -0,0 +1,192 @@
+import json
+
+import pytest
+
+from cypherpunkpay.explorers.bitcoin.block_explorer import AddressHistoryTooLarge
+from cypherpunkpay.explorers.bitcoin.esplora_explorer import EsploraExplorer
+from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class StubResponse(object):
+
+    def __init__(self, body: bytes, chunk_bytes: int = 7):
+        self.ok = True
+        self.status_code = 200
+        self.headers = {}
+        self.encoding = 'utf-8'
+        self._body = body
+        self._chunk_bytes = chunk_bytes
+        self.chunks_read = 0
+
+    def iter_content(self, chunk_size):
+        for start in range(0, len(self._body), self._chunk_bytes):
+            self.chunks_read += 1
+            yield self._body[start:start + self._chunk_bytes]
+
+    def close(self):
+        pass
+
+
+class StubHttpClient(DummyHttpClient):
+
+    def __init__(self, pages: dict):
+        self.pages = pages  # path -> list of tx json
+        self.requested = []
+        self.responses = []
+
+    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None, stream: bool = False):
+        path = url.replace('https://esplora.test/api', '')
+        self.requested.append(path)
+        response = StubResponse(json.dumps(self.pages[path]).encode())
+        self.responses.append(response)
+        return response
+
+
+class StubEsploraExplorer(EsploraExplorer):
+
+    def api_endpoint(self) -> str:
+        return 'https://esplora.test/api'
+
+
+ADDRESS = 'tb1q8dsm6cqstsvhvu07fkqvpcaav3hxhk6g8kfme9'
+OTHER_ADDRESS = 'tb1qxyz'
+
+
+def tx(txid, value, address=ADDRESS, block_height=None):
+    status = {'confirmed': True, 'block_height': block_height} if block_height else {'confirmed': False}
+    return {
+        'txid': txid,
+        'status': status,
+        'vin': [{'sequence': 0xffffffff, 'prevout': {'scriptpubkey_address': OTHER_ADDRESS, 'value': 10**8}}],
+        'vout': [{'scriptpubkey_address': address, 'value': value}, {'scriptpubkey_address': OTHER_ADDRESS, 'value': 1}]
+    }
+
+
+def stats(chain_tx_count, mempool_tx_count=0):
+    return {'address': ADDRESS, 'chain_stats': {'tx_count': chain_tx_count}, 'mempool_stats': {'tx_count': mempool_tx_count}}
+
+
+class EsploraExplorerTest(CypherpunkpayTestCase):
+
+    STATS = f'/address/{ADDRESS}'
+    CHAIN = f'/address/{ADDRESS}/txs/chain'
+    MEMPOOL = f'/address/{ADDRESS}/txs/mempool'
+
+    def test_follows_chain_pagination(self):
+        first_page = [tx(f'c{i}', 10, block_height=100 - i) for i in range(25)]
+        second_page = [tx(f'd{i}', 100, address=OTHER_ADDRESS, block_height=50 - i) for i in range(23)] + [tx('old', 1000, block_height=1)]
+        http_client = StubHttpClient({
+            self.STATS: stats(49, mempool_tx_count=1),
+            self.CHAIN: first_page,
+            f'{self.CHAIN}/c24': second_page,
+            self.MEMPOOL: [tx('mempool', 1)],
+        })
+
+        credits = StubEsploraExplorer(http_client).get_address_credits(ADDRESS, current_height=100)
+
+        assert http_client.requested == [self.STATS, self.CHAIN, f'{self.CHAIN}/c24', self.MEMPOOL]
+        assert len(credits.all()) == 27
+        assert sum(credit.value() * 10**8 for credit in credits.all()) == 1 + 25 * 10 + 1000
+        assert len(credits.unconfirmed_non_replaceable()) == 1
+
+    def test_settled_address_costs_only_the_stats_request(self):
+        http_client = StubHttpClient({self.STATS: stats(2), self.CHAIN: [tx('b', 20, block_height=90), tx('a', 10, block_height=80)]})
+        explorer = StubEsploraExplorer(http_client)
+        first = explorer.get_address_credits(ADDRESS, current_height=100)
+
+        http_client.requested.clear()
+        second = explorer.get_address_credits(ADDRESS, current_height=101)
+
+        assert http_client.requested == [self.STATS]
+        assert second == first.at_height(101)
+
+    def test_fetches_only_txs_confirmed_after_the_last_seen_one(self):
+        http_client = StubHttpClient({self.STATS: stats(1), self.CHAIN: [tx('a', 10, block_height=80)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.get_address_credits(ADDRESS, current_height=100)
+
+        http_client.pages[self.STATS] = stats(3, mempool_tx_count=1)
+        http_client.pages[self.CHAIN] = [tx('c', 30, block_height=101), tx('b', 20, block_height=100), tx('a', 10, block_height=80)]
+        http_client.pages[self.MEMPOOL] = [tx('d', 40)]
+        http_client.requested.clear()
+        credits = explorer.get_address_credits(ADDRESS, current_height=101)
+
+        assert http_client.requested == [self.STATS, self.CHAIN, self.MEMPOOL]
+        assert sorted(credit.value() * 10**8 for credit in credits.all()) == [10, 20, 30, 40]
+        assert len(credits.confirmed_1()) == 3
+
+    def test_resyncs_when_the_last_seen_tx_is_reorged_out(self):
+        http_client = StubHttpClient({self.STATS: stats(1), self.CHAIN: [tx('a', 10, block_height=100)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.get_address_credits(ADDRESS, current_height=100)
+
+        http_client.pages[self.STATS] = stats(2)
+        http_client.pages[self.CHAIN] = [tx('b', 20, block_height=101), tx('a2', 10, block_height=100)]
+        credits = explorer.get_address_credits(ADDRESS, current_height=101)
+
+        assert sorted(credit.value() * 10**8 for credit in credits.all()) == [10, 20]
+
+    def test_resyncs_when_the_tip_goes_below_the_last_seen_tx(self):
+        http_client = StubHttpClient({self.STATS: stats(1), self.CHAIN: [tx('a', 10, block_height=100)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.get_address_credits(ADDRESS, current_height=100)
+
+        http_client.pages[self.CHAIN] = [tx('a', 10, block_height=99)]
+        credits = explorer.get_address_credits(ADDRESS, current_height=99)
+
+        assert credits.all()[0].confirmed_height() == 99
+
+    def test_resyncs_when_a_reorg_keeps_the_tx_count(self):
+        http_client = StubHttpClient({self.STATS: stats(2), self.CHAIN: [tx('b', 20, block_height=100), tx('a', 10, block_height=99)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.get_address_credits(ADDRESS, current_height=100)
+
+        # The reorg re-mined 'b' one block later and replaced 'a' with a conflicting 'a2'
+        http_client.pages[self.CHAIN] = [tx('b', 20, block_height=101), tx('a2', 15, block_height=100)]
+        http_client.requested.clear()
+        credits = explorer.get_address_credits(ADDRESS, current_height=101)
+
+        assert http_client.requested == [self.STATS, self.CHAIN, self.CHAIN]
+        assert sorted((credit.value() * 10**8, credit.confirmed_height()) for credit in credits.all()) == [(15, 100), (20, 101)]
+
+    def test_recent_history_is_rechecked_once_per_tip(self):
+        http_client = StubHttpClient({self.STATS: stats(1), self.CHAIN: [tx('a', 10, block_height=100)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.get_address_credits(ADDRESS, current_height=100)
+
+        http_client.requested.clear()
+        explorer.get_address_credits(ADDRESS, current_height=100)
+        explorer.get_address_credits(ADDRESS, current_height=101)
+        explorer.get_address_credits(ADDRESS, current_height=101)
+
+        assert http_client.requested == [self.STATS, self.STATS, self.CHAIN, self.STATS]
+
+    def test_address_without_transactions_needs_no_tx_requests(self):
+        http_client = StubHttpClient({self.STATS: stats(0)})
+        assert StubEsploraExplorer(http_client).get_address_credits(ADDRESS, current_height=100).all() == []
+        assert http_client.requested == [self.STATS]
+
+    def test_oversized_response_raises_and_is_not_read_to_the_end(self):
+        http_client = StubHttpClient({self.STATS: stats(20), self.CHAIN: [tx(f'c{i}', 10, block_height=100) for i in range(20)]})
+        explorer = StubEsploraExplorer(http_client, max_response_bytes=200)
+
+        with pytest.raises(AddressHistoryTooLarge):
+            explorer.get_address_credits(ADDRESS, current_height=100)
+        assert http_client.responses[-1].chunks_read <= 200 // 7 + 1
+
+    def test_too_many_pages_raises(self):
+        http_client = StubHttpClient({self.STATS: stats(100), self.CHAIN: [tx(f'c{i}', 10, block_height=100) for i in range(25)]})
+        explorer = StubEsploraExplorer(http_client)
+        explorer.MAX_PAGES = 1
+
+        with pytest.raises(AddressHistoryTooLarge):
+            explorer.get_address_credits(ADDRESS, current_height=100)
+
+    def test_malformed_response_is_an_error(self):
+        http_client = StubHttpClient({self.STATS: stats(1), self.CHAIN: [{'txid': 'no status'}]})
+        assert StubEsploraExplorer(http_client).get_address_credits(ADDRESS, current_height=100) is None
+
+    def test_malformed_stats_is_an_error(self):
+        http_client = StubHttpClient({self.STATS: {'error': 'rate limited'}})
+        assert StubEsploraExplorer(http_client).get_address_credits(ADDRESS, current_height=100) is None
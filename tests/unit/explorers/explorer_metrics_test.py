@@ -0,0 +1,58 @@
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetrics
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class FakeClockExplorerMetrics(ExplorerMetrics):
+
+    def __init__(self, name):
+        super().__init__(name)
+        self.now = 1000.0
+
+    def _now(self) -> float:
+        return self.now
+
+
+class ExplorerMetricsTest(CypherpunkpayTestCase):
+
+    def test_rolling_rates_and_latency_percentiles(self):
+        metrics = ExplorerMetrics('A')
+        for latency in range(1, 11):
+            metrics.record_success(float(latency))
+        metrics.record_failure(20.0)
+        metrics.record_agreement(True)
+        metrics.record_agreement(False)
+
+        assert metrics.success_rate() == 10 / 11
+        assert metrics.latency_percentile(50) == 6.0
+        assert metrics.latency_percentile(95) == 20.0
+        assert metrics.disagreement_rate() == 0.5
+
+    def test_quarantined_after_failures_in_a_row_until_success(self):
+        metrics = FakeClockExplorerMetrics('A')
+        metrics.record_failure(1.0)
+        assert not metrics.is_quarantined()
+        metrics.record_failure(1.0)
+        assert metrics.is_quarantined()
+        assert metrics.weight() == 0.0
+
+        metrics.now += ExplorerMetrics.QUARANTINE_SECONDS
+        assert not metrics.is_quarantined()
+        metrics.record_failure(1.0)
+        assert metrics.is_quarantined()
+        metrics.now += ExplorerMetrics.QUARANTINE_SECONDS
+        assert metrics.is_quarantined()  # doubled
+
+        metrics.record_success(1.0)
+        assert not metrics.is_quarantined()
+
+    def test_weight_favours_healthy_explorers(self):
+        healthy, slow, flaky = ExplorerMetrics('healthy'), ExplorerMetrics('slow'), ExplorerMetrics('flaky')
+        for _ in range(4):
+            healthy.record_success(0.5)
+            slow.record_success(8.0)
+            flaky.record_success(0.5)
+            flaky.record_failure(0.5)
+            flaky.record_success(0.5)
+        assert healthy.weight() > slow.weight() >= ExplorerMetrics.MIN_WEIGHT
+        assert healthy.weight() > flaky.weight()
+        assert ExplorerMetrics('unmeasured').weight() == 1.0
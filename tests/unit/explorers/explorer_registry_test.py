@@ -0,0 +1,32 @@
+from cypherpunkpay.explorers.bitcoin.blockstream_explorer import BlockstreamExplorer
+from cypherpunkpay.explorers.explorer_registry import ExplorerRegistry, UnknownExplorer
+from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class ExplorerRegistryTest(CypherpunkpayTestCase):
+
+    BLOCKSTREAM = 'cypherpunkpay.explorers.bitcoin.blockstream_explorer BlockstreamExplorer'
+
+    def test_resolves_supported_explorers_only(self):
+        registry = ExplorerRegistry()
+        assert registry.resolve(self.BLOCKSTREAM) is BlockstreamExplorer
+        assert registry.resolve('os system') is None
+        assert registry.resolve(None) is None
+        assert registry.unknown_of([self.BLOCKSTREAM, 'cypherpunkpay.explorers.bitcoin.gone_explorer GoneExplorer', None]) == ['cypherpunkpay.explorers.bitcoin.gone_explorer GoneExplorer']
+
+    def test_reuses_instances(self):
+        registry = ExplorerRegistry()
+        http_client = DummyHttpClient()
+        explorer = registry.instance(self.BLOCKSTREAM, http_client, 'mainnet', True)
+        assert isinstance(explorer, BlockstreamExplorer)
+        assert explorer.mainnet()
+        assert registry.instance(self.BLOCKSTREAM, http_client, 'mainnet', True) is explorer
+        assert registry.instance(self.BLOCKSTREAM, http_client, 'testnet', True) is not explorer
+
+    def test_unknown_explorer_raises(self):
+        try:
+            ExplorerRegistry().instance('os system', DummyHttpClient(), 'mainnet', True)
+            assert False
+        except UnknownExplorer:
+            pass
@@ -0,0 +1,158 @@
+import pytest
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.full_node_clients.bitcoin_core_client import BitcoinCoreClient, WalletHistory
+from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcError
+from cypherpunkpay.models.credit import Credit
+from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
+
+from tests.unit.full_node_clients.stub_json_rpc_http_client import StubJsonRpcHttpClient
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class StubJsonRpcClient(object):
+
+    def __init__(self, transactions, removed=None, lastblock='00ff'):
+        self.calls = []
+        self._transactions = transactions
+        self._removed = removed or []
+        self._lastblock = lastblock
+
+    def listsinceblock(self, *args):
+        self.calls.append(args)
+        if self._transactions is None:
+            raise JsonRpcError('Block not found')
+        return {'transactions': self._transactions, 'removed': self._removed, 'lastblock': self._lastblock}
+
+
+class BitcoinCoreClientTest(CypherpunkpayTestCase):
+
+    ADDRESS_1 = 'tb1q9gnjmsu52696ntv73g3qkn347rpu0hga7djsky'
+    ADDRESS_2 = 'tb1qwqfmw0s5gjc8z57wp8s5afdjee4mm4zf5a65hr'
+
+    def setup_method(self):
+        WalletHistory.forget_shared()
+
+    def client_with(self, transactions) -> BitcoinCoreClient:
+        client = BitcoinCoreClient('http://127.0.0.1:18332', rpc_user='bitcoin', rpc_password='secret', http_client=DummyHttpClient())
+        client._json_rpc_client = StubJsonRpcClient(transactions)
+        return client
+
+    def test_get_all_address_credits(self):
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 3, 'blockheight': 98, 'bip125-replaceable': 'no'},
+            {'txid': 'a2', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.002'), 'confirmations': 0, 'bip125-replaceable': 'yes'},
+            {'txid': 'a3', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.004'), 'confirmations': -2, 'bip125-replaceable': 'no'},  # conflicted
+            {'txid': 'b1', 'vout': 1, 'address': self.ADDRESS_2, 'category': 'receive', 'amount': Decimal('0.5'), 'confirmations': 0, 'bip125-replaceable': 'unknown'},
+            {'txid': 'b2', 'vout': 0, 'address': self.ADDRESS_2, 'category': 'send', 'amount': Decimal('-0.1'), 'confirmations': 1, 'blockheight': 100},
+        ])
+
+        all_credits = client.get_all_address_credits('fingerprint', current_height=100)
+
+        # One round trip for the whole wallet
+        assert len(client._json_rpc_client.calls) == 1
+        assert client._json_rpc_client.calls[0][-1] == '/wallet/cypherpunkpay-wallet-fingerprint'
+
+        credits_1 = all_credits[self.ADDRESS_1]
+        assert credits_1.blockchain_height() == 100
+        assert credits_1.confirmed_1() == [Credit.confirmed(Decimal('0.001'), 98)]
+        assert credits_1.unconfirmed_replaceable() == [Credit.unconfirmed(Decimal('0.002'))]
+        assert len(credits_1.all()) == 2
+
+        credits_2 = all_credits[self.ADDRESS_2]
+        assert credits_2.unconfirmed_replaceable() == [Credit.unconfirmed(Decimal('0.5'))]
+
+    def test_get_address_credits_for_address_without_transactions(self):
+        client = self.client_with([])
+        credits = client.get_address_credits('fingerprint', self.ADDRESS_1, current_height=100)
+        assert credits.all() == []
+        assert credits.blockchain_height() == 100
+
+    def test_get_height_and_all_address_credits_is_single_batch(self):
+        http_client = StubJsonRpcHttpClient(responses={
+            'getblockcount': 100,
+            'listsinceblock': {'transactions': [
+                {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': 0.001, 'confirmations': 2, 'blockheight': 99, 'bip125-replaceable': 'no'}
+            ], 'removed': [], 'lastblock': '00ff'}
+        })
+        client = BitcoinCoreClient('http://127.0.0.1:18332', rpc_user='bitcoin', rpc_password='secret', http_client=http_client)
+
+        height, all_credits = client.get_height_and_all_address_credits('fingerprint')
+
+        assert height == 100
+        assert all_credits[self.ADDRESS_1].confirmed_n(2) == [Credit.confirmed(Decimal('0.001'), 99)]
+        assert http_client.urls == ['http://127.0.0.1:18332/wallet/cypherpunkpay-wallet-fingerprint']
+
+    def test_with_history_only_changes_since_last_block_are_fetched(self):
+        history = WalletHistory()
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 10, 'blockheight': 91, 'bip125-replaceable': 'no'},
+            {'txid': 'a2', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.002'), 'confirmations': 0, 'bip125-replaceable': 'no'},
+        ])
+        client.get_all_address_credits('fingerprint', current_height=100, history=history)
+        assert client._json_rpc_client.calls[0][:2] == (None, WalletHistory.REORG_SAFETY_CONFIRMATIONS)
+
+        # a1 is too deep to be reported again, a2 got confirmed
+        client._json_rpc_client = StubJsonRpcClient([
+            {'txid': 'a2', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.002'), 'confirmations': 1, 'blockheight': 101, 'bip125-replaceable': 'no'},
+        ], lastblock='01ff')
+        all_credits = client.get_all_address_credits('fingerprint', current_height=101, history=history)
+
+        assert client._json_rpc_client.calls[0][0] == '00ff'
+        assert history.last_block == '01ff'
+        assert all_credits[self.ADDRESS_1].confirmed_1() == [Credit.confirmed(Decimal('0.001'), 91), Credit.confirmed(Decimal('0.002'), 101)]
+
+    def test_with_history_reorged_out_and_dropped_transactions_are_forgotten(self):
+        history = WalletHistory()
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 1, 'blockheight': 100, 'bip125-replaceable': 'no'},
+            {'txid': 'a2', 'vout': 0, 'address': self.ADDRESS_2, 'category': 'receive', 'amount': Decimal('0.002'), 'confirmations': 0, 'bip125-replaceable': 'yes'},
+        ])
+        client.get_all_address_credits('fingerprint', current_height=100, history=history)
+
+        # Block 100 got replaced without a1 and a2 left the mempool
+        client._json_rpc_client = StubJsonRpcClient([], removed=[
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 0, 'bip125-replaceable': 'no'},
+        ])
+        all_credits = client.get_all_address_credits('fingerprint', current_height=100, history=history)
+
+        assert all_credits == {}
+
+    def test_without_history_calls_share_the_wallet_history(self):
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 10, 'blockheight': 91, 'bip125-replaceable': 'no'},
+        ])
+        client.get_address_credits('fingerprint', self.ADDRESS_1, current_height=100)
+
+        client._json_rpc_client = StubJsonRpcClient([])
+        credits = client.get_address_credits('fingerprint', self.ADDRESS_1, current_height=100)
+
+        assert client._json_rpc_client.calls[0][0] == '00ff'
+        assert credits.confirmed_1() == [Credit.confirmed(Decimal('0.001'), 91)]
+
+    def test_history_forgets_credits_deeper_than_charges_are_refreshed(self):
+        history = WalletHistory()
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 10, 'blockheight': 91, 'bip125-replaceable': 'no'},
+            {'txid': 'a2', 'vout': 0, 'address': self.ADDRESS_2, 'category': 'receive', 'amount': Decimal('0.002'), 'confirmations': 1, 'blockheight': 100, 'bip125-replaceable': 'no'},
+        ])
+        client.get_all_address_credits('fingerprint', current_height=100, history=history)
+
+        client._json_rpc_client = StubJsonRpcClient([])
+        all_credits = client.get_all_address_credits('fingerprint', current_height=91 + WalletHistory.PRUNE_AFTER_CONFIRMATIONS, history=history)
+
+        assert set(all_credits) == {self.ADDRESS_2}
+
+    def test_history_starts_over_after_rpc_error(self):
+        history = WalletHistory()
+        client = self.client_with([
+            {'txid': 'a1', 'vout': 0, 'address': self.ADDRESS_1, 'category': 'receive', 'amount': Decimal('0.001'), 'confirmations': 1, 'blockheight': 100, 'bip125-replaceable': 'no'},
+        ])
+        client.get_all_address_credits('fingerprint', current_height=100, history=history)
+
+        client._json_rpc_client = StubJsonRpcClient(None)
+        with pytest.raises(JsonRpcError):
+            client.get_all_address_credits('fingerprint', current_height=100, history=history)
+
+        assert history.last_block is None
+        assert history.address_credits(100) == {}
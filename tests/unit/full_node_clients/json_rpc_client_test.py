@@ -0,0 +1,57 @@
+import pytest
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.full_node_clients.json_rpc_client import JsonRpcClient, JsonRpcCallError
+
+from tests.unit.full_node_clients.stub_json_rpc_http_client import StubJsonRpcHttpClient
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class JsonRpcClientTest(CypherpunkpayTestCase):
+
+    def test_single_call(self):
+        http_client = StubJsonRpcHttpClient(responses={'getblockcount': 100})
+        client = JsonRpcClient('http://127.0.0.1:18332', http_client=http_client)
+        assert client.getblockcount() == 100
+        assert client.getblockcount() == 100
+        assert len(http_client.urls) == 2
+
+    def test_method_proxies_are_memoized(self):
+        client = JsonRpcClient('http://127.0.0.1:18332', http_client=StubJsonRpcHttpClient(responses={}))
+        assert client.getblockcount is client.getblockcount
+
+    def test_batch_sends_single_post_and_demultiplexes_by_id(self):
+        http_client = StubJsonRpcHttpClient(responses={'getblockcount': 100, 'getblockhash': '00ff', 'getbestblockhash': '00aa'})
+        client = JsonRpcClient('http://127.0.0.1:18332', http_client=http_client)
+
+        with client.batch() as batch:
+            count = batch.getblockcount()
+            block_hash = batch.getblockhash(100)
+            best = batch.getbestblockhash()
+
+        assert len(http_client.urls) == 1
+        assert count.result() == 100
+        assert block_hash.result() == '00ff'
+        assert best.result() == '00aa'
+
+    def test_batch_raises_per_call_errors(self):
+        http_client = StubJsonRpcHttpClient(responses={'getblockcount': 100}, errors={'getblockhash': {'code': -8, 'message': 'Block height out of range'}})
+        client = JsonRpcClient('http://127.0.0.1:18332', http_client=http_client)
+
+        with client.batch() as batch:
+            count = batch.getblockcount()
+            block_hash = batch.getblockhash(1_000_000_000)
+
+        assert count.result() == 100
+        with pytest.raises(JsonRpcCallError):
+            block_hash.result()
+
+    def test_batch_mixing_node_and_wallet_calls_goes_to_wallet_endpoint(self):
+        http_client = StubJsonRpcHttpClient(responses={'getblockcount': 100, 'getwalletinfo': {'txcount': 0}})
+        client = JsonRpcClient('http://127.0.0.1:18332', http_client=http_client)
+
+        with client.batch() as batch:
+            batch.getblockcount()
+            batch.getwalletinfo('/wallet/cypherpunkpay-wallet-abcd')
+
+        assert http_client.urls == ['http://127.0.0.1:18332/wallet/cypherpunkpay-wallet-abcd']
@@ -0,0 +1,34 @@
+import requests
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.net.http_client.base_http_client import BaseHttpClient
+
+
+class StubJsonRpcHttpClient(BaseHttpClient):
+    """ Answers JSON-RPC requests (single or batched) with canned results by method name """
+
+    def __init__(self, responses: Dict, errors: Dict = None):
+        self.responses = responses
+        self.errors = errors or {}
+        self.urls = []
+
+    def get(self, url, privacy_context, headers: dict = None, set_tor_browser_headers: bool = True, verify=None):
+        raise requests.exceptions.RequestException
+
+    def post(self, url, privacy_context, headers: dict = None, body: str = None, set_tor_browser_headers: bool = True, verify=None):
+        self.urls.append(url)
+        payload = json.loads(body)
+        if isinstance(payload, List):
+            answer = [self._answer(request_d) for request_d in reversed(payload)]  # reversed because order is not guaranteed
+        else:
+            answer = self._answer(payload)
+        response = requests.Response()
+        response.status_code = 200
+        response._content = json.dumps(answer).encode('utf8')
+        return response
+
+    def _answer(self, request_d):
+        method = request_d['method']
+        if method in self.errors:
+            return {'result': None, 'error': self.errors[method], 'id': request_d['id']}
+        return {'result': self.responses[method], 'error': None, 'id': request_d['id']}
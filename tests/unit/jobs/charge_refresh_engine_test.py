@@ -0,0 +1,91 @@
+from cypherpunkpay.globals import *
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
+
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class FakeClockChargeRefreshEngine(ChargeRefreshEngine):
+
+    def __init__(self, refresh_charge, **kwargs):
+        super().__init__(refresh_charge=refresh_charge, **kwargs)
+        self.now = 1000.0
+
+    def _now(self) -> float:
+        return self.now
+
+
+class ChargeRefreshEngineTest(CypherpunkpayTestCase):
+
+    def setup_method(self):
+        self.refreshed = []
+        self.engine = FakeClockChargeRefreshEngine(refresh_charge=self.refreshed.append, max_workers=1)
+
+    def teardown_method(self):
+        self.engine.shutdown()
+
+    def tick_and_wait(self) -> int:
+        dispatched = self.engine.tick()
+        if self.engine._executor:
+            self.engine._executor.submit(lambda: None).result()  # single worker so this runs after dispatched refreshes
+        return dispatched
+
+    def test_dispatches_only_due_charges(self):
+        self.engine.track('a', timedelta(seconds=2), first_run_in=timedelta(seconds=1))
+        self.engine.track('b', timedelta(seconds=30), first_run_in=timedelta(seconds=10))
+
+        self.assertEqual(0, self.tick_and_wait())
+
+        self.engine.now += 1
+        self.assertEqual(1, self.tick_and_wait())
+        self.assertEqual(['a'], self.refreshed)
+
+        self.engine.now += 10
+        self.assertEqual(2, self.tick_and_wait())
+        self.assertEqual(['a', 'a', 'b'], sorted(self.refreshed))
+
+    def test_untracked_charges_are_not_dispatched(self):
+        self.engine.track('a', timedelta(seconds=2), first_run_in=timedelta(seconds=0))
+        self.engine.untrack('a')
+        self.assertEqual(0, self.tick_and_wait())
+        self.assertEqual(0, self.engine.tracked_count())
+
+    def test_track_is_idempotent_but_picks_up_shorter_interval(self):
+        self.engine.track('a', timedelta(minutes=30), first_run_in=timedelta(minutes=30))
+        self.engine.track('a', timedelta(minutes=30), first_run_in=timedelta(seconds=0))
+        self.assertEqual(0, self.tick_and_wait())
+
+        self.engine.track('a', timedelta(seconds=2))
+        self.engine.now += 2
+        self.assertEqual(1, self.tick_and_wait())
+        self.assertEqual(timedelta(seconds=2), self.engine.interval_for('a'))
+
+    def test_refresh_now_makes_charges_due(self):
+        self.engine.track('a', timedelta(minutes=30), first_run_in=timedelta(minutes=30))
+        self.engine.track('b', timedelta(minutes=30), first_run_in=timedelta(minutes=30))
+        self.engine.refresh_now(['a', 'untracked'])
+        self.assertEqual(1, self.tick_and_wait())
+        self.assertEqual(['a'], self.refreshed)
+        self.assertEqual(timedelta(minutes=30), self.engine.interval_for('a'))
+
+    def test_batch_size_limits_dispatch_and_reports_lag(self):
+        engine = FakeClockChargeRefreshEngine(refresh_charge=lambda uid: None, max_workers=4, batch_size=3)
+        for i in range(10):
+            engine.track(str(i), timedelta(seconds=2), first_run_in=timedelta(seconds=0))
+        engine.now += 5
+        self.assertEqual(5.0, engine.lag())
+        self.assertEqual(3, engine.tick())
+        self.assertEqual(10, engine.tracked_count())
+        engine.shutdown()
+
+    def test_exceptions_do_not_break_the_engine(self):
+        def failing(charge_uid):
+            raise Exception('boom')
+        self.engine._refresh_charge = failing
+        self.engine.track('a', timedelta(seconds=2), first_run_in=timedelta(seconds=0))
+        self.assertEqual(1, self.tick_and_wait())
+        self.assertEqual(0, self.engine.queue_depth())
+
+    def test_heap_stays_bounded_under_rescheduling(self):
+        for i in range(1000):
+            self.engine.track('a', timedelta(seconds=2 + i % 2))
+        assert len(self.engine._heap) <= 2 * self.engine.tracked_count() + 65
@@ -0,0 +1,52 @@
+from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.models.address_credits_cache import AddressCreditsCache
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.models.credit import Credit
+from cypherpunkpay.usecases.update_charge_jobs_uc import UpdateChargeJobsUC
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class FakeClockAddressCreditsCache(AddressCreditsCache):
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.now = 1000.0
+
+    def _now(self) -> float:
+        return self.now
+
+
+class AddressCreditsCacheTest(CypherpunkpayTestCase):
+
+    CREDITS = AddressCredits([Credit.unconfirmed(1)], 100)
+
+    def test_hit_within_same_height_and_ttl(self):
+        cache = FakeClockAddressCreditsCache(mempool_ttl_seconds=5)
+        cache.put('explorer', 'address', 100, self.CREDITS)
+        cache.now += 5
+        assert cache.get('explorer', 'address', 100) is self.CREDITS
+        self.assertEqual(1, cache.hits)
+
+    def test_miss_on_other_height_source_or_after_ttl(self):
+        cache = FakeClockAddressCreditsCache(mempool_ttl_seconds=5)
+        cache.put('explorer', 'address', 100, self.CREDITS)
+        assert cache.get('explorer', 'address', 101) is None
+        assert cache.get('other_explorer', 'address', 100) is None
+        cache.now += 6
+        assert cache.get('explorer', 'address', 100) is None
+        self.assertEqual(3, cache.misses)
+        self.assertEqual(0, len(cache))
+
+    def test_evicts_least_recently_used(self):
+        cache = FakeClockAddressCreditsCache(max_entries=2)
+        cache.put('explorer', 'a', 100, self.CREDITS)
+        cache.put('explorer', 'b', 100, self.CREDITS)
+        cache.get('explorer', 'a', 100)
+        cache.put('explorer', 'c', 100, self.CREDITS)
+        assert cache.get('explorer', 'a', 100) is self.CREDITS
+        assert cache.get('explorer', 'b', 100) is None
+        self.assertEqual(1, cache.evictions)
+
+    def test_mempool_ttl_is_shorter_than_awaiting_payment_refresh(self):
+        awaiting_interval = UpdateChargeJobsUC(engine=None, db=None)._interval_for_charge(ExampleCharge.create(status='awaiting', pay_status='unpaid'))
+        assert AddressCreditsCache.MEMPOOL_TTL_SECONDS < awaiting_interval.total_seconds()
@@ -46,3 +46,17 @@ class ChargeTest:
 
         charge = ExampleCharge.create(beneficiary='Tesla', what_for='Model S', merchant_order_id='437')
         assert 'Tesla, Model S, charge ' in charge.description
+
+    def test_tracks_changed_fields(self):
+        charge = ExampleCharge.create()
+        assert not charge.is_persisted()
+        assert 'uid' in charge.changed_fields()
+
+        charge.mark_persisted()
+        assert charge.is_persisted()
+        assert charge.changed_fields() == set()
+
+        charge.confirmations = charge.confirmations  # same value
+        charge.pay_status = 'paid'
+        charge.subsequent_discrepancies += 1
+        assert charge.changed_fields() == {'pay_status', 'subsequent_discrepancies'}
@@ -0,0 +1,31 @@
+from cypherpunkpay.models.coin_networks import CoinNetworks
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+
+class CoinNetworksTest(CypherpunkpayDBTestCase):
+
+    def test_update_returns_previous_height(self):
+        coin_networks = CoinNetworks({'btc': 'testnet', 'xmr': 'stagenet'})
+        assert coin_networks.update_current_height('btc', 100) == 0
+        assert coin_networks.update_current_height('BTC', 101) == 100
+        assert coin_networks.get_current_height('btc') == 101
+        assert coin_networks.get_current_height('xmr') == 0
+
+    def test_persists_changed_heights_only(self):
+        coin_networks = CoinNetworks({'btc': 'testnet', 'xmr': 'stagenet'})
+        coin_networks.update_current_height('btc', 654_001)
+        assert coin_networks.persist(self.db) == 1
+        assert coin_networks.persist(self.db) == 0
+        coin_networks.update_current_height('btc', 654_001)
+        assert coin_networks.persist(self.db) == 0
+
+        assert self.db.get_blockchain_height('btc', 'testnet') == 654_001
+        assert self.db.get_blockchain_height('btc', 'mainnet') == 0
+        assert self.db.get_blockchain_height('xmr', 'stagenet') == 0
+
+    def test_load(self):
+        self.db.update_blockchain_height('xmr', 'stagenet', 2_954_001)
+        coin_networks = CoinNetworks({'btc': 'testnet', 'xmr': 'stagenet'})
+        coin_networks.load(self.db)
+        assert coin_networks.get_current_height('xmr') == 2_954_001
+        assert coin_networks.persist(self.db) == 0
@@ -0,0 +1,112 @@
+import requests
+
+from cypherpunkpay.net.tor_client.base_tor_circuits import BaseTorCircuits
+from cypherpunkpay.net.tor_client.official_tor_circuits import OfficialTorCircuits
+from tests.unit.config.example_config import ExampleConfig
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class PoolSizeConfig(ExampleConfig):
+
+    def tor_circuits_pool_size(self) -> int:
+        return 2
+
+
+class StubOfficialTorCircuits(OfficialTorCircuits):
+    """ Never touches Tor; warm-ups take 3 fake seconds """
+
+    def __init__(self, config=None):
+        super().__init__(config or PoolSizeConfig())
+        self.now = 1000.0
+        self.warm_up_fails = False
+
+    def _warm_up(self, session):
+        if self.warm_up_fails:
+            raise requests.exceptions.ConnectionError('circuit failed')
+        self.now += 3.0
+
+    def _now(self) -> float:
+        return self.now
+
+
+class OfficialTorCircuitsPoolTest(CypherpunkpayTestCase):
+
+    def test_new_privacy_context_claims_warm_session(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.refill_pool()
+
+        session_a = circuits.get_for('address_a')
+        session_b = circuits.get_for('address_b')
+        session_c = circuits.get_for('address_c')
+
+        assert circuits.get_for('address_a') is session_a
+        assert len({id(session_a), id(session_b), id(session_c)}) == 3
+        assert (circuits.pool_hits, circuits.pool_misses) == (2, 1)
+        assert circuits.pool_hit_rate() == 2 / 3
+        assert circuits.build_time_percentile(50) == 3.0
+
+    def test_sessions_use_distinct_random_isolation_labels(self):
+        circuits = StubOfficialTorCircuits()
+        proxy_a = circuits.get_for('address_a').proxies['https']
+        proxy_b = circuits.get_for('address_b').proxies['https']
+        assert proxy_a != proxy_b
+        assert 'address_a' not in proxy_a
+
+    def test_skip_tor_gets_no_proxy_and_no_warm_session(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.refill_pool()
+        assert not circuits.get_for(BaseTorCircuits.SKIP_TOR).proxies
+        assert (circuits.pool_hits, circuits.pool_misses) == (0, 0)
+
+    def test_refill_only_tops_up(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.refill_pool()
+        circuits.get_for('address_a')
+        circuits.refill_pool()
+        assert len(circuits._warm) == 2
+        assert len(circuits._build_times) == 3
+
+    def test_stale_warm_sessions_are_not_claimed(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.refill_pool()
+        circuits.now += OfficialTorCircuits.WARM_MAX_AGE_SECONDS + 10
+        circuits.get_for('address_a')
+        assert (circuits.pool_hits, circuits.pool_misses) == (0, 1)
+        assert len(circuits._warm) == 0
+
+    def test_failed_warm_ups_are_counted_and_not_pooled(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.warm_up_fails = True
+        circuits.refill_pool()
+        assert circuits.build_failures == 2
+        assert len(circuits._warm) == 0
+        assert circuits._building == 0
+
+    def test_idle_sessions_are_evicted(self):
+        circuits = StubOfficialTorCircuits()
+        session_a = circuits.get_for('address_a')
+        circuits.now += OfficialTorCircuits.IDLE_SECONDS / 2
+        circuits.get_for('address_b')
+        circuits.now += OfficialTorCircuits.IDLE_SECONDS / 2 + 1
+        circuits.refill_pool()
+
+        assert 'address_a' not in circuits._sessions
+        assert 'address_b' in circuits._sessions
+        assert circuits.evictions == 1
+        assert circuits.get_for('address_a') is not session_a
+
+    def test_least_recently_used_session_is_evicted_over_the_limit(self):
+        circuits = StubOfficialTorCircuits()
+        circuits.MAX_SESSIONS = 2
+        circuits.get_for('address_a')
+        circuits.get_for('address_b')
+        circuits.get_for('address_a')
+        circuits.get_for('address_c')
+        assert list(circuits._sessions) == ['address_a', 'address_c']
+
+    def test_broken_session_is_replaced(self):
+        circuits = StubOfficialTorCircuits()
+        session = circuits.get_for('address_a')
+        circuits.mark_as_broken('address_a')
+        circuits.mark_as_broken('never_seen')
+        assert circuits.get_for('address_a') is not session
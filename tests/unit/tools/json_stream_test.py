@@ -0,0 +1,19 @@
+import json
+
+import pytest
+
+from cypherpunkpay.tools.json_stream import iter_json_array
+
+
+class JsonStreamTest:
+
+    def test_iter_json_array(self):
+        assert list(iter_json_array('[]')) == []
+        assert list(iter_json_array(' [ ] ')) == []
+        assert list(iter_json_array('[1]')) == [1]
+        assert list(iter_json_array('\n[ {"a": [1, 2]} ,\n"b", null ]\n')) == [{'a': [1, 2]}, 'b', None]
+
+    def test_iter_json_array_malformed(self):
+        for text in ['', '{}', '[1', '[1 2]', '[1,]']:
+            with pytest.raises(json.JSONDecodeError):
+                list(iter_json_array(text))
@@ -0,0 +1,63 @@
+from cypherpunkpay.globals import *
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.usecases.archive_charges_uc import ArchiveChargesUC
+from cypherpunkpay.usecases.list_charges_uc import ListChargesUC
+from cypherpunkpay.usecases.report_charges_uc import ReportChargesUC
+from tests.unit.config.example_config import ExampleConfig
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+
+class ArchiveChargesUCTest(CypherpunkpayDBTestCase):
+
+    def archive(self, batch_size=ArchiveChargesUC.BATCH_SIZE) -> int:
+        return ArchiveChargesUC(batch_size=batch_size, config=ExampleConfig(), db=self.db).exec()
+
+    def hot_uids(self):
+        return {row[0] for row in self.db._db.execute('SELECT uid FROM charges')}
+
+    def test_archives_old_final_charges_only(self):
+        old = utc_ago(days=31)
+        old_completed = ExampleCharge.db_create(self.db, status='completed', created_at=old)
+        old_expired = ExampleCharge.db_create(self.db, status='expired', created_at=old)
+        old_awaiting = ExampleCharge.db_create(self.db, status='awaiting', created_at=old)
+        old_merchant_not_notified = ExampleCharge.db_create(self.db, status='completed', created_at=old, merchant_order_id='order-1')
+        recent_completed = ExampleCharge.db_create(self.db, status='completed')
+
+        assert self.archive(batch_size=1) == 2
+
+        assert self.hot_uids() == {old_awaiting.uid, old_merchant_not_notified.uid, recent_completed.uid}
+        assert self.db.get_charge_by_uid(old_completed.uid).uid == old_completed.uid
+        assert self.db.get_charge_by_uid(old_expired.uid).status == 'expired'
+        assert self.archive() == 0
+
+    def test_archived_charges_stay_visible_and_counted(self):
+        old = utc_ago(days=31)
+        uids = [ExampleCharge.db_create(self.db, status='completed', created_at=old, activated_at=old).uid for _ in range(3)]
+        ExampleCharge.db_create(self.db, status='awaiting')
+        wallet_fingerprint = self.db.get_charge_by_uid(uids[0]).wallet_fingerprint
+        count_before = self.db.get_charges_count()
+        fingerprint_count_before = self.db.count_charges_where_wallet_fingerprint_is(wallet_fingerprint)
+        _, report_before = ReportChargesUC(self.db).exec()
+
+        self.archive()
+
+        assert self.db.get_charges_count() == count_before
+        assert self.db.count_charges_where_wallet_fingerprint_is(wallet_fingerprint) == fingerprint_count_before
+        _, report_after = ReportChargesUC(self.db).exec()
+        assert (report_after.completed, report_after.awaiting) == (report_before.completed, report_before.awaiting)
+        page = ListChargesUC(status='completed', db=self.db).exec()
+        assert sorted(c.uid for c in page.charges) == sorted(uids)
+
+    def test_saves_archived_charge(self):
+        old_charge = ExampleCharge.db_create(self.db, status='expired', created_at=utc_ago(days=31))
+        self.archive()
+
+        charge = self.db.get_charge_by_uid(old_charge.uid)
+        charge.status_fixed_manually = True
+        charge.advance_to_completed()
+        self.db.save(charge)
+
+        reloaded = self.db.get_charge_by_uid(old_charge.uid)
+        assert reloaded.is_completed()
+        assert reloaded.status_fixed_manually
+        assert old_charge.uid not in self.hot_uids()
@@ -1,4 +1,5 @@
 from cypherpunkpay.globals import *
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry
 from tests.unit.config.example_config import ExampleConfig
 from tests.unit.db_test_case import CypherpunkpayDBTestCase
 from cypherpunkpay.models.charge import ExampleCharge
@@ -68,3 +69,38 @@ class EnsureBlockExplorersUCTest(CypherpunkpayDBTestCase):
 
         # Most of the time both explorers should be reset
         assert good_luck > 2*50
+
+    def test_replaces_quarantined_explorer_right_away(self):
+        explorer_metrics = ExplorerMetricsRegistry()
+        explorer_metrics.get('MempoolExplorer').record_failure(1.0)
+        explorer_metrics.get('MempoolExplorer').record_failure(1.0)
+        charge = ExampleCharge.create()
+        charge.block_explorer_1 = 'cypherpunkpay.explorers.bitcoin.mempool_explorer MempoolExplorer'
+        charge.block_explorer_2 = 'cypherpunkpay.explorers.bitcoin.blockstream_explorer BlockstreamExplorer'
+        charge.subsequent_discrepancies = 1
+
+        assert EnsureBlockExplorersUC(charge, config=ExampleConfig(), explorer_metrics=explorer_metrics).exec()
+
+        assert charge.block_explorer_1 not in (
+            'cypherpunkpay.explorers.bitcoin.mempool_explorer MempoolExplorer',
+            'cypherpunkpay.explorers.bitcoin.blockstream_explorer BlockstreamExplorer'
+        )
+        assert charge.block_explorer_2 == 'cypherpunkpay.explorers.bitcoin.blockstream_explorer BlockstreamExplorer'
+        assert charge.subsequent_discrepancies == 0
+
+    def test_prefers_healthy_explorers(self):
+        explorer_metrics = ExplorerMetricsRegistry()
+        for klass in ExampleConfig().supported_explorers('btc'):
+            explorer_metrics.get(klass.__name__).record_success(0.5)
+        for _ in range(10):
+            explorer_metrics.get('TrezorExplorer').record_success(10.0)
+            explorer_metrics.get('TrezorExplorer').record_agreement(False)
+
+        picks = []
+        for i in range(200):
+            charge = ExampleCharge.create()
+            EnsureBlockExplorersUC(charge, config=ExampleConfig(), explorer_metrics=explorer_metrics).exec()
+            picks += [charge.block_explorer_1, charge.block_explorer_2]
+
+        trezor_picks = sum(1 for pick in picks if pick.endswith('TrezorExplorer'))
+        assert trezor_picks < len(picks) / len(ExampleConfig().supported_explorers('btc')) / 2
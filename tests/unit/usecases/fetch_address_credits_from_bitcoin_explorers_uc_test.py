@@ -1,8 +1,13 @@
+import time
+from threading import Event
+
 from tests.unit.config.example_config import ExampleConfig
-from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer, AddressHistoryTooLarge
 from cypherpunkpay.explorers.bitcoin.blockstream_explorer import BlockstreamExplorer
 from cypherpunkpay.explorers.bitcoin.trezor_explorer import TrezorExplorer
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry
 from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.models.address_credits_cache import AddressCreditsCache
 from cypherpunkpay.models.credit import Credit
 from tests.unit.db_test_case import CypherpunkpayDBTestCase
 from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
@@ -25,6 +30,23 @@ class StubBlockExplorer(BlockExplorer):
         pass
 
 
+class BlockingStubBlockExplorer(StubBlockExplorer):
+
+    def __init__(self, address_credits: [AddressCredits, None], release: Event):
+        super().__init__(address_credits)
+        self._release = release
+
+    def get_address_credits(self, address: str, current_height: int) -> [AddressCredits, None]:
+        self._release.wait(timeout=10)
+        return self._mock_address_credits
+
+
+class TooLargeStubBlockExplorer(StubBlockExplorer):
+
+    def get_address_credits(self, address: str, current_height: int) -> [AddressCredits, None]:
+        raise AddressHistoryTooLarge('over the limit')
+
+
 class StubFetchAddressCreditsFromExplorersUC(FetchAddressCreditsFromBitcoinExplorersUC):
 
     def __init__(self, address_credits_1, address_credits_2):
@@ -38,6 +60,9 @@ class StubFetchAddressCreditsFromExplorersUC(FetchAddressCreditsFromBitcoinExplo
         )
         self.stub_address_credits_1 = address_credits_1
         self.stub_address_credits_2 = address_credits_2
+        self._credits_cache = AddressCreditsCache()
+        self._explorer_metrics = ExplorerMetricsRegistry()
+        self._explorer_slots = {}
 
     def _instantiate_block_explorers(self):
         self.block_explorer_1 = StubBlockExplorer(self.stub_address_credits_1)
@@ -106,3 +131,107 @@ class FetchAddressCreditsFromBitcoinExplorersUCTest(CypherpunkpayDBTestCase):
         assert address_credits
         assert len(address_credits.all()) == 2
         assert address_credits.blockchain_height() == 2000
+
+    def test_when_one_None__does_not_wait_for_the_other(self):
+        release = Event()
+        uc = StubFetchAddressCreditsFromExplorersUC(None, None)
+        uc._instantiate_block_explorers = lambda: None
+        uc.block_explorer_1 = StubBlockExplorer(None)
+        uc.block_explorer_2 = BlockingStubBlockExplorer(AddressCredits([], 1000), release)
+        started_at = time.monotonic()
+        try:
+            assert uc.exec() is None
+            assert time.monotonic() - started_at < 5
+        finally:
+            release.set()
+
+    def test_when_deadline_exceeded__return_None(self):
+        release = Event()
+        uc = StubFetchAddressCreditsFromExplorersUC(None, None)
+        uc.DEADLINE_SECONDS = 0.1
+        uc._instantiate_block_explorers = lambda: None
+        uc.block_explorer_1 = StubBlockExplorer(AddressCredits([], 1000))
+        uc.block_explorer_2 = BlockingStubBlockExplorer(AddressCredits([], 1000), release)
+        try:
+            assert uc.exec() is None
+        finally:
+            release.set()
+
+    def test_answer_after_deadline_is_cached_but_not_counted_in_explorer_health(self):
+        release = Event()
+        uc = StubFetchAddressCreditsFromExplorersUC(None, None)
+        uc.DEADLINE_SECONDS = 0.05
+        uc._instantiate_block_explorers = lambda: None
+        uc.block_explorer_1 = StubBlockExplorer(AddressCredits([], 1000))
+        uc.block_explorer_2 = BlockingStubBlockExplorer(AddressCredits([], 1000), release)
+        try:
+            assert uc.exec() is None
+        finally:
+            release.set()
+
+        waited_since = time.monotonic()
+        while uc._credits_cache.get('AnotherExplorer', uc.address, uc.current_height) is None and time.monotonic() - waited_since < 5:
+            time.sleep(0.01)
+        assert uc._credits_cache.get('AnotherExplorer', uc.address, uc.current_height) is not None
+        metrics = uc._explorer_metrics.get('AnotherExplorer')
+        assert (metrics.success_count, metrics.failure_count) == (0, 0)
+        assert uc._explorer_metrics.get('SomeExplorer').success_count == 1
+
+    def test_repeat_lookup_served_from_cache(self):
+        uc = StubFetchAddressCreditsFromExplorersUC(
+            AddressCredits([Credit(1, None, False)], 1000),
+            AddressCredits([Credit(1, None, False)], 1000)
+        )
+        assert uc.exec()
+        uc.stub_address_credits_1 = None  # would fail if asked again
+        assert uc.exec()
+        self.assertEqual(2, uc._credits_cache.hits)
+
+    def test_hanging_explorer_does_not_starve_other_charges(self):
+        release = Event()
+        explorer_slots = {}
+        hanging_explorer = BlockingStubBlockExplorer(AddressCredits([], 1000), release)
+        try:
+            for _ in range(2 * FetchAddressCreditsFromBitcoinExplorersUC.MAX_CALLS_PER_EXPLORER):
+                uc = StubFetchAddressCreditsFromExplorersUC(None, None)
+                uc.DEADLINE_SECONDS = 0.05
+                uc._explorer_slots = explorer_slots
+                uc._instantiate_block_explorers = lambda: None
+                uc.block_explorer_1 = StubBlockExplorer(AddressCredits([], 1000))
+                uc.block_explorer_2 = hanging_explorer
+                started_at = time.monotonic()
+                assert uc.exec() is None
+                # Once its slots are taken by abandoned calls the hanging explorer is not called (nor waited for) at all
+                assert time.monotonic() - started_at < 1
+
+            # Abandoned calls never exceed the per-explorer limit ...
+            hanging_slots = explorer_slots['AnotherExplorer']
+            assert not hanging_slots.acquire(blocking=False)
+
+            # ... so healthy explorers still get a thread right away and answer within the deadline
+            uc = StubFetchAddressCreditsFromExplorersUC(AddressCredits([], 1000), AddressCredits([], 1000))
+            uc._explorer_slots = explorer_slots
+            uc._instantiate_block_explorers = lambda: None
+            uc.block_explorer_1 = StubBlockExplorer(AddressCredits([], 1000))
+            uc.block_explorer_2 = StubBlockExplorer(AddressCredits([], 1000))
+            uc._be2_name = lambda: 'HealthyExplorer'
+            started_at = time.monotonic()
+            assert uc.exec() is not None
+            assert time.monotonic() - started_at < 1
+        finally:
+            release.set()
+
+    def test_address_over_the_limits_does_not_count_against_the_explorer(self):
+        uc = StubFetchAddressCreditsFromExplorersUC(None, None)
+        uc._instantiate_block_explorers = lambda: None
+        uc.block_explorer_1 = StubBlockExplorer(AddressCredits([], 1000))
+        uc.block_explorer_2 = TooLargeStubBlockExplorer(None)
+
+        assert uc.exec() is None
+        metrics = uc._explorer_metrics.get('AnotherExplorer')
+        assert (metrics.success_count, metrics.failure_count) == (0, 0)
+
+    def test_explorer_error_counts_as_failure(self):
+        uc = StubFetchAddressCreditsFromExplorersUC(AddressCredits([], 1000), None)
+        assert uc.exec() is None
+        assert uc._explorer_metrics.get('AnotherExplorer').failure_count == 1
@@ -1,3 +1,5 @@
+from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.models.credit import Credit
 from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
 from cypherpunkpay.usecases.fetch_address_credits_from_bitcoin_full_node_uc import FetchAddressCreditsFromBitcoinFullNodeUC
 from tests.unit.config.example_config import ExampleConfig
@@ -23,3 +25,24 @@ class FetchAddressCreditsFromBitcoinFullNodeUCTest(CypherpunkpayDBTestCase):
         )
         ret = uc.exec()
         assert ret is None
+
+    def test_shares_wallet_snapshot_among_addresses(self):
+        FetchAddressCreditsFromBitcoinFullNodeUC._snapshots.clear()
+        FetchAddressCreditsFromBitcoinFullNodeUC._credits_cache.clear()
+        calls = []
+
+        class StubUC(FetchAddressCreditsFromBitcoinFullNodeUC):
+            def _fetch_all_address_credits(self):
+                calls.append(self.current_height)
+                return self.current_height, {'address_1': AddressCredits([Credit.unconfirmed(1)], self.current_height)}
+
+        def uc(address, height):
+            return StubUC(address=address, wallet_fingerprint='abcd', current_height=height, http_client=DummyHttpClient(), config=ExampleConfig())
+
+        assert uc('address_1', 100).exec().all() == [Credit.unconfirmed(1)]
+        assert uc('address_2', 100).exec().all() == []
+        assert calls == [100]
+
+        # New block invalidates the snapshot
+        uc('address_1', 101).exec()
+        assert calls == [100, 101]
@@ -0,0 +1,94 @@
+import time
+from threading import Event
+
+from cypherpunkpay.explorers.bitcoin.block_explorer import BlockExplorer
+from cypherpunkpay.explorers.explorer_metrics import ExplorerMetricsRegistry
+from cypherpunkpay.models.address_credits import AddressCredits
+from cypherpunkpay.net.http_client.dummy_http_client import DummyHttpClient
+from cypherpunkpay.usecases.fetch_blockchain_height_uc import FetchBlockchainHeightUC
+from tests.unit.config.example_config import ExampleConfig
+from tests.unit.test_case import CypherpunkpayTestCase
+
+
+class StubHeightExplorer(BlockExplorer):
+
+    def __init__(self, height: [int, None], release: Event = None):
+        super().__init__(DummyHttpClient())
+        self._height = height
+        self._release = release
+        self.called = False
+
+    def get_height(self) -> [int, None]:
+        self.called = True
+        if self._release:
+            self._release.wait(timeout=10)
+        return self._height
+
+    def get_address_credits(self, address: str, current_height: int) -> [AddressCredits, None]:
+        pass
+
+    def api_endpoint(self) -> str:
+        pass
+
+
+def stub_explorer(name: str, height: [int, None], release: Event = None) -> StubHeightExplorer:
+    # Metrics are kept per explorer class
+    return type(name, (StubHeightExplorer,), {})(height, release)
+
+
+class StubFetchBlockchainHeightUC(FetchBlockchainHeightUC):
+
+    def __init__(self, explorers):
+        super().__init__('btc', config=ExampleConfig(), http_client=DummyHttpClient())
+        self._explorers = explorers
+        self._explorer_metrics = ExplorerMetricsRegistry()
+
+    def _btc_explorers(self):
+        return list(self._explorers)
+
+
+class FetchBlockchainHeightUCTest(CypherpunkpayTestCase):
+
+    def setup_method(self):
+        self.release = Event()
+
+    def teardown_method(self):
+        self.release.set()
+
+    def test_returns_median_of_quorum_without_waiting_for_stragglers(self):
+        uc = StubFetchBlockchainHeightUC([
+            stub_explorer('A', 1001),
+            stub_explorer('B', 1000),
+            stub_explorer('C', 1002),
+            stub_explorer('D', 999, self.release)
+        ])
+        started_at = time.monotonic()
+        self.assertEqual(1001, uc.btc_height_from_explorers())
+        self.assertLess(time.monotonic() - started_at, 5)
+
+    def test_asks_next_explorer_when_one_fails(self):
+        explorers = [
+            stub_explorer('A', None),
+            stub_explorer('B', None),
+            stub_explorer('C', 1000),
+            stub_explorer('D', 1000),
+            stub_explorer('E', 1000),
+        ]
+        uc = StubFetchBlockchainHeightUC(explorers)
+        self.assertEqual(1000, uc.btc_height_from_explorers())
+        assert all(explorer.called for explorer in explorers)
+
+    def test_when_all_fail__return_None(self):
+        uc = StubFetchBlockchainHeightUC([stub_explorer('A', None), stub_explorer('B', None)])
+        self.assertIsNone(uc.btc_height_from_explorers())
+
+    def test_failing_explorers_are_deprioritised(self):
+        failing = stub_explorer('Failing', None)
+        uc = StubFetchBlockchainHeightUC([failing] + [stub_explorer(name, 1000) for name in 'ABCD'])
+        uc.btc_height_from_explorers()
+        assert failing.called
+
+        failing.called = False
+        uc.btc_height_from_explorers()
+        assert not failing.called  # A..D answered, it is only a spare now
+        self.assertEqual(1, uc._explorer_metrics.get('Failing').failure_count)
@@ -0,0 +1,71 @@
+import pytest
+
+from cypherpunkpay.globals import *
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.usecases.invalid_params import InvalidParams
+from cypherpunkpay.usecases.list_charges_uc import ListChargesUC
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+
+class ListChargesUCTest(CypherpunkpayDBTestCase):
+
+    def create_charges(self, count, **kwargs) -> List[str]:
+        base = utc_now() - timedelta(days=1)
+        return [ExampleCharge.db_create(self.db, created_at=base + timedelta(minutes=i), **kwargs).uid for i in range(count)]
+
+    def list(self, **kwargs):
+        return ListChargesUC(db=self.db, **kwargs).exec()
+
+    def test_paginates_newest_first(self):
+        uids = list(reversed(self.create_charges(5)))
+
+        page = self.list(page_size='2')
+        assert [c.uid for c in page.charges] == uids[0:2]
+        assert page.total == 5
+
+        page = self.list(page_size='2', before=page.next_cursor)
+        assert [c.uid for c in page.charges] == uids[2:4]
+
+        page = self.list(page_size='2', before=page.next_cursor)
+        assert [c.uid for c in page.charges] == uids[4:5]
+        assert page.next_cursor is None
+
+    def test_charges_created_at_the_same_time_are_not_skipped(self):
+        created_at = utc_now()
+        uids = sorted([ExampleCharge.db_create(self.db, created_at=created_at).uid for _ in range(3)], reverse=True)
+        first = self.list(page_size='1')
+        second = self.list(page_size='2', before=first.next_cursor)
+        assert [c.uid for c in first.charges + second.charges] == uids
+
+    def test_filters_by_status_with_maintained_count(self):
+        self.create_charges(2, status='awaiting')
+        completed_uids = self.create_charges(1, status='completed')
+
+        page = self.list(status='completed')
+        assert [c.uid for c in page.charges] == completed_uids
+        assert page.total == 1
+
+        charge = self.db.get_charge_by_uid(completed_uids[0])
+        charge.advance_to_expired()
+        self.db.save(charge)
+        assert self.list(status='completed').total == 0
+        assert self.list(status='expired').total == 1
+        assert self.list(status='awaiting').total == 2
+
+    def test_filters_by_created_date(self):
+        ExampleCharge.db_create(self.db, created_at=utc_now() - timedelta(days=10))
+        recent = ExampleCharge.db_create(self.db, created_at=utc_now())
+        today = utc_now().date().isoformat()
+
+        page = self.list(created_from=today, created_to=today)
+        assert [c.uid for c in page.charges] == [recent.uid]
+        assert page.total is None
+
+    def test_caps_page_size(self):
+        self.create_charges(ListChargesUC.MAX_PAGE_SIZE + 1)
+        assert len(self.list(page_size='100000').charges) == ListChargesUC.MAX_PAGE_SIZE
+
+    def test_rejects_invalid_params(self):
+        with pytest.raises(InvalidParams) as e:
+            self.list(status='bogus', created_from='yesterday', before='nonsense', page_size='many')
+        assert set(e.value.errors) == {'status', 'created_from', 'before', 'page_size'}
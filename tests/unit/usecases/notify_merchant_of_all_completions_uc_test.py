@@ -1,5 +1,7 @@
 from decimal import Decimal
 
+import pytest
+
 from tests.unit.config.example_config import ExampleConfig
 from cypherpunkpay import utc_now
 from cypherpunkpay.models.charge import ExampleCharge
@@ -25,6 +27,14 @@ class MockHttpClient(DummyHttpClient):
         return MockHttpClient.Response()
 
 
+class CrashingHttpClient(MockHttpClient):
+
+    def post(self, url, privacy_context, headers: dict = None, body: dict = None, set_tor_browser_headers: bool = True, verify=None):
+        if self.counter == 1:
+            raise SystemExit('shutting down')
+        return super().post(url, privacy_context, headers, body, set_tor_browser_headers, verify)
+
+
 class NotifyMerchantOfAllCompletionsUCTest(CypherpunkpayDBTestCase):
 
     def test_exec(self):
@@ -52,3 +62,16 @@ class NotifyMerchantOfAllCompletionsUCTest(CypherpunkpayDBTestCase):
         NotifyMerchantOfAllCompletionsUC(db=self.db, config=ExampleConfig(), http_client=mock_http_client).exec()
 
         assert mock_http_client.counter == 2
+        assert self.db.get_charge_by_uid('1').merchant_callback_url_called_at is not None
+        assert self.db.get_charge_by_uid('2').merchant_callback_url_called_at is not None
+
+    def test_each_charge_is_marked_right_after_its_call(self):
+        ExampleCharge.db_create(self.db, uid='1', status='completed', merchant_order_id='ord-1')
+        ExampleCharge.db_create(self.db, uid='2', status='completed', merchant_order_id='ord-2')
+
+        with pytest.raises(SystemExit):
+            NotifyMerchantOfAllCompletionsUC(db=self.db, config=ExampleConfig(), http_client=CrashingHttpClient()).exec()
+
+        # A restart only repeats the call that was in flight
+        called_at = [self.db.get_charge_by_uid(uid).merchant_callback_url_called_at for uid in ('1', '2')]
+        assert sum(1 for at in called_at if at is not None) == 1
@@ -1,3 +1,6 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 
 from cypherpunkpay.globals import *
@@ -128,6 +131,35 @@ class PickCryptocurrencyForChargeUCTest(CypherpunkpayDBTestCase):
         self.pick_cryptocurrency_for_charge(charge, 'btc', config=config)
         self.assertEqual('tb1qqcc0s4hk73e4zr27w6y2m8eaz3600tpsrcupqz', charge.cc_address)
 
+    def test_concurrent_picks_drain_empty_pool(self):
+        # Both callers find the pool empty, then each claim waits (briefly, claims may be serialized) for both refills
+        empty_pool_seen = threading.Barrier(2, timeout=5)
+        both_refilled = threading.Barrier(2, timeout=0.5)
+        claim_pooled_address = self.db.claim_pooled_address
+        claims_per_thread = {}
+
+        def racing_claim(*args):
+            claims = claims_per_thread[threading.get_ident()] = claims_per_thread.get(threading.get_ident(), 0) + 1
+            if claims == 2:
+                try:
+                    both_refilled.wait()
+                except threading.BrokenBarrierError:
+                    pass
+            claimed = claim_pooled_address(*args)
+            if claims == 1:
+                empty_pool_seen.wait()
+            return claimed
+        self.db.claim_pooled_address = racing_claim
+        try:
+            charges = [self.create_fiat_charge(), self.create_fiat_charge()]
+            with ThreadPoolExecutor(2) as executor:
+                list(executor.map(lambda charge: self.pick_cryptocurrency_for_charge(charge, 'btc'), charges))
+        finally:
+            del self.db.claim_pooled_address
+
+        assert sorted(charge.address_derivation_index for charge in charges) == [0, 1]
+        assert charges[0].cc_address != charges[1].cc_address
+
     # BTC LIGHTNING
 
     def test_btc_lightning(self):
@@ -0,0 +1,50 @@
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.usecases.refill_address_pool_uc import RefillAddressPoolUC
+from tests.unit.config.example_config import ExampleConfig
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+
+class ExampleConfigWithOffset(ExampleConfig):
+
+    def btc_account_offset(self):
+        return 10
+
+
+class RefillAddressPoolUCTest(CypherpunkpayDBTestCase):
+
+    def refill(self, target_size, config=None) -> RefillAddressPoolUC:
+        uc = RefillAddressPoolUC('btc', target_size=target_size, config=config or ExampleConfig(), db=self.db)
+        uc.exec()
+        return uc
+
+    def test_refills_up_to_target_size(self):
+        uc = self.refill(3)
+        wallet_fingerprint = uc.wallet_fingerprint()
+        self.assertEqual(3, self.db.count_unclaimed_pooled_addresses(wallet_fingerprint, 0))
+        self.assertEqual(0, uc.exec())
+
+    def test_claims_addresses_in_index_order(self):
+        uc = self.refill(2)
+        wallet_fingerprint = uc.wallet_fingerprint()
+        self.assertEqual((0, uc.derive_address(0)), self.db.claim_pooled_address(wallet_fingerprint, 0))
+        self.assertEqual((1, uc.derive_address(1)), self.db.claim_pooled_address(wallet_fingerprint, 0))
+        self.assertIsNone(self.db.claim_pooled_address(wallet_fingerprint, 0))
+
+        self.refill(1)
+        self.assertEqual(2, self.db.claim_pooled_address(wallet_fingerprint, 0)[0])
+
+    def test_continues_after_charges_created_before_the_pool(self):
+        wallet_fingerprint = RefillAddressPoolUC('btc', config=ExampleConfig(), db=self.db).wallet_fingerprint()
+        ExampleCharge.db_create(self.db, wallet_fingerprint=wallet_fingerprint)
+        ExampleCharge.db_create(self.db, wallet_fingerprint=wallet_fingerprint)
+        self.refill(1)
+        self.assertEqual(2, self.db.claim_pooled_address(wallet_fingerprint, 0)[0])
+
+    def test_drops_addresses_derived_with_stale_offset(self):
+        uc = self.refill(2)
+        wallet_fingerprint = uc.wallet_fingerprint()
+        self.db.claim_pooled_address(wallet_fingerprint, 0)
+
+        uc_with_offset = self.refill(1, config=ExampleConfigWithOffset())
+        self.assertEqual(0, self.db.count_unclaimed_pooled_addresses(wallet_fingerprint, 0))
+        self.assertEqual((1, uc_with_offset.derive_address(11)), self.db.claim_pooled_address(wallet_fingerprint, 10))
@@ -1,3 +1,5 @@
+import time
+
 from cypherpunkpay.globals import *
 from cypherpunkpay.ln.dummy.dummy_lightning_client import DummyLightningClient
 from cypherpunkpay.models.address_credits import AddressCredits
@@ -22,8 +24,10 @@ class StubRefreshChargeUC(RefreshChargeUC):
             config=ExampleConfig()
         )
         self._mock_credits = credits
+        self.fetch_count = 0
 
     def fetch_address_credits_from_btc_explorers(self, charge):
+        self.fetch_count += 1
         if self._mock_credits is None:
             return None
         else:
@@ -516,3 +520,69 @@ class RefreshChargeUCTest(CypherpunkpayDBTestCase):
 
         uc = self.MockLnRefreshChargeUC(charge.uid, db=self.db)
         uc.exec()  # should not call LND (checked by the mock)
+
+    # block-driven refresh of charges waiting for confirmations
+
+    def test_confirmed_recomputed_from_memoized_credits_on_new_height(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        credits = [Credit.confirmed(1000, 100)]
+        uc = StubRefreshChargeUC(charge.uid, credits, 100, db=self.db)
+        uc.exec()
+        assert self.db.reload(charge).is_confirmed()
+
+        uc = StubRefreshChargeUC(charge.uid, credits, 101, db=self.db)
+        uc.exec()
+        self.assertEqual(0, uc.fetch_count)
+        self.db.reload(charge)
+        assert charge.is_completed()
+        self.assertEqual(2, charge.confirmations)
+
+    def test_paid_with_unconfirmed_credits_refetched_every_time(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        StubRefreshChargeUC(charge.uid, [Credit.unconfirmed(1000)], 100, db=self.db).exec()
+        assert self.db.reload(charge).is_paid()
+        assert charge.uid not in RefreshChargeUC._memo
+
+        uc = StubRefreshChargeUC(charge.uid, [], 100, db=self.db)
+        uc.exec()
+        self.assertEqual(1, uc.fetch_count)  # same block but the paying transaction got dropped from the mempool
+        assert self.db.reload(charge).is_unpaid()
+
+    def test_paid_refetched_on_new_height(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        StubRefreshChargeUC(charge.uid, [Credit.unconfirmed(1000)], 100, db=self.db).exec()
+        assert self.db.reload(charge).is_paid()
+
+        uc = StubRefreshChargeUC(charge.uid, [Credit.confirmed(1000, 101)], 101, db=self.db)
+        uc.exec()
+        self.assertEqual(1, uc.fetch_count)
+        assert self.db.reload(charge).is_confirmed()
+
+    def test_memoized_credits_refetched_when_height_goes_down(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        StubRefreshChargeUC(charge.uid, [Credit.confirmed(1000, 100)], 100, db=self.db).exec()
+
+        uc = StubRefreshChargeUC(charge.uid, [Credit.unconfirmed(1000)], 99, db=self.db)
+        uc.exec()
+        self.assertEqual(1, uc.fetch_count)
+
+    def test_memo_dropped_once_charge_completes(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        StubRefreshChargeUC(charge.uid, [Credit.confirmed(1000, 100)], 100, db=self.db).exec()
+        assert charge.uid in RefreshChargeUC._memo
+
+        StubRefreshChargeUC(charge.uid, [Credit.confirmed(1000, 100)], 101, db=self.db).exec()
+        assert self.db.reload(charge).is_completed()
+        assert charge.uid not in RefreshChargeUC._memo
+
+    def test_credits_of_completed_charge_are_not_memoized(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        StubRefreshChargeUC(charge.uid, [Credit.confirmed(1000, 99)], 100, db=self.db).exec()
+        assert self.db.reload(charge).is_completed()
+        assert charge.uid not in RefreshChargeUC._memo
+
+    def test_expired_memos_are_purged_on_every_call(self):
+        charge = ExampleCharge.db_create(self.db, total=1000, status='awaiting', pay_status='unpaid')
+        RefreshChargeUC._memo['stale'] = (time.monotonic() - RefreshChargeUC.MEMO_MAX_AGE_SECONDS - 1, AddressCredits([], 100))
+        StubRefreshChargeUC(charge.uid, [Credit.unconfirmed(1000)], 100, db=self.db).exec()
+        assert 'stale' not in RefreshChargeUC._memo
@@ -0,0 +1,29 @@
+from cypherpunkpay.globals import *
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
+from cypherpunkpay.models.charge import ExampleCharge
+from cypherpunkpay.usecases.refresh_confirming_charges_uc import RefreshConfirmingChargesUC
+from tests.unit.db_test_case import CypherpunkpayDBTestCase
+
+
+class RecordingChargeRefreshEngine(ChargeRefreshEngine):
+
+    def __init__(self):
+        super().__init__(refresh_charge=lambda charge_uid: None)
+        self.refreshed_now = []
+
+    def refresh_now(self, charge_uids) -> None:
+        self.refreshed_now.extend(charge_uids)
+
+
+class RefreshConfirmingChargesUCTest(CypherpunkpayDBTestCase):
+
+    def test_refreshes_only_charges_waiting_for_confirmations(self):
+        ExampleCharge.db_create(self.db, uid='1', status='awaiting', pay_status='unpaid')
+        ExampleCharge.db_create(self.db, uid='2', status='awaiting', pay_status='paid', paid_at=utc_now())
+        ExampleCharge.db_create(self.db, uid='3', status='awaiting', pay_status='confirmed', paid_at=utc_now())
+        ExampleCharge.db_create(self.db, uid='4', status='completed', pay_status='confirmed', paid_at=utc_now())
+
+        engine = RecordingChargeRefreshEngine()
+        RefreshConfirmingChargesUC('btc', 100, 101, engine, self.db).exec()
+
+        self.assertEqual(['2', '3'], sorted(engine.refreshed_now))
@@ -1,8 +1,5 @@
-from apscheduler.job import Job
-from apscheduler.triggers.interval import IntervalTrigger
-
 from cypherpunkpay.globals import *
-from cypherpunkpay.jobs.job_scheduler import JobScheduler
+from cypherpunkpay.jobs.charge_refresh_engine import ChargeRefreshEngine
 from cypherpunkpay.usecases.update_charge_jobs_uc import UpdateChargeJobsUC
 from cypherpunkpay.models.charge import ExampleCharge
 from tests.unit.db_test_case import CypherpunkpayDBTestCase
@@ -10,23 +7,30 @@ from tests.unit.db_test_case import CypherpunkpayDBTestCase
 
 class UpdateChargeJobsUCTest(CypherpunkpayDBTestCase):
 
-    TRIGGER_1s = IntervalTrigger(seconds=1)
+    INTERVAL_1s = timedelta(seconds=1)
     EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT = 2  # 2 seconds
     EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION = 15  # 15 seconds
     EXPECTED_INTERVAL_FOR_FINAL = 30 * 60  # 30 minutes
 
     def setup_method(self):
-        self.job_scheduler = JobScheduler()
-        self.job_scheduler.pause()  # we don't want any jobs to actually run during the tests
+        self.engine = ChargeRefreshEngine(refresh_charge=lambda charge_uid: None)  # never ticked so nothing actually runs
 
     def teardown_method(self):
-        self.job_scheduler.shutdown()
+        self.engine.shutdown()
+
+    def db_create_written_at(self, updated_at, **kwargs):
+        charge = ExampleCharge.create(created_at=updated_at, **kwargs)
+        charge.updated_at = updated_at
+        self.db.insert(charge)
+
+    def interval_of(self, charge_uid) -> int:
+        return round(self.engine.interval_for(charge_uid).total_seconds())
 
     def test_blank_slate(self):
-        UpdateChargeJobsUC(self.job_scheduler, self.db).exec()
-        assert not self.job_scheduler.get_all_jobs()
+        UpdateChargeJobsUC(self.engine, self.db).exec()
+        assert not self.engine.tracked_uids()
 
-    def test_removes_jobs_for_old_charges(self):
+    def test_untracks_old_charges(self):
         before_threshold_date = utc_ago(days=8)
         within_threshold_date = utc_ago(days=6)
 
@@ -35,48 +39,29 @@ class UpdateChargeJobsUCTest(CypherpunkpayDBTestCase):
         ExampleCharge.db_create(self.db, uid='3'),
         ExampleCharge.db_create(self.db, uid='4')
 
-        self.job_scheduler.add_job(None, id="refresh_charge_1", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_2", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_3", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_4", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_5", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="unrelated_job_1", trigger=self.TRIGGER_1s)
+        for uid in ['1', '2', '3', '4', '5']:
+            self.engine.track(uid, self.INTERVAL_1s)
 
-        UpdateChargeJobsUC(self.job_scheduler, self.db).exec()
+        UpdateChargeJobsUC(self.engine, self.db).exec()
 
-        updated_jobs = [job.id for job in self.job_scheduler.get_all_jobs()]
-        assert 'refresh_charge_1' not in updated_jobs
-        assert 'refresh_charge_2' in updated_jobs
-        assert 'refresh_charge_3' in updated_jobs
-        assert 'refresh_charge_4' in updated_jobs
-        assert 'refresh_charge_5' not in updated_jobs
-        assert 'unrelated_job_1' in updated_jobs
+        assert self.engine.tracked_uids() == {'2', '3', '4'}
 
-    def test_adds_jobs_for_new_charges(self):
+    def test_tracks_new_charges(self):
         ExampleCharge.db_create(self.db, uid='1'),
         ExampleCharge.db_create(self.db, uid='2', pay_status='unpaid', status='awaiting'),
         ExampleCharge.db_create(self.db, uid='3', pay_status='confirmed', status='completed', paid_at=utc_now()),
         ExampleCharge.db_create(self.db, uid='4')
 
-        self.job_scheduler.add_job(None, id="refresh_charge_1", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_4", trigger=self.TRIGGER_1s)
-
-        UpdateChargeJobsUC(self.job_scheduler, self.db).exec()
+        self.engine.track('1', self.INTERVAL_1s)
+        self.engine.track('4', self.INTERVAL_1s)
 
-        updated_jobs = [job.id for job in self.job_scheduler.get_all_jobs()]
-        self.assertEqual(4, len(updated_jobs))
-        assert 'refresh_charge_1' in updated_jobs
-        assert 'refresh_charge_2' in updated_jobs
-        assert 'refresh_charge_3' in updated_jobs
-        assert 'refresh_charge_4' in updated_jobs
+        UpdateChargeJobsUC(self.engine, self.db).exec()
 
-        job_2: Job = first(lambda job: job.id == 'refresh_charge_2', self.job_scheduler.get_all_jobs())
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, round(job_2.trigger.interval_length))
+        assert self.engine.tracked_uids() == {'1', '2', '3', '4'}
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, self.interval_of('2'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, self.interval_of('3'))
 
-        job_3: Job = first(lambda job: job.id == 'refresh_charge_3', self.job_scheduler.get_all_jobs())
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, round(job_3.trigger.interval_length))
-
-    def test_reschedules_jobs_according_to_charge_state(self):
+    def test_reschedules_according_to_charge_state(self):
         ExampleCharge.db_create(self.db, uid='1', pay_status='unpaid', status='draft'),
         ExampleCharge.db_create(self.db, uid='2', pay_status='unpaid', status='awaiting'),
         ExampleCharge.db_create(self.db, uid='3', pay_status='underpaid', status='awaiting'),
@@ -87,43 +72,59 @@ class UpdateChargeJobsUCTest(CypherpunkpayDBTestCase):
         ExampleCharge.db_create(self.db, uid='8', pay_status='paid', status='expired', paid_at=utc_ago(days=3))
         ExampleCharge.db_create(self.db, uid='9', pay_status='unpaid', status='cancelled')
 
-        self.job_scheduler.add_job(None, id="refresh_charge_1", trigger=self.TRIGGER_1s)  # should be removed because it is draft charge
-        self.job_scheduler.add_job(None, id="refresh_charge_2", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_3", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_4", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_5", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_6", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_7", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_8", trigger=self.TRIGGER_1s)
-        self.job_scheduler.add_job(None, id="refresh_charge_9", trigger=self.TRIGGER_1s)
-
-        UpdateChargeJobsUC(self.job_scheduler, self.db).exec()
-
-        updated_jobs = self.job_scheduler.get_all_jobs()
-        self.assertEqual(8, len(updated_jobs))
-
-        assert not first(lambda job: job.id == 'refresh_charge_1', updated_jobs)
-
-        job_2: Job = first(lambda job: job.id == 'refresh_charge_2', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, round(job_2.trigger.interval_length))
-
-        job_3: Job = first(lambda job: job.id == 'refresh_charge_3', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, round(job_3.trigger.interval_length))
-
-        job_4: Job = first(lambda job: job.id == 'refresh_charge_4', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION, round(job_4.trigger.interval_length))
-
-        job_5: Job = first(lambda job: job.id == 'refresh_charge_5', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION, round(job_5.trigger.interval_length))
-
-        job_6: Job = first(lambda job: job.id == 'refresh_charge_6', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, round(job_6.trigger.interval_length))
-
-        job_7: Job = first(lambda job: job.id == 'refresh_charge_7', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, round(job_7.trigger.interval_length))
-
-        job_8: Job = first(lambda job: job.id == 'refresh_charge_8', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, round(job_8.trigger.interval_length))
-
-        job_9: Job = first(lambda job: job.id == 'refresh_charge_9', updated_jobs)
-        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, round(job_9.trigger.interval_length))
+        for uid in ['1', '2', '3', '4', '5', '6', '7', '8', '9']:
+            self.engine.track(uid, self.INTERVAL_1s)  # '1' should be untracked because it is draft charge
+
+        UpdateChargeJobsUC(self.engine, self.db).exec()
+
+        self.assertEqual(8, self.engine.tracked_count())
+        assert '1' not in self.engine.tracked_uids()
+
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, self.interval_of('2'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, self.interval_of('3'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION, self.interval_of('4'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION, self.interval_of('5'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, self.interval_of('6'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, self.interval_of('7'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, self.interval_of('8'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_FINAL, self.interval_of('9'))
+
+    def test_exec_after_first_sync_only_loads_charges_written_since(self):
+        class SpyUpdateChargeJobsUC(UpdateChargeJobsUC):
+            loaded_uids = []
+
+            def _db_get_charges_updated_since(self, updated_since):
+                charges = super()._db_get_charges_updated_since(updated_since)
+                self.loaded_uids.extend(charge.uid for charge in charges)
+                return charges
+
+        self.db_create_written_at(utc_ago(minutes=5), uid='1', pay_status='unpaid', status='awaiting')
+        self.db_create_written_at(utc_ago(minutes=5), uid='2', pay_status='unpaid', status='awaiting')
+        uc = SpyUpdateChargeJobsUC(self.engine, self.db)
+        uc.exec()  # first one is a sweep
+        assert self.engine.tracked_uids() == {'1', '2'}
+
+        charge = self.db.get_charge_by_uid('2')
+        charge.pay_status = 'paid'
+        charge.paid_at = utc_now()
+        self.db.save(charge)
+        ExampleCharge.db_create(self.db, uid='3', pay_status='unpaid', status='awaiting')
+        self.engine.track('expired-from-window', self.INTERVAL_1s)
+        uc.exec()
+
+        assert sorted(uc.loaded_uids) == ['2', '3']
+        assert self.engine.tracked_uids() == {'1', '2', '3', 'expired-from-window'}  # untracking is left to sweep()
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_CONFIRMATION, self.interval_of('2'))
+        self.assertEqual(self.EXPECTED_INTERVAL_FOR_AWAITING_PAYMENT, self.interval_of('3'))
+
+    def test_sweep_steps_intervals_down_as_paid_charges_age(self):
+        self.db_create_written_at(utc_ago(hours=2), uid='1', pay_status='paid', status='awaiting', paid_at=utc_ago(hours=2))
+        uc = UpdateChargeJobsUC(self.engine, self.db)
+        self.engine.track('1', timedelta(seconds=15))
+        uc._synced_at = utc_now()  # as if synced while the charge was fresh
+
+        uc.exec()
+        assert self.interval_of('1') == 15
+
+        uc.sweep()
+        assert self.interval_of('1') == 3 * 60